@@ -0,0 +1 @@
+default_app_config = 'open_edx_api_extension.apps.ApiExtensionConfig'
@@ -0,0 +1,154 @@
+"""
+Admission control of the expensive views.
+
+A view limits how many of its requests run at once in the whole
+deployment, and how many of them one API client may run. A limit of N is N
+slot keys in the Django cache, which must be shared by the workers
+(memcached) for the limits to be global: a request takes a free slot with
+cache.add and frees it when done. Every slot expires on its own, so the
+slots of crashed workers come back without affecting the others.
+
+The slots are taken once the request is authenticated and before the view
+does any work. A request over a limit waits up to
+API_EXTENSION_ADMISSION_QUEUE_TIMEOUT seconds for a slot, then is rejected
+with 429 (client limit) or 503 (endpoint limit) and a Retry-After header.
+
+The limits of a view are its `admission_limits`, overridden by
+API_EXTENSION_ADMISSION_LIMITS, e.g.:
+
+    API_EXTENSION_ADMISSION_LIMITS = {
+        'CourseUserResult': {'endpoint': 32, 'client': 8},
+        'PaidMassEnrollment': {'endpoint': None},  # no endpoint limit
+    }
+"""
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from ipware.ip import get_ip
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+
+ADMISSION_LIMITS = getattr(settings, 'API_EXTENSION_ADMISSION_LIMITS', {})
+QUEUE_TIMEOUT = getattr(settings, 'API_EXTENSION_ADMISSION_QUEUE_TIMEOUT', 2)
+RETRY_AFTER = getattr(settings, 'API_EXTENSION_ADMISSION_RETRY_AFTER', 5)
+# Slots of crashed workers are freed when they expire.
+SLOT_TIMEOUT = getattr(settings, 'API_EXTENSION_ADMISSION_SLOT_TIMEOUT', 5 * 60)
+POLL_INTERVAL = 0.05
+
+CACHE_KEY_TEMPLATE = u'open_edx_api_extension.admission.{}'
+
+
+class ServiceOverloaded(APIException):
+    """
+    All the slots of the endpoint are taken.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The service is overloaded, retry later.'
+
+    def __init__(self, wait):
+        super(ServiceOverloaded, self).__init__()
+        self.wait = wait
+
+
+def _take_slot(key, limit):
+    """
+    Returns:
+        The (slot key, token) of the slot taken, None when all are taken.
+    """
+    slot_keys = [u'{}.{}'.format(key, index) for index in range(limit)]
+    taken = cache.get_many(slot_keys)
+    token = uuid.uuid4().hex
+    for slot_key in slot_keys:
+        # add() only succeeds for one of the requests racing for the slot
+        if slot_key not in taken and cache.add(slot_key, token, SLOT_TIMEOUT):
+            return slot_key, token
+    return None
+
+
+def _release_slot(slot):
+    slot_key, token = slot
+    # The slot may have expired and been taken by another request since
+    if cache.get(slot_key) == token:
+        cache.delete(slot_key)
+
+
+def _release_after(content, slots):
+    try:
+        for chunk in content:
+            yield chunk
+    finally:
+        for slot in slots:
+            _release_slot(slot)
+
+
+def acquire_slot(key, limit, timeout=QUEUE_TIMEOUT):
+    """
+    Take one of the `limit` slots of the key, waiting up to `timeout`
+    seconds for one.
+
+    Returns:
+        The slot to release, None when no slot was free in time.
+    """
+    deadline = time.time() + timeout
+    slot = _take_slot(key, limit)
+    while slot is None:
+        if time.time() >= deadline:
+            return None
+        time.sleep(POLL_INTERVAL)
+        slot = _take_slot(key, limit)
+    return slot
+
+
+class AdmissionControlMixin(object):
+    """
+    Limits the concurrent requests of the view, see the module docstring.
+    """
+    # {'endpoint': requests at once in total, 'client': requests at once per client}
+    admission_limits = {}
+
+    def get_admission_limits(self):
+        limits = dict(self.admission_limits)
+        limits.update(ADMISSION_LIMITS.get(self.__class__.__name__, {}))
+        return limits
+
+    def get_client_id(self, request):
+        if request.user and request.user.is_authenticated():
+            return u'user:{}'.format(request.user.id)
+        return u'ip:{}'.format(get_ip(request))
+
+    def initial(self, request, *args, **kwargs):
+        super(AdmissionControlMixin, self).initial(request, *args, **kwargs)
+        limits = self.get_admission_limits()
+        view_key = CACHE_KEY_TEMPLATE.format(self.__class__.__name__)
+
+        if limits.get('client'):
+            client_id = hashlib.md5(self.get_client_id(request).encode('utf-8')).hexdigest()
+            client_key = u'{}.{}'.format(view_key, client_id)
+            slot = acquire_slot(client_key, limits['client'])
+            if slot is None:
+                raise Throttled(wait=RETRY_AFTER)
+            self.admission_slots.append(slot)
+
+        if limits.get('endpoint'):
+            slot = acquire_slot(view_key, limits['endpoint'])
+            if slot is None:
+                raise ServiceOverloaded(wait=RETRY_AFTER)
+            self.admission_slots.append(slot)
+
+    def dispatch(self, request, *args, **kwargs):
+        self.admission_slots = []
+        release = True
+        try:
+            response = super(AdmissionControlMixin, self).dispatch(request, *args, **kwargs)
+            if response.streaming and self.admission_slots:
+                # The work goes on while the response is streamed
+                response.streaming_content = _release_after(response.streaming_content, self.admission_slots)
+                release = False
+            return response
+        finally:
+            if release:
+                for slot in self.admission_slots:
+                    _release_slot(slot)
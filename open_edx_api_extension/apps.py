@@ -0,0 +1,12 @@
+"""
+App configuration of the API extension.
+"""
+from django.apps import AppConfig
+
+
+class ApiExtensionConfig(AppConfig):
+    name = 'open_edx_api_extension'
+    verbose_name = 'Open edX API extension'
+
+    def ready(self):
+        from . import signals  # pylint: disable=unused-variable
@@ -0,0 +1,149 @@
+"""
+Maintenance of the course and library catalog tables.
+
+The list endpoints read CourseCatalogEntry and LibraryCatalogEntry only, so
+they never touch the modulestore on the request path. The entries are
+updated from the publish/delete signals (see signals.py) and rebuilt in
+full with the `rebuild_api_extension_catalog` management command.
+"""
+import logging
+
+from courseware.courses import course_image_url
+from edx_proctoring.models import ProctoredExam
+from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore.django import modulestore
+
+from .exam_cache import get_course_exams, get_exams_for_courses
+from .models import CourseCatalogEntry, LibraryCatalogEntry
+
+log = logging.getLogger(__name__)
+
+
+def exam_counts(exams):
+    """
+    Exam counters of a CourseCatalogEntry for the list of serialized exams.
+    """
+    proctored = [exam for exam in exams if exam['is_proctored']]
+    return {
+        'exam_count': len(exams),
+        'proctored_exam_count': len(proctored),
+        'active_proctored_exam_count': len([exam for exam in proctored if exam['is_active']]),
+        'has_proctored_exams': len(proctored) > 0,
+    }
+
+
+def course_entry_values(course, exams):
+    """
+    CourseCatalogEntry fields for the course descriptor.
+    """
+    values = {
+        'display_name': course.display_name,
+        'org': course.location.org,
+        'course': course.location.course,
+        'run': course.location.run,
+        'image_url': course_image_url(course),
+        'start': course.start,
+        'end': course.end,
+    }
+    values.update(exam_counts(exams))
+    return values
+
+
+def update_course_entry(course_key):
+    """
+    Refresh the catalog entry of the course from the modulestore.
+    """
+    course = modulestore().get_course(course_key)
+    if course is None:
+        delete_course_entry(course_key)
+        return None
+    entry, __ = CourseCatalogEntry.objects.update_or_create(
+        course_id=course_key,
+        defaults=course_entry_values(course, get_course_exams(course_key)),
+    )
+    return entry
+
+
+def update_course_exam_counts(course_id):
+    """
+    Refresh the exam counters of the course catalog entry.
+
+    Run from the exam signals: the exams are read from the database, not
+    through the exam cache, which must not be filled before the change is
+    committed.
+    """
+    course_key = CourseKey.from_string(unicode(course_id))
+    entry = CourseCatalogEntry.objects.filter(course_id=course_key).first()
+    if entry is None:
+        return
+    exams = list(ProctoredExam.objects.filter(course_id=unicode(course_key)).values('is_proctored', 'is_active'))
+    for field, value in exam_counts(exams).items():
+        setattr(entry, field, value)
+    entry.save()
+
+
+def delete_course_entry(course_key):
+    CourseCatalogEntry.objects.filter(course_id=course_key).delete()
+
+
+def library_entry_values(library):
+    """
+    LibraryCatalogEntry fields for the library root block.
+    """
+    return {
+        'display_name': library.display_name,
+        'org': library.location.library_key.org,
+        'block_count': len(library.children),
+        'last_published': getattr(library, 'edited_on', None),
+    }
+
+
+def update_library_entry(library_key):
+    """
+    Refresh the catalog entry of the library from the modulestore.
+    """
+    library = modulestore().get_library(library_key)
+    if library is None:
+        delete_library_entry(library_key)
+        return None
+    entry, __ = LibraryCatalogEntry.objects.update_or_create(
+        library_key=library_key,
+        defaults=library_entry_values(library),
+    )
+    return entry
+
+
+def delete_library_entry(library_key):
+    LibraryCatalogEntry.objects.filter(library_key=library_key).delete()
+
+
+def rebuild_catalog():
+    """
+    Rebuild both catalog tables from the modulestore.
+
+    Returns:
+        (number of courses, number of libraries)
+    """
+    store = modulestore()
+
+    courses = [course for course in store.get_courses() if course.scope_ids.block_type == 'course']
+    exams = get_exams_for_courses([course.id for course in courses])
+    for course in courses:
+        CourseCatalogEntry.objects.update_or_create(
+            course_id=course.id,
+            defaults=course_entry_values(course, exams[unicode(course.id)]),
+        )
+    CourseCatalogEntry.objects.exclude(course_id__in=[course.id for course in courses]).delete()
+
+    libraries = store.get_libraries()
+    for library in libraries:
+        LibraryCatalogEntry.objects.update_or_create(
+            library_key=library.location.library_key,
+            defaults=library_entry_values(library),
+        )
+    LibraryCatalogEntry.objects.exclude(
+        library_key__in=[library.location.library_key for library in libraries]
+    ).delete()
+
+    log.info(u"Rebuilt the API extension catalog: %d courses, %d libraries", len(courses), len(libraries))
+    return len(courses), len(libraries)
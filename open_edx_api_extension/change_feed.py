@@ -0,0 +1,41 @@
+"""
+Commit order of the enrollment change feed.
+
+The EnrollmentChange rows get their id when they are inserted, not when
+their transaction commits, so a long transaction (e.g. a mass enrollment)
+can commit ids lower than changes the feed already served. The feed is
+keyed on `sequence` instead: before serving a page, the committed changes
+which have none yet are numbered after all the previous ones, under a lock
+on the ChangeFeedSequence row. A change is numbered once it is visible,
+whatever the length of the transaction which wrote it.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from .models import ChangeFeedSequence, EnrollmentChange
+
+
+def number_changes(batch_size):
+    """
+    Give a sequence to up to `batch_size` committed changes which have none.
+
+    Returns:
+        The number of changes numbered.
+    """
+    pending = EnrollmentChange.objects.filter(sequence__isnull=True)
+    if not pending.exists():
+        return 0
+
+    with transaction.atomic():
+        counter, __ = ChangeFeedSequence.objects.select_for_update().get_or_create(pk=1)
+        # A plain read: the rows of the transactions still open are skipped
+        # instead of waited for, they are numbered once committed.
+        ids = list(pending.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return 0
+        # Keeps the id order within the batch, after the last sequence given.
+        offset = counter.last + 1 - ids[0]
+        numbered = pending.filter(id__in=ids).update(sequence=F('id') + offset)
+        counter.last = ids[-1] + offset
+        counter.save(update_fields=['last'])
+    return numbered
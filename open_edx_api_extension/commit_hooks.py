@@ -0,0 +1,19 @@
+"""
+Run code once the current transaction is committed.
+
+transaction.on_commit only exists since Django 1.9. On older releases the
+callback runs right away, so whatever it starts must cope with rows which
+are not committed yet (e.g. by retrying, see tasks.py).
+"""
+from django.db import transaction
+
+
+def on_commit(func, using=None):
+    """
+    Same as transaction.on_commit, runs func right away when it is not available.
+    """
+    hook = getattr(transaction, 'on_commit', None)
+    if hook is None:
+        func()
+    else:
+        hook(func, using=using)
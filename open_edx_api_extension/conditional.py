@@ -0,0 +1,150 @@
+"""
+Conditional GET support for the read endpoints.
+
+A view declares cheap version markers of the data it serves (see the
+*_version functions below). The ETag is computed from them before any other
+work is done, and requests with a matching If-None-Match (or a recent enough
+If-Modified-Since) are answered with 304 straight away.
+"""
+import calendar
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count, Max
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .exam_cache import get_exams_version
+from .models import CourseCatalogEntry, EnrollmentChange, LibraryCatalogEntry
+from .streaming import accepts_gzip
+
+CACHE_CONTROL = getattr(settings, 'API_EXTENSION_CACHE_CONTROL', 'private, max-age=60')
+
+
+class NotModified(Exception):
+    """
+    Raised when the client already has the current version of the response.
+    """
+    pass
+
+
+def encoded_etag(etag, encoding):
+    """
+    The ETag of the same response sent with the given Content-Encoding.
+    """
+    return '"{}-{}"'.format(etag.strip('"'), encoding)
+
+
+def course_catalog_version():
+    return CourseCatalogEntry.objects.aggregate(modified=Max('modified'), count=Count('course_id'))
+
+
+def library_catalog_version():
+    return LibraryCatalogEntry.objects.aggregate(modified=Max('modified'), count=Count('library_key'))
+
+
+def exams_version():
+    return {'version': get_exams_version()}
+
+
+def user_enrollments_version(username):
+    return EnrollmentChange.objects.filter(
+        user_id__in=User.objects.filter(username=username).values('id')
+    ).aggregate(modified=Max('created'), last_change=Max('id'), changes=Count('id'))
+
+
+class ConditionalGetMixin(object):
+    """
+    Adds ETag, Last-Modified and Cache-Control to the GET responses of a view
+    and answers matching conditional requests with 304.
+
+    Views implement get_version_markers().
+    """
+    cache_control = CACHE_CONTROL
+
+    def get_version_markers(self, request, *args, **kwargs):
+        """
+        Returns:
+            A list of dicts describing the version of the served data. The
+            "modified" datetimes of the markers make the Last-Modified header.
+        """
+        raise NotImplementedError
+
+    def compute_etag(self, request, markers):
+        # The response also depends on the query and on the host, for the absolute URIs.
+        parts = [
+            self.__class__.__name__,
+            request.get_host(),
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+        ]
+        parts.extend(repr(sorted(marker.items())) for marker in markers)
+        return '"{}"'.format(hashlib.sha1(u'|'.join(parts).encode('utf-8')).hexdigest())
+
+    def candidate_etags(self, request):
+        """
+        The ETags the response may be sent with: the gzipped streams get their
+        own (see streaming.ndjson_response).
+        """
+        etags = [self.etag]
+        if accepts_gzip(request):
+            etags.append(encoded_etag(self.etag, 'gzip'))
+        return etags
+
+    def is_not_modified(self, request):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = [etag.strip() for etag in if_none_match.split(',')]
+            if '*' in etags:
+                return True
+            for etag in self.candidate_etags(request):
+                if etag in etags or 'W/' + etag in etags:
+                    self.matched_etag = etag
+                    return True
+            return False
+
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return (
+            if_modified_since is not None and self.last_modified is not None and
+            self.last_modified <= if_modified_since
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super(ConditionalGetMixin, self).initial(request, *args, **kwargs)
+        self.etag = None
+        self.matched_etag = None
+        self.last_modified = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+
+        markers = self.get_version_markers(request, *args, **kwargs)
+        self.etag = self.compute_etag(request, markers)
+        modified = [marker['modified'] for marker in markers if marker.get('modified')]
+        if modified:
+            self.last_modified = calendar.timegm(max(modified).utctimetuple())
+        if self.is_not_modified(request):
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super(ConditionalGetMixin, self).handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(ConditionalGetMixin, self).finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code in (200, 304):
+            if response.status_code == 304:
+                response['ETag'] = self.matched_etag or self.etag
+            elif response.get('Content-Encoding'):
+                # Strong ETags must differ between the encodings of the body (RFC 7232)
+                response['ETag'] = encoded_etag(self.etag, response['Content-Encoding'])
+            else:
+                response['ETag'] = self.etag
+            if self.last_modified is not None:
+                response['Last-Modified'] = http_date(self.last_modified)
+            response['Cache-Control'] = self.cache_control
+            patch_vary_headers(response, ('Accept', 'Accept-Encoding', 'Authorization', 'X-Edx-Api-Key'))
+        return response
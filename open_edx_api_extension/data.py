@@ -1,48 +1,231 @@
-from django.core.urlresolvers import reverse
-from edx_proctoring.api import get_all_exams_for_course
+from collections import OrderedDict, defaultdict
+
+from django.db.models import Q
+from django.utils import timezone
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from student.models import CourseEnrollment
-from enrollment.serializers import CourseEnrollmentSerializer
+from course_modes.models import CourseMode
+from edx_proctoring.models import ProctoredExam
+
+from .exam_cache import get_exams_for_courses
+from .memo import get_memo
+from .models import CourseCatalogEntry
+from .serializers import EnrollmentSerializer
 
 
-def get_course_enrollments(user_id=None, **kwargs):
+def get_course_enrollments(user_id=None, since=None, **kwargs):
     """
-    Retrieve a list representing all aggregated data for a user's course enrollments.
-    Construct a representation of all course enrollment data for a specific user.
+    Retrieve the active course enrollments, optionally of a single user.
+    Only the columns needed by CourseEnrollmentSerializer are loaded, with
+    the user in the same query.
     Args:
         user_id (str): The name of the user to retrieve course enrollment information for.
+        since (datetime): Only the enrollments created after this moment.
     Returns:
-        A serializable list of dictionaries of all aggregated enrollment data for a user.
+        A queryset of CourseEnrollment, see serialize_enrollments.
     """
     qset = CourseEnrollment.objects.filter(is_active=True, **kwargs)
     if user_id is not None:
         qset = qset.filter(user__username=user_id)
-    qset = qset.order_by('created')
-    return CourseEnrollmentSerializer(qset).data  # pylint: disable=no-member
+    if since is not None:
+        qset = qset.filter(created__gt=since)
+    return qset.select_related('user').only(
+        'id', 'created', 'mode', 'is_active', 'course_id', 'user', 'user__username'
+    )
+
+
+def serialize_enrollments(enrollments):
+    """
+    Serialize a page of enrollments with the course overviews and the course
+    modes of the page loaded in one query each.
+    """
+    course_keys = list(set(enrollment.course_id for enrollment in enrollments))
+    overviews = get_course_overviews(course_keys)
+    for enrollment in enrollments:
+        # Used by CourseEnrollment.course_overview instead of one query per row
+        enrollment._course_overview = overviews.get(enrollment.course_id)  # pylint: disable=protected-access
+    context = {'course_modes': get_course_modes(course_keys)}
+    return EnrollmentSerializer(enrollments, many=True, context=context).data  # pylint: disable=no-member
+
+
+def get_course_modes(course_keys):
+    """
+    Batched version of CourseMode.modes_for_course(only_selectable=False)
+    for the given course keys, with one query.
+
+    Returns:
+        A dict of course key -> list of the unexpired Mode tuples of the course.
+        Courses without any unexpired mode offer the default mode.
+    """
+    now = timezone.now()
+    modes = defaultdict(list)
+    for mode in CourseMode.objects.filter(course_id__in=course_keys):
+        if mode.expiration_datetime is None or mode.expiration_datetime >= now:
+            modes[mode.course_id].append(mode.to_tuple())
+    return {course_key: modes.get(course_key) or [CourseMode.DEFAULT_MODE] for course_key in course_keys}
+
+
+def get_course_overviews(course_keys):
+    """
+    Load the course overviews for all the given course keys with one query.
+
+    Overviews which were not generated yet are created from the modulestore,
+    courses which cannot be loaded at all are skipped.
+    Returns:
+        A dict of course key -> CourseOverview.
+    """
+    overviews = {
+        overview.id: overview
+        for overview in CourseOverview.objects.filter(id__in=course_keys)
+    }
+    for course_key in course_keys:
+        if course_key not in overviews:
+            try:
+                overviews[course_key] = CourseOverview.get_from_id(course_key)
+            except (CourseOverview.DoesNotExist, IOError):
+                pass
+    return overviews
+
+
+def get_proctored_exams_for_courses(course_keys):
+    """
+    Proctored exams of all the given courses, read through the exam cache.
+    Returns:
+        A dict of course id string -> list of serialized proctored exams.
+    """
+    return {
+        course_id: [exam for exam in exams if exam['is_proctored']]
+        for course_id, exams in get_exams_for_courses(course_keys).items()
+    }
+
+
+def proctored_exam_course_ids(active_only=False, include_expired=True):
+    """
+    Subquery of the ids of the courses with proctored exams, counting the
+    same exams as CourseWithExamsSerializer.partition_exams.
+
+    Whether an exam is expired depends on the time, so unlike the other
+    filters it cannot be read from the exam counts of the catalog.
+    """
+    exams = ProctoredExam.objects.filter(is_proctored=True)
+    if active_only:
+        exams = exams.filter(is_active=True)
+    if not include_expired:
+        exams = exams.filter(Q(due_date__isnull=True) | Q(due_date__gte=timezone.now()))
+    return exams.values('course_id')
+
+
+def proctored_course_data(course_key, course, exams, request):
+    """
+    Course fields and proctored exams served by the user proctored exams endpoints.
+    """
+    course_id = unicode(course_key)
+    return {
+        "id": course_id,
+        "name": course.display_name,
+        "uri": get_memo(request).course_detail_uri(course_id),
+        "image_url": course.course_image_url,
+        "start": course.start,
+        "end": course.end,
+        'exams': exams,
+    }
 
 
 def get_user_proctored_exams(username, request):
-    enrolments = CourseEnrollment.objects.filter(is_active=True,
-                                                 user__username=username)
+    """
+    Courses of the user's active enrollments with their proctored exams.
+
+    Costs three queries whatever the number of enrollments is: the
+    enrollments, the course overviews and the exams.
+    """
+    course_keys = list(
+        CourseEnrollment.objects.filter(
+            is_active=True, user__username=username
+        ).values_list('course_id', flat=True).distinct()
+    )
+    overviews = get_course_overviews(course_keys)
+    exams = get_proctored_exams_for_courses(course_keys)
+
     result = {}
-    for enrolment in enrolments:
-        course = enrolment.course
-        course_id = str(course.id)
-        if course_id not in result:
-            result[course_id] = {
-                "id": course_id,
-                "name": course.display_name,
-                "uri": request.build_absolute_uri(
-                    reverse('course_structure_api:v0:detail',
-                            kwargs={'course_id': course_id})),
-                "image_url": course.course_image_url,
-                "start": course.start,
-                "end": course.end,
-                'exams': []
-            }
-            exams = get_all_exams_for_course(course_id=course.id)
-            for exam in exams:
-                if exam['is_proctored'] == True:
-                    result[course_id]['exams'].append(exam)
-            result = {key: value for key, value in result.items() if
-                      len(value['exams']) > 0}
+    for course_key, course in overviews.items():
+        course_exams = exams.get(unicode(course_key))
+        if not course_exams:
+            continue
+        result[unicode(course_key)] = proctored_course_data(course_key, course, course_exams, request)
+    return result
+
+
+def get_users_proctored_exams(usernames, request, course_key=None):
+    """
+    Same as get_user_proctored_exams for a list of users, optionally limited
+    to one course.
+
+    Costs three queries whatever the number of users is: the enrollments of
+    all the users, the overviews and the exams of all their courses.
+    Returns:
+        An OrderedDict of username -> dict of course id -> course with its
+        proctored exams, in the order of the usernames.
+    """
+    enrollments = CourseEnrollment.objects.filter(is_active=True, user__username__in=usernames)
+    if course_key is not None:
+        enrollments = enrollments.filter(course_id=course_key)
+    user_courses = defaultdict(set)
+    for username, course_key in enrollments.values_list('user__username', 'course_id'):
+        user_courses[username].add(course_key)
+
+    course_keys = list(set().union(*user_courses.values()))
+    overviews = get_course_overviews(course_keys)
+    exams = get_proctored_exams_for_courses(course_keys)
+
+    courses = {}
+    for course_key, course in overviews.items():
+        course_exams = exams.get(unicode(course_key))
+        if course_exams:
+            courses[course_key] = proctored_course_data(course_key, course, course_exams, request)
+
+    result = OrderedDict()
+    for username in usernames:
+        result[username] = {
+            unicode(course_key): courses[course_key]
+            for course_key in user_courses.get(username, ()) if course_key in courses
+        }
     return result
+
+
+def iter_users_proctored_exams(usernames, request, course_key=None, chunk_size=500):
+    """
+    Yield {"username", "courses"} for every user, loading the users in chunks.
+    """
+    for index in range(0, len(usernames), chunk_size):
+        chunk = get_users_proctored_exams(usernames[index:index + chunk_size], request, course_key)
+        for username, courses in chunk.items():
+            yield {"username": username, "courses": courses}
+
+
+def get_catalog_entries(course_ids, queryset=None):
+    """
+    Resolve the list of course id strings with one query, optionally within
+    a filtered queryset of CourseCatalogEntry.
+    Returns:
+        (list of CourseCatalogEntry ordered by course id,
+         list of {"course_id", "error"} dicts for the invalid and unknown ids)
+    """
+    course_keys = OrderedDict()
+    errors = []
+    for course_id in OrderedDict.fromkeys(course_ids):
+        try:
+            course_keys[CourseKey.from_string(course_id)] = course_id
+        except InvalidKeyError:
+            errors.append({"course_id": course_id, "error": "invalid_course_id"})
+
+    if queryset is None:
+        queryset = CourseCatalogEntry.objects.all()
+    entries = list(queryset.filter(course_id__in=list(course_keys)).order_by('course_id'))
+    found = set(entry.course_id for entry in entries)
+    errors.extend(
+        {"course_id": course_id, "error": "not_found"}
+        for course_key, course_id in course_keys.items() if course_key not in found
+    )
+    return entries, errors
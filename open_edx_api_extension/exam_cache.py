@@ -0,0 +1,239 @@
+"""
+Cache of the exams of every course.
+
+The serialized exams are kept in the Django cache backend keyed by course
+id, with a small in-process LRU in front of it. Both are dropped when an
+exam of the course is saved or deleted, or when the course is published
+(see signals.py). The in-process entries of other workers expire after
+API_EXTENSION_EXAM_LOCAL_CACHE_TIMEOUT seconds.
+
+The exams are dropped again once the change is committed, as a reader may
+cache the old ones in between. Django < 1.9 cannot wait for the commit (see
+commit_hooks.py): for API_EXTENSION_EXAM_CHANGE_GRACE seconds after a change
+the exams of the course are only cached for
+API_EXTENSION_EXAM_CHANGE_CACHE_TIMEOUT seconds, and the exams version
+changes again at the end of the grace period.
+
+The cached lists are shared between callers and must not be modified.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from edx_proctoring.models import ProctoredExam
+from edx_proctoring.serializers import ProctoredExamSerializer
+
+from . import instrumentation
+from .commit_hooks import on_commit
+
+CACHE_KEY_TEMPLATE = u'open_edx_api_extension.exams.{}'
+CHANGE_CACHE_KEY_TEMPLATE = u'open_edx_api_extension.exams.changing.{}'
+VERSION_CACHE_KEY = u'open_edx_api_extension.exams.version'
+VERSION_CHANGE_CACHE_KEY = u'open_edx_api_extension.exams.version.changing'
+CACHE_TIMEOUT = getattr(settings, 'API_EXTENSION_EXAM_CACHE_TIMEOUT', 60 * 60)
+CHANGE_GRACE = getattr(
+    settings, 'API_EXTENSION_EXAM_CHANGE_GRACE', 0 if hasattr(transaction, 'on_commit') else 60
+)
+CHANGE_CACHE_TIMEOUT = getattr(settings, 'API_EXTENSION_EXAM_CHANGE_CACHE_TIMEOUT', 5)
+LOCAL_CACHE_SIZE = getattr(settings, 'API_EXTENSION_EXAM_LOCAL_CACHE_SIZE', 1000)
+LOCAL_CACHE_TIMEOUT = getattr(settings, 'API_EXTENSION_EXAM_LOCAL_CACHE_TIMEOUT', 30)
+
+
+class LocalLRUCache(object):
+    """
+    Thread safe LRU cache with a per entry timeout.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.time():
+                return None
+            self._data[key] = item
+            return value
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.time() + (self.timeout if timeout is None else timeout), value)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CacheStats(object):
+    """
+    Hit and miss counters of the current process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.local_hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+
+    def record(self, local_hits=0, shared_hits=0, misses=0):
+        with self._lock:
+            self.local_hits += local_hits
+            self.shared_hits += shared_hits
+            self.misses += misses
+
+    def as_dict(self):
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+        }
+
+
+stats = CacheStats()
+_local_cache = LocalLRUCache(LOCAL_CACHE_SIZE, LOCAL_CACHE_TIMEOUT)
+
+
+def _cache_key(course_id):
+    return CACHE_KEY_TEMPLATE.format(course_id)
+
+
+def _change_cache_key(course_id):
+    return CHANGE_CACHE_KEY_TEMPLATE.format(course_id)
+
+
+def get_exams_for_courses(course_ids):
+    """
+    Serialized exams of all the given courses.
+
+    Courses missing from both cache tiers are loaded with one query.
+    Returns:
+        A dict of course id string -> list of serialized exams.
+    """
+    course_ids = list(OrderedDict.fromkeys(unicode(course_id) for course_id in course_ids))
+    result = {}
+
+    missing = []
+    for course_id in course_ids:
+        exams = _local_cache.get(course_id)
+        if exams is None:
+            missing.append(course_id)
+        else:
+            result[course_id] = exams
+    local_hits = len(course_ids) - len(missing)
+
+    shared_hits = 0
+    changing = set()
+    if missing:
+        keys = [_cache_key(course_id) for course_id in missing]
+        if CHANGE_GRACE:
+            keys.extend(_change_cache_key(course_id) for course_id in missing)
+        cached = cache.get_many(keys)
+        changing = {course_id for course_id in missing if _change_cache_key(course_id) in cached}
+        not_cached = []
+        for course_id in missing:
+            exams = cached.get(_cache_key(course_id))
+            if exams is None:
+                not_cached.append(course_id)
+            else:
+                result[course_id] = exams
+                _local_cache.set(course_id, exams)
+        shared_hits = len(missing) - len(not_cached)
+        missing = not_cached
+
+    if missing:
+        loaded = defaultdict(list)
+        for exam in ProctoredExam.objects.filter(course_id__in=missing):
+            loaded[exam.course_id].append(dict(ProctoredExamSerializer(exam).data))
+        # The exams of a change which may not be committed yet are kept shortly
+        for timeout, course_ids in ((CACHE_TIMEOUT, set(missing) - changing), (CHANGE_CACHE_TIMEOUT, changing)):
+            if course_ids:
+                cache.set_many({_cache_key(course_id): loaded[course_id] for course_id in course_ids}, timeout)
+        for course_id in missing:
+            result[course_id] = loaded[course_id]
+            _local_cache.set(course_id, loaded[course_id], CHANGE_CACHE_TIMEOUT if course_id in changing else None)
+
+    stats.record(local_hits=local_hits, shared_hits=shared_hits, misses=len(missing))
+    instrumentation.incr('cache_hits', local_hits + shared_hits)
+    instrumentation.incr('cache_misses', len(missing))
+    return result
+
+
+def get_course_exams(course_id):
+    """
+    Serialized exams of the course, same as edx_proctoring.api.get_all_exams_for_course.
+    """
+    return get_exams_for_courses([course_id])[unicode(course_id)]
+
+
+def get_exams_version():
+    """
+    Counter bumped every time the exams of any course change.
+
+    When the counter is evicted from the cache it starts over from the
+    current time, so a lost counter never repeats an old value. During the
+    grace period of a change the version is marked as changing.
+    """
+    cached = cache.get_many([VERSION_CACHE_KEY, VERSION_CHANGE_CACHE_KEY])
+    version = cached.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_CACHE_KEY)
+    if VERSION_CHANGE_CACHE_KEY in cached:
+        return u'{}-changing'.format(version)
+    return version
+
+
+def _bump_exams_version():
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, int(time.time() * 1000), None)
+
+
+def _drop_exams(course_ids):
+    cache.delete_many([_cache_key(course_id) for course_id in course_ids])
+    for course_id in course_ids:
+        _local_cache.delete(course_id)
+    _bump_exams_version()
+
+
+def invalidate_course_exams(course_id):
+    """
+    Drop the cached exams of the course, now and once the change is committed.
+    """
+    invalidate_exams_for_courses([course_id])
+
+
+def invalidate_exams_for_courses(course_ids):
+    """
+    Drop the cached exams of all the given courses at once, now and once the
+    change is committed.
+    """
+    course_ids = [unicode(course_id) for course_id in course_ids]
+    if CHANGE_GRACE:
+        changing = {_change_cache_key(course_id): True for course_id in course_ids}
+        changing[VERSION_CHANGE_CACHE_KEY] = True
+        cache.set_many(changing, CHANGE_GRACE)
+    _drop_exams(course_ids)
+    if hasattr(transaction, 'on_commit'):
+        on_commit(lambda: _drop_exams(course_ids))
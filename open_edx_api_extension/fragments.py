@@ -0,0 +1,47 @@
+"""
+Prebuilt course list fragments.
+
+The serialized fields of every catalog entry are kept in the Django cache,
+keyed by the course id and the modification time of the entry, so a
+republished course gets a new fragment and stale ones just expire. The
+course URI is stored as a path and made absolute for each request.
+
+The fragments and the exams are prebuilt by warmer.py after a publish or an
+exam change, so the list endpoints only assemble them.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from . import instrumentation
+
+CACHE_KEY_TEMPLATE = u'open_edx_api_extension.course_fragment.{}.{}'
+CACHE_TIMEOUT = getattr(settings, 'API_EXTENSION_FRAGMENT_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def fragment_key(entry):
+    return CACHE_KEY_TEMPLATE.format(entry.course_id, entry.modified.strftime('%Y%m%d%H%M%S%f'))
+
+
+def get_fragments(entries, build, only_missing=False):
+    """
+    Fragments of the catalog entries, the missing ones are built and stored.
+
+    Args:
+        build: function of a CourseCatalogEntry -> fragment.
+        only_missing: Return only the fragments which were built.
+    Returns:
+        A dict of course id string -> fragment.
+    """
+    keys = {fragment_key(entry): entry for entry in entries}
+    fragments = cache.get_many(list(keys))
+    built = {key: build(entry) for key, entry in keys.items() if key not in fragments}
+    if built:
+        cache.set_many(built, CACHE_TIMEOUT)
+    instrumentation.incr('cache_hits', len(fragments))
+    instrumentation.incr('cache_misses', len(built))
+
+    if only_missing:
+        fragments = built
+    else:
+        fragments.update(built)
+    return {unicode(keys[key].course_id): fragment for key, fragment in fragments.items()}
@@ -0,0 +1,126 @@
+"""
+Persisted grade summaries.
+
+Computing a grade summary walks the whole course for the learner, so the
+result is stored in GradeSnapshot and served until a score of the learner
+changes or the course is published again.
+
+A score may change while a summary is computed. Every invalidation bumps a
+version of the learner in the course (or of the whole course) kept in the
+Django cache: the version is read before the summary is computed, and the
+snapshot is only kept if it is still the same once the snapshot is written.
+"""
+import json
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from instructor.offline_gradecalc import student_grades
+
+from . import instrumentation
+from .commit_hooks import on_commit
+from .gradebook import to_primitives
+from .memo import get_memo
+from .models import GradeSnapshot
+
+USER_VERSION_CACHE_KEY = u'open_edx_api_extension.grades.version.{}.{}'
+COURSE_VERSION_CACHE_KEY = u'open_edx_api_extension.grades.version.{}'
+
+
+def _version_keys(user_id, course_key):
+    return [USER_VERSION_CACHE_KEY.format(user_id, course_key), COURSE_VERSION_CACHE_KEY.format(course_key)]
+
+
+def get_grades_version(user_id, course_key):
+    """
+    The versions of the grades of the learner and of the course.
+
+    A version evicted from the cache starts over from the current time, so
+    a lost version never repeats an old value.
+    """
+    keys = _version_keys(user_id, course_key)
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, int(time.time() * 1000), None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def get_grade_summary(student, course_key, request, fresh=False, course=None):
+    """
+    Grade summary of the learner, from the snapshot when there is one.
+
+    Args:
+        fresh: Recompute the summary even if a snapshot exists.
+        course: The course descriptor, loaded only when needed (once per
+            request) if not given.
+    Returns:
+        (grade summary, datetime it was computed at)
+    """
+    if not fresh:
+        snapshot = GradeSnapshot.objects.filter(user=student, course_id=course_key).first()
+        if snapshot is not None:
+            instrumentation.incr('cache_hits')
+            return snapshot.get_grade_summary(), snapshot.computed_at
+    instrumentation.incr('cache_misses')
+
+    if course is None:
+        course = get_memo(request).get_course(course_key)
+    version = get_grades_version(student.id, course_key)
+    computed_at = timezone.now()
+    grade_summary = to_primitives(student_grades(student, request, course))
+    if get_grades_version(student.id, course_key) != version:
+        # A score changed while grading, the summary may already be stale
+        return grade_summary, computed_at
+    GradeSnapshot.objects.update_or_create(
+        user=student,
+        course_id=course_key,
+        defaults={
+            'grade_summary': json.dumps(grade_summary, cls=JSONEncoder),
+            'computed_at': computed_at,
+        },
+    )
+    if get_grades_version(student.id, course_key) != version:
+        # Invalidated between the check and the write
+        GradeSnapshot.objects.filter(user=student, course_id=course_key).delete()
+    return grade_summary, computed_at
+
+
+def _drop_user_grades(user_id, course_key):
+    _bump_version(USER_VERSION_CACHE_KEY.format(user_id, course_key))
+    GradeSnapshot.objects.filter(user_id=user_id, course_id=course_key).delete()
+
+
+def _drop_course_grades(course_key):
+    _bump_version(COURSE_VERSION_CACHE_KEY.format(course_key))
+    GradeSnapshot.objects.filter(course_id=course_key).delete()
+
+
+def invalidate_user_grades(user_id, course_key):
+    """
+    Drop the snapshot of the learner in the course, now and once the score
+    change is committed.
+    """
+    _drop_user_grades(user_id, course_key)
+    if hasattr(transaction, 'on_commit'):
+        on_commit(lambda: _drop_user_grades(user_id, course_key))
+
+
+def invalidate_course_grades(course_key):
+    """
+    Drop the snapshots of the course, now and once the change is committed.
+    """
+    _drop_course_grades(course_key)
+    if hasattr(transaction, 'on_commit'):
+        on_commit(lambda: _drop_course_grades(course_key))
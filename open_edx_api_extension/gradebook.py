@@ -0,0 +1,162 @@
+"""
+Course-wide grade export.
+
+The learners are graded in chunks on a thread pool shared by the process,
+API_EXTENSION_GRADEBOOK_WORKERS chunks at once. The records are written out
+in user id order as soon as a chunk is graded and at most one chunk per
+worker is graded ahead of the stream, so the memory used by the request
+does not grow with the course size.
+"""
+import csv
+import json
+from collections import deque
+
+from django.conf import settings
+from django.utils import six
+from opaque_keys.edx.keys import CourseKey
+from rest_framework.utils.encoders import JSONEncoder
+
+from courseware.courses import get_course
+from courseware.grades import iterate_grades_for
+from student.models import CourseEnrollment, User, UserProfile
+from xmodule.graders import Score
+
+from . import instrumentation
+from .pools import get_thread_pool, pool_task
+
+GRADEBOOK_CHUNK_SIZE = getattr(settings, 'API_EXTENSION_GRADEBOOK_CHUNK_SIZE', 50)
+GRADEBOOK_WORKERS = getattr(settings, 'API_EXTENSION_GRADEBOOK_WORKERS', 4)
+
+CSV_IDENTITY = ['username', 'id', 'email', 'realname', 'grade', 'percent']
+
+
+def to_primitives(value):
+    """
+    Grade summaries hold keys and namedtuples: convert them the same way the
+    API JSON renderer does.
+    """
+    return json.loads(json.dumps(value, cls=JSONEncoder))
+
+
+def grade_record(student, grade_summary, error):
+    try:
+        realname = student.profile.name
+    except UserProfile.DoesNotExist:
+        realname = None
+    return {
+        'username': student.username,
+        'id': student.id,
+        'email': student.email,
+        'realname': realname,
+        'grade_summary': to_primitives(grade_summary) if grade_summary else None,
+        'error': error or None,
+    }
+
+
+def grade_users(course, user_ids):
+    """
+    Grade the users of one chunk.
+    Returns:
+        A list of grade records.
+    """
+    students = User.objects.filter(id__in=user_ids).select_related('profile').order_by('id')
+    return [
+        grade_record(student, grade_summary, error)
+        for student, grade_summary, error in iterate_grades_for(course, students)
+    ]
+
+
+def enrolled_user_ids(course_key, usernames=None):
+    """
+    Ids of the active learners of the course, optionally limited to the usernames.
+    """
+    students = CourseEnrollment.objects.users_enrolled_in(course_key)
+    if usernames:
+        students = students.filter(username__in=usernames)
+    return list(students.order_by('id').values_list('id', flat=True))
+
+
+@pool_task
+def _grade_chunk(course_id, user_ids):
+    """
+    Runs on the pool with plain ids only: the course and the learners are
+    loaded in the thread.
+    """
+    return grade_users(get_course(CourseKey.from_string(course_id)), user_ids)
+
+
+def iter_course_grades(course, usernames=None, chunk_size=GRADEBOOK_CHUNK_SIZE, workers=GRADEBOOK_WORKERS):
+    """
+    Yield a grade record for every learner of the course, in user id order.
+    """
+    user_ids = enrolled_user_ids(course.id, usernames)
+    pool = get_thread_pool('gradebook', workers)
+    pending = deque()
+    for index in range(0, len(user_ids), chunk_size):
+        # Counted here, the pool threads are not instrumented
+        instrumentation.incr('modulestore_calls')
+        pending.append(pool.apply_async(_grade_chunk, (unicode(course.id), user_ids[index:index + chunk_size])))
+        if len(pending) < workers:
+            continue
+        for record in pending.popleft().get():
+            yield record
+    while pending:
+        for record in pending.popleft().get():
+            yield record
+
+
+def _blank_score(section_name):
+    values = {'earned': 0, 'possible': 1, 'graded': True, 'section': section_name, 'module_id': None}
+    return Score(**{field: values.get(field) for field in Score._fields})
+
+
+def section_labels(course):
+    """
+    Labels of the grade breakdown of the course.
+
+    The grader of the course is run on a blank grade sheet with every graded
+    section of the grading policy, so the labels do not depend on any learner.
+    """
+    grade_sheet = {
+        section_format: [
+            _blank_score(section['section_descriptor'].display_name_with_default) for section in sections
+        ]
+        for section_format, sections in course.grading_context['graded_sections'].items()
+    }
+    breakdown = course.grader.grade(grade_sheet)['section_breakdown']
+    return [section['label'] for section in breakdown if section.get('label')]
+
+
+class _Echo(object):
+    """
+    File-like object returning what is written, for csv.writer.
+    """
+    def write(self, value):
+        return value
+
+
+def _csv_row(values):
+    if six.PY2:
+        return [value.encode('utf-8') if isinstance(value, unicode) else value for value in values]
+    return values
+
+
+def iter_csv(records, labels):
+    """
+    One row per learner: identity, final grade and percent, then the percent
+    of every section of the grade breakdown, in the order of `labels`.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(_csv_row(CSV_IDENTITY + labels + ['error']))
+    for record in records:
+        summary = record['grade_summary'] or {}
+        percents = dict(
+            (section['label'], section.get('percent'))
+            for section in summary.get('section_breakdown', []) if section.get('label')
+        )
+        yield writer.writerow(_csv_row(
+            [record['username'], record['id'], record['email'], record['realname'],
+             summary.get('grade'), summary.get('percent')] +
+            [percents.get(label) for label in labels] +
+            [record['error']]
+        ))
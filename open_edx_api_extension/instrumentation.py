@@ -0,0 +1,267 @@
+"""
+Request-level performance instrumentation of the API extension views.
+
+For every request of an instrumented view the wall time, the SQL query count
+and time, the modulestore calls, the cache hits and misses and the payload
+size are recorded. They are sent back in the Server-Timing header, logged as
+one JSON line on the "open_edx_api_extension.metrics" logger and passed to
+the optional API_EXTENSION_METRICS_EXPORTER callable (a dotted path to a
+function taking the view name and the metrics dict, e.g. to feed statsd).
+
+The work of a streamed response mostly runs while its body is sent: the
+counting goes on while the body is iterated and the metrics are logged and
+exported once it is sent. Its Server-Timing header, sent first, only covers
+the work done before the body.
+
+The modulestore calls are counted by the accessors of the package which load
+courses (see memo.RequestMemo.get_course), not inside edx-platform.
+
+Set API_EXTENSION_INSTRUMENTATION_ENABLED = False to turn it off.
+
+Views declare the most SQL queries a request may run in `query_budget`. The
+budget does not depend on the amount of data, so going over it means an N+1
+pattern came back. It is logged as a warning, or raised as QueryBudgetExceeded
+when API_EXTENSION_ENFORCE_QUERY_BUDGETS is set (tests, benchmarks, CI).
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+log = logging.getLogger('open_edx_api_extension.metrics')
+
+INSTRUMENTATION_ENABLED = getattr(settings, 'API_EXTENSION_INSTRUMENTATION_ENABLED', True)
+METRICS_EXPORTER = getattr(settings, 'API_EXTENSION_METRICS_EXPORTER', None)
+ENFORCE_QUERY_BUDGETS = getattr(settings, 'API_EXTENSION_ENFORCE_QUERY_BUDGETS', False)
+
+_local = threading.local()
+_exporter = None
+
+
+def incr(name, value=1):
+    """
+    Increment a counter of the current request, if it is instrumented.
+    """
+    counters = getattr(_local, 'counters', None)
+    if counters is not None:
+        counters[name] += value
+
+
+def _get_exporter():
+    global _exporter  # pylint: disable=global-statement
+    if _exporter is None and METRICS_EXPORTER:
+        _exporter = import_string(METRICS_EXPORTER)
+    return _exporter
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    A view ran more SQL queries than its query_budget.
+    """
+    pass
+
+
+class _CountingCursor(object):
+    """
+    Cursor wrapper which only counts the queries and adds up their time,
+    unlike the debug cursor it neither formats nor stores the SQL.
+    """
+
+    def __init__(self, cursor, counter):
+        self.cursor = cursor
+        self.counter = counter
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.cursor.__exit__(exc_type, exc_value, traceback)
+
+    def _run(self, method, *args):
+        started = time.time()
+        try:
+            return method(*args)
+        finally:
+            self.counter.count += 1
+            self.counter.duration += time.time() - started
+
+    def execute(self, sql, params=None):
+        return self._run(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self._run(self.cursor.executemany, sql, param_list)
+
+
+class _QueryCounter(object):
+    """
+    Counts the queries run on the database connections of the thread, by
+    wrapping the cursors they make until stop() is called.
+    """
+    CURSOR_FACTORIES = ('make_cursor', 'make_debug_cursor')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.patched = []
+        for connection in connections.all():
+            for name in self.CURSOR_FACTORIES:
+                # Set on the instance, stop() puts back what was there before
+                self.patched.append((connection, name, connection.__dict__.get(name)))
+                setattr(connection, name, self._counting(getattr(connection, name)))
+
+    def _counting(self, make_cursor):
+        def make_counting_cursor(cursor):
+            return _CountingCursor(make_cursor(cursor), self)
+        return make_counting_cursor
+
+    def stop(self):
+        for connection, name, previous in reversed(self.patched):
+            if previous is None:
+                delattr(connection, name)
+            else:
+                setattr(connection, name, previous)
+        return self.count, self.duration
+
+
+class _RequestMetrics(object):
+    """
+    Counters of one request, collected while the request is active on the
+    thread: during dispatch, then while a streamed body is iterated.
+    """
+
+    def __init__(self):
+        self.counters = defaultdict(int)
+        self.query_count = 0
+        self.query_time = 0.0
+        self._queries = None
+
+    def resume(self):
+        _local.counters = self.counters
+        self._queries = _QueryCounter()
+
+    def pause(self):
+        _local.counters = None
+        count, duration = self._queries.stop()
+        self.query_count += count
+        self.query_time += duration
+
+
+class InstrumentedViewMixin(object):
+    """
+    Records the performance metrics of the view, see the module docstring.
+    """
+    # Most SQL queries a request may run, None for no budget
+    query_budget = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if not INSTRUMENTATION_ENABLED:
+            return super(InstrumentedViewMixin, self).dispatch(request, *args, **kwargs)
+
+        request_metrics = _RequestMetrics()
+        started = time.time()
+        request_metrics.resume()
+        try:
+            response = super(InstrumentedViewMixin, self).dispatch(request, *args, **kwargs)
+            handled = time.time()
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        finally:
+            request_metrics.pause()
+
+        if response.streaming:
+            metrics = self.collect_metrics(request, response, request_metrics, started, handled, None)
+            response['Server-Timing'] = self.server_timing(metrics)
+            response.streaming_content = self.measure_stream(
+                response.streaming_content, request, response, request_metrics, started, handled
+            )
+            return response
+
+        metrics = self.collect_metrics(request, response, request_metrics, started, handled, len(response.content))
+        response['Server-Timing'] = self.server_timing(metrics)
+        self.export_metrics(metrics)
+        self.check_query_budget(metrics)
+        return response
+
+    def measure_stream(self, content, request, response, request_metrics, started, handled):
+        """
+        Yield the chunks of the streamed body, counting the work done to
+        produce them, and report the metrics of the request at the end.
+        """
+        payload_bytes = 0
+        content = iter(content)
+        try:
+            while True:
+                request_metrics.resume()
+                try:
+                    chunk = next(content)
+                except StopIteration:
+                    break
+                finally:
+                    request_metrics.pause()
+                payload_bytes += len(chunk)
+                yield chunk
+        finally:
+            metrics = self.collect_metrics(request, response, request_metrics, started, handled, payload_bytes)
+            self.export_metrics(metrics)
+        self.check_query_budget(metrics)
+
+    def collect_metrics(self, request, response, request_metrics, started, handled, payload_bytes):
+        finished = time.time()
+        counters = request_metrics.counters
+        return {
+            'view': self.__class__.__name__,
+            'method': request.method,
+            'status': response.status_code,
+            'duration_ms': round((finished - started) * 1000, 2),
+            'render_ms': round((finished - handled) * 1000, 2),
+            'db_queries': request_metrics.query_count,
+            'db_ms': round(request_metrics.query_time * 1000, 2),
+            'modulestore_calls': counters['modulestore_calls'],
+            'cache_hits': counters['cache_hits'],
+            'cache_misses': counters['cache_misses'],
+            'payload_bytes': payload_bytes,
+        }
+
+    def check_query_budget(self, metrics):
+        if self.query_budget is None or metrics['db_queries'] <= self.query_budget:
+            return
+        message = u"{view} ran {queries} SQL queries, its budget is {budget}.".format(
+            view=metrics['view'], queries=metrics['db_queries'], budget=self.query_budget
+        )
+        if ENFORCE_QUERY_BUDGETS:
+            raise QueryBudgetExceeded(message)
+        log.warning(message)
+
+    @staticmethod
+    def server_timing(metrics):
+        timings = [
+            'total;dur={}'.format(metrics['duration_ms']),
+            'render;dur={}'.format(metrics['render_ms']),
+            'db;dur={};desc="{} queries"'.format(metrics['db_ms'], metrics['db_queries']),
+            'modulestore;desc="{} calls"'.format(metrics['modulestore_calls']),
+            'cache;desc="{} hits, {} misses"'.format(metrics['cache_hits'], metrics['cache_misses']),
+        ]
+        if metrics['payload_bytes'] is not None:
+            timings.append('payload;desc="{} bytes"'.format(metrics['payload_bytes']))
+        return ', '.join(timings)
+
+    @staticmethod
+    def export_metrics(metrics):
+        log.info(json.dumps(metrics, sort_keys=True))
+        exporter = _get_exporter()
+        if exporter is not None:
+            try:
+                exporter(metrics['view'], metrics)
+            except Exception:  # pylint: disable=broad-except
+                log.exception(u"API extension metrics exporter failed")
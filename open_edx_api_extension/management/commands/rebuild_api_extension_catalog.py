@@ -0,0 +1,14 @@
+"""
+Rebuild the course and library catalog tables of the API extension.
+"""
+from django.core.management.base import BaseCommand
+
+from open_edx_api_extension.catalog import rebuild_catalog
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the course and library catalog tables read by the extended API list endpoints.'
+
+    def handle(self, *args, **options):
+        courses, libraries = rebuild_catalog()
+        self.stdout.write(u"Indexed {} courses and {} libraries.".format(courses, libraries))
@@ -0,0 +1,24 @@
+"""
+Prebuild the cached course list fragments and exams of the API extension.
+"""
+from django.core.management.base import BaseCommand
+from opaque_keys.edx.keys import CourseKey
+
+from open_edx_api_extension.warmer import warm_course_cache
+
+
+class Command(BaseCommand):
+    help = 'Prebuild the cached fragments and exams served by the extended API course lists.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course-id', action='append', dest='course_ids',
+            help='Only warm this course. Repeatable, the whole catalog by default.'
+        )
+
+    def handle(self, *args, **options):
+        course_keys = None
+        if options['course_ids']:
+            course_keys = [CourseKey.from_string(course_id) for course_id in options['course_ids']]
+        checked, built = warm_course_cache(course_keys)
+        self.stdout.write(u"Checked {} courses, built {} fragments.".format(checked, built))
@@ -0,0 +1,370 @@
+"""
+Bulk helpers used by the mass enrollment endpoints.
+
+Every function here works on the whole batch of users at once, so the number
+of queries stays the same whatever the size of the batch is.
+"""
+import json
+import logging
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from course_modes.models import CourseMode
+from embargo import api as embargo_api
+from embargo.models import CountryAccessRule, RestrictedCourse
+from ipware.ip import get_ip
+from openedx.core.djangoapps.user_api.models import UserOrgTag
+from student.auth import has_course_author_access
+from student.models import User, UserProfile, CourseEnrollment, EVENT_NAME_ENROLLMENT_MODE_CHANGED
+
+from .models import EnrollmentChange, MassEnrollmentJob
+
+# Per-user outcomes of the mass enrollment
+NOT_ENROLLED = 'not_enrolled'
+ALREADY_PAID = 'already_paid'
+UPGRADEABLE = 'upgradeable'
+UPGRADED = 'upgraded'
+EMBARGOED = 'embargoed'
+
+EMAIL_OPT_IN_KEY = 'email-optin'
+
+log = logging.getLogger(__name__)
+
+
+def unique_usernames(usernames):
+    """
+    Drop duplicated usernames keeping the order they were sent in.
+    """
+    return list(OrderedDict.fromkeys(usernames))
+
+
+def resolve_users(usernames):
+    """
+    Resolve the list of usernames with a single query.
+
+    Returns:
+        (OrderedDict of username -> User in the requested order,
+         list of usernames which do not exist)
+    """
+    usernames = unique_usernames(usernames)
+    found = {
+        user.username: user
+        for user in User.objects.filter(username__in=usernames).select_related('profile')
+    }
+    users = OrderedDict()
+    missing = []
+    for username in usernames:
+        if username in found:
+            users[username] = found[username]
+        else:
+            missing.append(username)
+    return users, missing
+
+
+def get_embargoed_users(request, course_key, users):
+    """
+    Batched version of embargo.api.get_embargo_response for the same course.
+
+    The course restriction and the request IP are checked once, the profile
+    countries of all the users are fetched with one query and every distinct
+    country is checked once against the (cached) course rules. Only the
+    users which end up blocked are checked for staff access.
+
+    Returns:
+        The list of the users who cannot enroll in the course.
+    """
+    if not settings.FEATURES.get('EMBARGO'):
+        return []
+    if not RestrictedCourse.is_restricted_course(course_key):
+        return []
+
+    if not embargo_api.check_course_access(course_key, ip_address=get_ip(request)):
+        # The whole batch comes from a blocked location
+        blocked = list(users)
+    else:
+        countries = dict(UserProfile.objects.filter(user__in=users).values_list('user_id', 'country'))
+        country_access = {}
+        blocked = []
+        for user in users:
+            country = countries.get(user.id)
+            if country not in country_access:
+                country_access[country] = CountryAccessRule.check_country_access(course_key, country)
+            if not country_access[country]:
+                blocked.append(user)
+
+    # Staff always have access, whatever the embargo settings are.
+    return [user for user in blocked if not has_course_author_access(user, course_key)]
+
+
+def classify_enrollments(course_key, users):
+    """
+    Split the users into not enrolled, already paid and upgradeable ones.
+
+    All the existing enrollments are fetched with one query and the
+    classification is done in memory.
+
+    Returns:
+        (OrderedDict of username -> outcome,
+         dict of username -> CourseEnrollment for the upgradeable users)
+    """
+    enrollments = {
+        enrollment.user_id: enrollment
+        for enrollment in CourseEnrollment.objects.filter(course_id=course_key, user__in=users)
+    }
+    outcomes = OrderedDict()
+    upgradeable = {}
+    for user in users:
+        enrollment = enrollments.get(user.id)
+        if enrollment is None or enrollment.is_active is not True:
+            outcomes[user.username] = NOT_ENROLLED
+        elif enrollment.mode == CourseMode.VERIFIED:
+            outcomes[user.username] = ALREADY_PAID
+        else:
+            outcomes[user.username] = UPGRADEABLE
+            enrollment.user = user
+            upgradeable[user.username] = enrollment
+    return outcomes, upgradeable
+
+
+def update_enrollments(enrollments, mode, is_active=None):
+    """
+    Move the enrollments to the given mode with one UPDATE statement.
+
+    The enrollments should have their user set (see classify_enrollments).
+
+    The UPDATE skips CourseEnrollment.save() and its pre_save receivers. The
+    post_save receivers of the platform (e.g. the enrollment mode cache) are
+    sent post_save for every enrollment, with `bulk_update=True` and
+    `update_fields`. The change feed rows are written here in one INSERT.
+
+    Deactivation fans out unenrollment signals (refunds etc.), so it still
+    goes through the model for every enrollment.
+    """
+    if not enrollments:
+        return
+    if is_active is False:
+        for enrollment in enrollments:
+            enrollment.update_enrollment(mode=mode, is_active=False)
+        return
+
+    updates = {'mode': mode}
+    if is_active is not None:
+        updates['is_active'] = is_active
+    CourseEnrollment.objects.filter(id__in=[enrollment.id for enrollment in enrollments]).update(**updates)
+    for enrollment in enrollments:
+        enrollment.mode = mode
+        if is_active is not None:
+            enrollment.is_active = is_active
+    EnrollmentChange.objects.bulk_create(
+        [EnrollmentChange.for_enrollment(enrollment) for enrollment in enrollments]
+    )
+    using = router.db_for_write(CourseEnrollment)
+    for enrollment in enrollments:
+        post_save.send(
+            sender=CourseEnrollment, instance=enrollment, created=False, raw=False, using=using,
+            update_fields=frozenset(updates), bulk_update=True,
+        )
+        enrollment.emit_event(EVENT_NAME_ENROLLMENT_MODE_CHANGED)
+
+
+def bulk_update_email_opt_in(users, org, opt_in):
+    """
+    Batched version of user_api.preferences.api.update_email_opt_in.
+
+    Users under EMAIL_OPTIN_MINIMUM_AGE are always opted out. Expects the
+    user profiles to be already loaded (see resolve_users).
+    """
+    if not users:
+        return
+    age_limit = getattr(settings, 'EMAIL_OPTIN_MINIMUM_AGE', 13)
+    values = {}
+    for user in users:
+        try:
+            requires_consent = user.profile.requires_parental_consent(
+                age_limit=age_limit, default_requires_consent=False
+            )
+        except UserProfile.DoesNotExist:
+            # Same as update_email_opt_in: no profile, no consent needed
+            requires_consent = False
+        values[user.id] = str(bool(opt_in) and not requires_consent)
+
+    existing = set(
+        UserOrgTag.objects.filter(
+            user__in=users, org=org, key=EMAIL_OPT_IN_KEY
+        ).values_list('user_id', flat=True)
+    )
+    now = timezone.now()
+    for value in set(values.values()):
+        user_ids = [user_id for user_id in existing if values[user_id] == value]
+        if user_ids:
+            UserOrgTag.objects.filter(
+                user_id__in=user_ids, org=org, key=EMAIL_OPT_IN_KEY
+            ).update(value=value, modified=now)
+    UserOrgTag.objects.bulk_create([
+        UserOrgTag(user_id=user_id, org=org, key=EMAIL_OPT_IN_KEY, value=value)
+        for user_id, value in values.items() if user_id not in existing
+    ])
+
+
+def upgrade_users(course_key, users, upgradeable, mode, is_active=None, email_opt_in=None):
+    """
+    Apply the mode change and the email opt-in inside one transaction.
+
+    Args:
+        users: list of all the users of the batch.
+        upgradeable: dict of username -> CourseEnrollment to upgrade.
+
+    Returns:
+        OrderedDict of username -> outcome for the upgraded users.
+    """
+    with transaction.atomic():
+        update_enrollments(list(upgradeable.values()), mode, is_active=is_active)
+        if email_opt_in is not None:
+            bulk_update_email_opt_in(users, course_key.org, email_opt_in)
+    return OrderedDict((user.username, UPGRADED) for user in users if user.username in upgradeable)
+
+
+def get_available_modes(course_keys, include_expired=False):
+    """
+    Batched version of the mode check of enrollment.api._validate_course_mode.
+
+    Returns:
+        A dict of course key -> set of the mode slugs a user can be enrolled in.
+        Courses without any (unexpired) mode offer the default mode.
+    """
+    now = timezone.now()
+    modes = defaultdict(set)
+    course_modes = CourseMode.objects.filter(course_id__in=course_keys).values_list(
+        'course_id', 'mode_slug', 'expiration_datetime'
+    )
+    for course_key, mode_slug, expiration in course_modes:
+        if include_expired or expiration is None or expiration > now:
+            modes[course_key].add(mode_slug)
+    return {
+        course_key: modes.get(course_key) or {CourseMode.DEFAULT_MODE_SLUG}
+        for course_key in course_keys
+    }
+
+
+def classify_matrix(users, course_modes, blocked):
+    """
+    classify_enrollments for every user in every course, with one query.
+
+    Args:
+        course_modes: OrderedDict of course key -> mode to move the users to.
+        blocked: set of (user id, course key) which are embargoed.
+    Returns:
+        (dict of (username, course key) -> outcome,
+         dict of course key -> list of CourseEnrollment to move to its mode)
+    """
+    enrollments = {
+        (enrollment.user_id, enrollment.course_id): enrollment
+        for enrollment in CourseEnrollment.objects.filter(user__in=users, course_id__in=list(course_modes))
+    }
+    outcomes = {}
+    upgrades = defaultdict(list)
+    for user in users:
+        for course_key, mode in course_modes.items():
+            cell = (user.username, course_key)
+            enrollment = enrollments.get((user.id, course_key))
+            if (user.id, course_key) in blocked:
+                outcomes[cell] = EMBARGOED
+            elif enrollment is None or enrollment.is_active is not True:
+                outcomes[cell] = NOT_ENROLLED
+            elif enrollment.mode == mode:
+                outcomes[cell] = ALREADY_PAID
+            else:
+                outcomes[cell] = UPGRADEABLE
+                enrollment.user = user
+                upgrades[course_key].append(enrollment)
+    return outcomes, upgrades
+
+
+def upgrade_matrix(course_modes, upgrades, is_active=None, email_opt_in=None):
+    """
+    Apply the mode changes of classify_matrix and the email opt-in one
+    course at a time: every course is committed in its own transaction with
+    one UPDATE, so the enrollment rows are not all locked until the end.
+    The opt-in of a user is set once per organization.
+
+    Returns:
+        dict of (username, course key) -> outcome for the upgraded cells.
+    """
+    upgraded = {}
+    opted_in = defaultdict(set)
+    for course_key, enrollments in upgrades.items():
+        org = course_key.org
+        users = [enrollment.user for enrollment in enrollments if enrollment.user_id not in opted_in[org]]
+        with transaction.atomic():
+            update_enrollments(enrollments, course_modes[course_key], is_active=is_active)
+            if email_opt_in is not None:
+                bulk_update_email_opt_in(users, org, email_opt_in)
+        opted_in[org].update(user.id for user in users)
+        upgraded.update(((enrollment.user.username, course_key), UPGRADED) for enrollment in enrollments)
+    return upgraded
+
+
+JOB_ERRORS = {
+    NOT_ENROLLED: u'User is not enrolled for the course.',
+    ALREADY_PAID: u'User already paid for the course.',
+}
+
+
+def process_job_chunk(job_id, index):
+    """
+    Enroll the users of one chunk of a MassEnrollmentJob.
+
+    The chunk and the job progress are committed in one transaction, so a
+    chunk which is already marked as done is skipped and a crashed chunk
+    leaves nothing behind.
+    """
+    with transaction.atomic():
+        job = MassEnrollmentJob.objects.select_for_update().get(id=job_id)
+        if job.chunks_done > index:
+            return job
+
+        usernames = job.get_chunk(index)
+        users, missing = resolve_users(usernames)
+        list_users = list(users.values())
+        outcomes, upgradeable = classify_enrollments(job.course_id, list_users)
+        upgrade_users(
+            job.course_id, list_users, upgradeable, job.mode,
+            is_active=job.is_active, email_opt_in=job.email_opt_in
+        )
+
+        errors = job.get_errors()
+        for username in missing:
+            errors[username] = u'User does not exist.'
+        for username, outcome in outcomes.items():
+            if outcome in JOB_ERRORS:
+                errors[username] = JOB_ERRORS[outcome]
+
+        job.processed += len(usernames)
+        job.succeeded += len(upgradeable)
+        job.failed += len(usernames) - len(upgradeable)
+        job.errors = json.dumps(errors)
+        job.chunks_done = index + 1
+        job.save()
+    return job
+
+
+def run_job(job_id):
+    """
+    Process all the chunks of the job which are not done yet.
+    """
+    job = MassEnrollmentJob.objects.get(id=job_id)
+    if job.status == MassEnrollmentJob.SUCCEEDED:
+        return
+    MassEnrollmentJob.objects.filter(id=job_id).update(status=MassEnrollmentJob.RUNNING)
+    try:
+        for index in range(job.chunks_done, job.chunks_total):
+            process_job_chunk(job_id, index)
+    except Exception:
+        log.exception(u"Mass enrollment job %s failed", job_id)
+        MassEnrollmentJob.objects.filter(id=job_id).update(status=MassEnrollmentJob.FAILED)
+        raise
+    MassEnrollmentJob.objects.filter(id=job_id).update(status=MassEnrollmentJob.SUCCEEDED)
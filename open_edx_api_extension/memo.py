@@ -0,0 +1,78 @@
+"""
+Request-scoped memoization.
+
+The memo lives on the request, so everything resolved in it is shared by the
+views, serializers and data helpers serving the same request and dropped
+with it. Use get_memo(request) with either a Django or a DRF request.
+"""
+from django.core.urlresolvers import reverse
+from django.utils.http import RFC3986_SUBDELIMS, urlquote
+
+from courseware import courses
+
+from . import instrumentation
+
+MEMO_ATTRIBUTE = '_api_extension_memo'
+# Valid for the course id patterns, replaced by the real course id.
+COURSE_ID_PLACEHOLDER = u'memo+placeholder+courseid'
+COURSE_DETAIL_URL = 'course_structure_api:v0:detail'
+
+
+def get_memo(request):
+    """
+    The memo of the request, created on first use. Without a request (e.g.
+    in a task) a new memo is returned, which cannot build absolute URIs.
+    """
+    if request is None:
+        return RequestMemo(None)
+    request = getattr(request, '_request', request)
+    memo = getattr(request, MEMO_ATTRIBUTE, None)
+    if memo is None:
+        memo = RequestMemo(request)
+        setattr(request, MEMO_ATTRIBUTE, memo)
+    return memo
+
+
+class RequestMemo(object):
+    """
+    Courses and URLs resolved during one request.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self._courses = {}
+        self._url_templates = {}
+        self._base_uri = None
+
+    def get_course(self, course_key, depth=0):
+        """
+        Same as courseware.courses.get_course, loaded once per request.
+        """
+        key = (course_key, depth)
+        if key not in self._courses:
+            instrumentation.incr('modulestore_calls')
+            self._courses[key] = courses.get_course(course_key, depth)
+        return self._courses[key]
+
+    def course_url(self, name, course_id):
+        """
+        Same as reverse(name, kwargs={'course_id': course_id}).
+
+        The URL is reversed once per name with a placeholder course id, the
+        real ids are then quoted the way reverse() does and put in its place.
+        """
+        if name not in self._url_templates:
+            self._url_templates[name] = reverse(name, kwargs={'course_id': COURSE_ID_PLACEHOLDER})
+        quoted = urlquote(unicode(course_id), safe=RFC3986_SUBDELIMS + str('/~:@'))
+        return self._url_templates[name].replace(COURSE_ID_PLACEHOLDER, quoted)
+
+    def absolute_uri(self, path):
+        """
+        Same as request.build_absolute_uri(path) for a path starting with "/".
+        """
+        if self._base_uri is None:
+            self._base_uri = self.request.build_absolute_uri('/')[:-1]
+        return self._base_uri + path
+
+    def course_detail_uri(self, course_id):
+        return self.absolute_uri(self.course_url(COURSE_DETAIL_URL, course_id))
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import xmodule_django.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('open_edx_api_extension', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseCatalogEntry',
+            fields=[
+                ('course_id', xmodule_django.models.CourseKeyField(max_length=255, serialize=False, primary_key=True)),
+                ('display_name', models.TextField(null=True)),
+                ('org', models.CharField(max_length=255, db_index=True)),
+                ('course', models.CharField(max_length=255)),
+                ('run', models.CharField(max_length=255)),
+                ('image_url', models.TextField(default='')),
+                ('start', models.DateTimeField(null=True)),
+                ('end', models.DateTimeField(null=True)),
+                ('has_proctored_exams', models.BooleanField(default=False, db_index=True)),
+                ('exam_count', models.PositiveIntegerField(default=0)),
+                ('proctored_exam_count', models.PositiveIntegerField(default=0)),
+                ('active_proctored_exam_count', models.PositiveIntegerField(default=0)),
+                ('modified', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LibraryCatalogEntry',
+            fields=[
+                ('library_key', xmodule_django.models.CourseKeyField(max_length=255, serialize=False, primary_key=True)),
+                ('display_name', models.TextField(null=True)),
+                ('org', models.CharField(max_length=255, db_index=True)),
+                ('modified', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('open_edx_api_extension', '0004_enrollmentchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='librarycatalogentry',
+            name='block_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='librarycatalogentry',
+            name='last_published',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def number_existing_changes(apps, schema_editor):
+    """
+    The existing changes keep their id as sequence, so the cursors handed out
+    before this migration stay valid.
+    """
+    EnrollmentChange = apps.get_model('open_edx_api_extension', 'EnrollmentChange')
+    ChangeFeedSequence = apps.get_model('open_edx_api_extension', 'ChangeFeedSequence')
+    EnrollmentChange.objects.update(sequence=F('id'))
+    last = EnrollmentChange.objects.aggregate(last=Max('id'))['last'] or 0
+    ChangeFeedSequence.objects.create(pk=1, last=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('open_edx_api_extension', '0005_library_catalog_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeFeedSequence',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('last', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='enrollmentchange',
+            name='sequence',
+            field=models.BigIntegerField(unique=True, null=True),
+        ),
+        migrations.RunPython(number_existing_changes, migrations.RunPython.noop),
+    ]
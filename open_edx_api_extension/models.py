@@ -0,0 +1,153 @@
+"""
+Models of the API extension.
+"""
+import json
+import uuid
+
+from django.contrib.auth.models import User
+from django.db import models
+from model_utils.models import TimeStampedModel
+from xmodule_django.models import CourseKeyField
+
+
+class MassEnrollmentJob(TimeStampedModel):
+    """
+    Asynchronous mass enrollment requested through PaidMassEnrollment.
+
+    The users are processed in chunks of `chunk_size`. Every chunk is
+    committed together with the job progress, so a crashed job resumes
+    from `chunks_done` without applying any chunk twice.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)  # pylint: disable=invalid-name
+    requester = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    mode = models.CharField(max_length=100)
+    is_active = models.NullBooleanField()
+    email_opt_in = models.NullBooleanField()
+    usernames = models.TextField(help_text='JSON list of the usernames to enroll.')
+    chunk_size = models.PositiveIntegerField()
+    chunks_done = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    succeeded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    errors = models.TextField(default='{}', help_text='JSON map of username to error.')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+
+    def get_usernames(self):
+        return json.loads(self.usernames)
+
+    def get_errors(self):
+        return json.loads(self.errors)
+
+    @property
+    def total(self):
+        return len(self.get_usernames())
+
+    @property
+    def chunks_total(self):
+        return -(-self.total // self.chunk_size)
+
+    def get_chunk(self, index):
+        """
+        Usernames of the chunk with the given index.
+        """
+        return self.get_usernames()[index * self.chunk_size:(index + 1) * self.chunk_size]
+
+
+class CourseCatalogEntry(models.Model):
+    """
+    Denormalized copy of the course fields served by the course list
+    endpoints, kept up to date from the publish signals (see catalog.py).
+    """
+    course_id = CourseKeyField(max_length=255, primary_key=True)
+    display_name = models.TextField(null=True)
+    org = models.CharField(max_length=255, db_index=True)
+    course = models.CharField(max_length=255)
+    run = models.CharField(max_length=255)
+    image_url = models.TextField(default='')
+    start = models.DateTimeField(null=True)
+    end = models.DateTimeField(null=True)
+    has_proctored_exams = models.BooleanField(default=False, db_index=True)
+    exam_count = models.PositiveIntegerField(default=0)
+    proctored_exam_count = models.PositiveIntegerField(default=0)
+    active_proctored_exam_count = models.PositiveIntegerField(default=0)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class LibraryCatalogEntry(models.Model):
+    """
+    Denormalized copy of the library fields served by LibrariesList.
+    """
+    library_key = CourseKeyField(max_length=255, primary_key=True)
+    display_name = models.TextField(null=True)
+    org = models.CharField(max_length=255, db_index=True)
+    block_count = models.PositiveIntegerField(default=0)
+    last_published = models.DateTimeField(null=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class GradeSnapshot(models.Model):
+    """
+    Last computed grade summary of a learner in a course, served by
+    CourseUserResult until a score of the learner changes or the course is
+    published again (see signals.py).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    grade_summary = models.TextField(help_text='JSON grade summary.')
+    computed_at = models.DateTimeField()
+
+    class Meta(object):
+        unique_together = ('user', 'course_id')
+
+    def get_grade_summary(self):
+        return json.loads(self.grade_summary)
+
+
+class EnrollmentChange(models.Model):
+    """
+    Append-only log of the enrollment changes, served by the enrollment
+    change feed. A row holds the state of the enrollment after the change.
+
+    The feed is ordered by `sequence`, given to the rows once they are
+    committed (see change_feed.py), not by the id given when they are
+    inserted.
+    """
+    user_id = models.IntegerField(db_index=True)
+    username = models.CharField(max_length=255)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    mode = models.CharField(max_length=100)
+    is_active = models.BooleanField()
+    deleted = models.BooleanField(default=False)
+    created = models.DateTimeField(auto_now_add=True)
+    sequence = models.BigIntegerField(null=True, unique=True)
+
+    @classmethod
+    def for_enrollment(cls, enrollment, deleted=False):
+        return cls(
+            user_id=enrollment.user_id,
+            username=enrollment.user.username,
+            course_id=enrollment.course_id,
+            mode=enrollment.mode,
+            is_active=enrollment.is_active,
+            deleted=deleted,
+        )
+
+
+class ChangeFeedSequence(models.Model):
+    """
+    Single row holding the last sequence given to an EnrollmentChange. It is
+    locked while the committed changes are numbered.
+    """
+    last = models.BigIntegerField(default=0)
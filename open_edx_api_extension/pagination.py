@@ -0,0 +1,195 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate a queryset by the values of the `ordering` fields.
+
+    The ordering fields together must be unique. The cursor holds their
+    values for the last item of the page, so every page is one range query
+    on an index whatever page is requested, and walking the whole list
+    keeps a single page in memory.
+    """
+    ordering = ('id',)
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = u'Invalid cursor.'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_value(self, field, value):  # pylint: disable=unused-argument
+        """
+        Ordering field value -> JSON serializable value.
+        """
+        return unicode(value)
+
+    def decode_value(self, field, value):  # pylint: disable=unused-argument
+        """
+        Value from the cursor -> lookup value, raises ValueError if invalid.
+        """
+        return value
+
+    def encode_cursor(self, item):
+        position = [self.encode_value(field, getattr(item, field)) for field in self.ordering]
+        return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError(cursor)
+            return [self.decode_value(field, value) for field, value in zip(self.ordering, position)]
+        except (TypeError, ValueError, UnicodeError, InvalidKeyError):
+            raise ParseError(self.invalid_cursor_message)
+
+    def position_filter(self, position):
+        """
+        Rows after the position in the (a, b, ...) ordering:
+        a > x OR (a = x AND b > y) OR ...
+        """
+        query = Q()
+        for index, field in enumerate(self.ordering):
+            clause = Q(**{field + '__gt': position[index]})
+            for previous_field, previous_value in zip(self.ordering[:index], position[:index]):
+                clause &= Q(**{previous_field: previous_value})
+            query |= clause
+        return query
+
+    def get_page(self, queryset, position):
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(position))
+
+        page = list(queryset[:self.limit + 1])
+        self.has_next = len(page) > self.limit
+        page = page[:self.limit]
+        self.last_item = page[-1] if page else None
+        return page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        return self.get_page(queryset, self.decode_cursor(request))
+
+    def iter_pages(self, queryset, request):
+        """
+        Walk the whole queryset from the cursor of the request in pages of
+        `max_page_size`, for streaming. The cursor is checked right away.
+        """
+        self.request = request
+        self.limit = self.max_page_size
+        position = self.decode_cursor(request)
+
+        def pages(position):
+            while True:
+                page = self.get_page(queryset, position)
+                if page:
+                    yield page
+                if not self.has_next:
+                    return
+                position = [getattr(self.last_item, field) for field in self.ordering]
+        return pages(position)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_item))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+
+class CourseKeysetPagination(KeysetPagination):
+    """
+    Pagination of CourseCatalogEntry rows ordered by course id.
+    """
+    ordering = ('course_id',)
+    page_size = getattr(settings, 'API_EXTENSION_COURSES_PAGE_SIZE', 100)
+    max_page_size = getattr(settings, 'API_EXTENSION_COURSES_MAX_PAGE_SIZE', 1000)
+
+    def decode_value(self, field, value):
+        return CourseKey.from_string(value)
+
+
+class LibraryKeysetPagination(KeysetPagination):
+    """
+    Pagination of LibraryCatalogEntry rows ordered by library key.
+    """
+    ordering = ('library_key',)
+    page_size = getattr(settings, 'API_EXTENSION_LIBRARIES_PAGE_SIZE', 100)
+    max_page_size = getattr(settings, 'API_EXTENSION_LIBRARIES_MAX_PAGE_SIZE', 1000)
+
+    def decode_value(self, field, value):
+        return CourseKey.from_string(value)
+
+
+class EnrollmentKeysetPagination(KeysetPagination):
+    """
+    Pagination of CourseEnrollment rows ordered by id, which follows the
+    creation order. `created` is nullable, so it cannot be part of the cursor.
+    """
+    ordering = ('id',)
+    page_size = getattr(settings, 'API_EXTENSION_ENROLLMENTS_PAGE_SIZE', 100)
+    max_page_size = getattr(settings, 'API_EXTENSION_ENROLLMENTS_MAX_PAGE_SIZE', 1000)
+
+    def encode_value(self, field, value):
+        return value
+
+    def decode_value(self, field, value):
+        return int(value)
+
+
+class ChangeFeedPagination(KeysetPagination):
+    """
+    Pagination of an append-only log ordered by its commit sequence.
+
+    Besides the `next` link, the response always holds the `cursor` to poll
+    from next time, even when the last page is reached.
+    """
+    ordering = ('sequence',)
+    page_size = getattr(settings, 'API_EXTENSION_CHANGES_PAGE_SIZE', 500)
+    max_page_size = getattr(settings, 'API_EXTENSION_CHANGES_MAX_PAGE_SIZE', 5000)
+
+    def decode_value(self, field, value):
+        return int(value)
+
+    def get_paginated_response(self, data):
+        if self.last_item is not None:
+            cursor = self.encode_cursor(self.last_item)
+        else:
+            cursor = self.request.query_params.get(self.cursor_query_param)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('cursor', cursor),
+            ('results', data),
+        ]))
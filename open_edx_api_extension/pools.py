@@ -0,0 +1,54 @@
+"""
+Thread pools shared by the process, created on first use.
+"""
+import threading
+from functools import wraps
+from multiprocessing.pool import ThreadPool
+
+from django.db import connection
+
+try:
+    from request_cache.middleware import RequestCache
+except ImportError:
+    RequestCache = None
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_thread_pool(name, processes):
+    """
+    The ThreadPool registered under `name`, created with `processes` threads
+    the first time it is asked for.
+    """
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ThreadPool(processes=processes)
+        return _pools[name]
+
+
+def clear_request_cache():
+    """
+    Reset the edx request cache of the calling pool thread. Run it before and
+    after every task, so that nothing cached by one task (e.g. the course
+    descriptors) is seen by the next one.
+    """
+    if RequestCache is not None:
+        RequestCache.clear_request_cache()
+
+
+def pool_task(func):
+    """
+    Decorate a function run on a pool thread: the request cache is cleared
+    around every call and the database connection of the thread is closed
+    after it.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        clear_request_cache()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            clear_request_cache()
+            connection.close()
+    return wrapper
@@ -1,13 +1,125 @@
+import datetime
 from collections import OrderedDict
+
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import serializers
+from enrollment.serializers import CourseEnrollmentSerializer, CourseField, ModeSerializer
 try:
     from rest_framework.fields import SkipField
 except ImportError:
     SkipField = Exception
-from edx_proctoring.api import get_all_exams_for_course
 
-from course_structure_api.v0.serializers import CourseSerializer
+from .exam_cache import get_course_exams, get_exams_for_courses
+from .fragments import get_fragments
+from .memo import COURSE_DETAIL_URL, get_memo
+from .models import EnrollmentChange
+
+
+class CourseCatalogListSerializer(serializers.ListSerializer):
+    """
+    Prefetches what the courses of the page need at once.
+    """
+
+    def to_representation(self, data):
+        courses = list(data.all() if isinstance(data, models.Manager) else data)
+        self.child.prefetch(courses)
+        return super(CourseCatalogListSerializer, self).to_representation(courses)
+
+
+class CourseCatalogSerializer(serializers.Serializer):
+    """
+    Same output as course_structure_api.v0.serializers.CourseSerializer,
+    but read from a CourseCatalogEntry instead of a course descriptor.
+
+    The fields are served from the prebuilt fragments (see fragments.py).
+    """
+    id = serializers.CharField(source='course_id')  # pylint: disable=invalid-name
+    name = serializers.CharField(source='display_name')
+    category = serializers.SerializerMethodField()
+    org = serializers.CharField()
+    run = serializers.CharField()
+    course = serializers.CharField()
+    uri = serializers.SerializerMethodField()
+    image_url = serializers.CharField()
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+    class Meta(object):
+        list_serializer_class = CourseCatalogListSerializer
+
+    def __init__(self, *args, **kwargs):
+        super(CourseCatalogSerializer, self).__init__(*args, **kwargs)
+        self._fragments = {}
+        self._fragment_fields = None
+        self._memo = None
+
+    @property
+    def memo(self):
+        if self._memo is None:
+            self._memo = get_memo(self.context.get('request'))
+        return self._memo
+
+    def get_category(self, course):  # pylint: disable=unused-argument
+        return 'course'
+
+    def get_uri(self, course):
+        # A path in the fragments, made absolute in to_representation
+        return self.memo.course_url(COURSE_DETAIL_URL, course.course_id)
+
+    @property
+    def fragment_fields(self):
+        # Computed once, the fields of the subclasses are not part of the fragment.
+        if self._fragment_fields is None:
+            self._fragment_fields = [self.fields[name] for name in CourseCatalogSerializer._declared_fields]
+        return self._fragment_fields
+
+    def build_fragment(self, instance):
+        """
+        CourseCatalogEntry -> dict of the course fields, with the uri as a path.
+        """
+        ret = OrderedDict()
+        for field in self.fragment_fields:
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+
+            if attribute is None:
+                ret[field.field_name] = None
+            else:
+                ret[field.field_name] = field.to_representation(attribute)
+        return ret
+
+    def prefetch(self, courses):
+        """
+        Load the fragments of all the given courses with one cache lookup.
+        """
+        self._fragments = get_fragments(courses, self.build_fragment)
+
+    def to_representation(self, instance):
+        """
+        Object instance -> Dict of primitive datatypes.
+        """
+        fragment = self._fragments.get(unicode(instance.course_id))
+        if fragment is None:
+            fragment = get_fragments([instance], self.build_fragment)[unicode(instance.course_id)]
+        ret = OrderedDict(fragment)
+        ret['uri'] = self.memo.absolute_uri(ret['uri'])
+        return ret
+
 
+def is_expired(exam, now):
+    """
+    Whether the due date of the serialized exam is past.
+    """
+    due_date = exam.get('due_date')
+    if not due_date:
+        return False
+    if not isinstance(due_date, datetime.datetime):
+        due_date = parse_datetime(due_date)
+    return due_date is not None and due_date < now
 
 
 class ExamSerializerField(serializers.Field):
@@ -18,50 +130,129 @@ class ExamSerializerField(serializers.Field):
     def __init__(self, *args, **kwargs):
         if 'is_proctored' in kwargs:
             self.is_proctored = kwargs.pop('is_proctored')
+        kwargs['read_only'] = True
         return super(ExamSerializerField, self).__init__(*args, **kwargs)
 
-    def to_representation(self, instance, exams):
+    def get_attribute(self, instance):
+        proctored, regular = self.parent.get_exams(instance)
+        return proctored if self.is_proctored else regular
+
+    def to_representation(self, exams):
         """
         Field value -> String.
         """
-        result = []
-        for exam in exams:
-            if exam['is_proctored'] == self.is_proctored:
-                result.append(exam)
-        return result
+        return exams
 
 
-class CourseWithExamsSerializer(CourseSerializer):
+class CourseWithExamsSerializer(CourseCatalogSerializer):
 
     proctored_exams = ExamSerializerField(is_proctored=True)
     regular_exams = ExamSerializerField()
 
     def __init__(self, *args, **kwargs):
         self.include_expired = kwargs.pop("include_expired", False)
+        self.active_only = kwargs.pop("active_only", False)
+        self.exam_fields = kwargs.pop("exam_fields", None)
         super(CourseWithExamsSerializer, self).__init__(*args, **kwargs)
+        self._exams = {}
 
-    def to_representation(self, instance):
+    def prefetch(self, courses):
         """
-        Object instance -> Dict of primitive datatypes.
+        Load the fragments, and the exams partitioned, of all the given courses
+        with one lookup each.
         """
-        ret = OrderedDict()
-        fields = [field for field in self.fields.values() if
-                  not field.write_only]
-        exams = get_all_exams_for_course(course_id=instance.id)
-        for field in fields:
-            try:
-                attribute = field.get_attribute(instance)
-            except SkipField:
+        super(CourseWithExamsSerializer, self).prefetch(courses)
+        self._exams = {
+            course_id: self.partition_exams(exams)
+            for course_id, exams in get_exams_for_courses([course.course_id for course in courses]).items()
+        }
+
+    def get_exams(self, course):
+        """
+        (proctored, regular) exams of the course, prefetched when serializing a list.
+        """
+        course_id = unicode(course.course_id)
+        if course_id not in self._exams:
+            self._exams[course_id] = self.partition_exams(get_course_exams(course_id))
+        return self._exams[course_id]
+
+    def partition_exams(self, exams):
+        """
+        Split the exams of a course into (proctored, regular) in one pass,
+        dropping the inactive and expired ones as requested and keeping only
+        the `exam_fields` of every exam.
+        """
+        now = timezone.now()
+        proctored = []
+        regular = []
+        for exam in exams:
+            if self.active_only and not exam['is_active']:
                 continue
-            except AttributeError:
-                if isinstance(field, ExamSerializerField):
-                    ret[field.field_name] = field.to_representation(instance,
-                                                                    exams)
+            if not self.include_expired and is_expired(exam, now):
                 continue
-
-            if attribute is None:
-                ret[field.field_name] = None
+            if self.exam_fields:
+                selected = {field: exam[field] for field in self.exam_fields if field in exam}
             else:
-                ret[field.field_name] = field.to_representation(attribute)
+                selected = exam
+            if exam['is_proctored']:
+                proctored.append(selected)
+            else:
+                regular.append(selected)
+        return proctored, regular
 
+    def to_representation(self, instance):
+        """
+        Object instance -> Dict of primitive datatypes.
+        """
+        ret = super(CourseWithExamsSerializer, self).to_representation(instance)
+        ret['proctored_exams'], ret['regular_exams'] = self.get_exams(instance)
         return ret
+
+
+class LibraryCatalogSerializer(serializers.Serializer):
+    """
+    Serializer for the content libraries list
+    """
+    display_name = serializers.CharField()
+    library_key = serializers.CharField()
+    org = serializers.CharField()
+    block_count = serializers.IntegerField()
+    last_published = serializers.DateTimeField()
+
+
+class EnrollmentChangeSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the enrollment change feed
+    """
+    user = serializers.CharField(source='username')
+    course_id = serializers.CharField()
+
+    class Meta(object):
+        model = EnrollmentChange
+        fields = ('id', 'user', 'course_id', 'mode', 'is_active', 'deleted', 'created')
+
+
+class PreloadedModesCourseField(CourseField):
+    """
+    enrollment.serializers.CourseField with the course modes taken from the
+    `course_modes` of the context (see data.get_course_modes) instead of one
+    query per enrollment.
+    """
+
+    def to_representation(self, course, **kwargs):  # pylint: disable=unused-argument
+        return {
+            'course_id': unicode(course.id),
+            'enrollment_start': course.enrollment_start,
+            'enrollment_end': course.enrollment_end,
+            'course_start': course.start,
+            'course_end': course.end,
+            'invite_only': course.invitation_only,
+            'course_modes': ModeSerializer(self.context['course_modes'][course.id], many=True).data,
+        }
+
+
+class EnrollmentSerializer(CourseEnrollmentSerializer):
+    """
+    Same output as enrollment.serializers.CourseEnrollmentSerializer.
+    """
+    course_details = PreloadedModesCourseField(source='course_overview')
@@ -0,0 +1,163 @@
+"""
+Signal handlers of the API extension.
+"""
+import logging
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from opaque_keys.edx.keys import CourseKey
+from courseware.models import StudentModule
+from edx_proctoring.models import ProctoredExam
+from student.models import CourseEnrollment
+from xmodule.modulestore.django import SignalHandler
+
+from . import catalog
+from .exam_cache import invalidate_course_exams
+from .grade_snapshots import invalidate_course_grades, invalidate_user_grades
+from .models import EnrollmentChange
+from .tasks import schedule_cache_warming
+
+try:
+    from courseware.models import SCORE_CHANGED
+except ImportError:
+    SCORE_CHANGED = None
+
+log = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=ProctoredExam)
+@receiver(post_delete, sender=ProctoredExam)
+def invalidate_exams_on_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the cached exams of the course the exam belongs to.
+    """
+    invalidate_course_exams(instance.course_id)
+    try:
+        catalog.update_course_exam_counts(instance.course_id)
+    except Exception:  # pylint: disable=broad-except
+        log.exception(u"Failed to update the API extension exam counts for course %s", instance.course_id)
+    schedule_cache_warming(instance.course_id)
+
+
+@receiver(SignalHandler.course_published)
+def invalidate_exams_on_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the cached exams of the published course.
+    """
+    invalidate_course_exams(course_key)
+
+
+@receiver(SignalHandler.course_published)
+def update_catalog_on_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Refresh the catalog entry of the published course and rebuild its cached
+    list fragments.
+    """
+    try:
+        catalog.update_course_entry(course_key)
+    except Exception:  # pylint: disable=broad-except
+        log.exception(u"Failed to update the API extension catalog for course %s", course_key)
+    else:
+        schedule_cache_warming(course_key)
+
+
+@receiver(SignalHandler.library_updated)
+def update_catalog_on_library_update(sender, library_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Refresh the catalog entry of the updated library.
+    """
+    try:
+        catalog.update_library_entry(library_key)
+    except Exception:  # pylint: disable=broad-except
+        log.exception(u"Failed to update the API extension catalog for library %s", library_key)
+
+
+@receiver(SignalHandler.course_published)
+def invalidate_grades_on_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the grade snapshots of the published course, its grading may have changed.
+    """
+    invalidate_course_grades(course_key)
+
+
+def _loaded_grade(instance):
+    # Read from __dict__ so that deferred fields are not loaded
+    return instance.__dict__.get('grade'), instance.__dict__.get('max_grade')
+
+
+def remember_module_grade(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Keep the grade the module was loaded with, to tell score changes apart.
+    """
+    instance._api_extension_grade = _loaded_grade(instance)  # pylint: disable=protected-access
+
+
+def invalidate_grades_on_submission(sender, instance, created=False, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the grade snapshot of the learner when the score of a graded module
+    changes. Most saves only store the module state and are skipped.
+    """
+    grade = _loaded_grade(instance)
+    if instance.max_grade is None:
+        return
+    if created or getattr(instance, '_api_extension_grade', None) != grade:
+        invalidate_user_grades(instance.student_id, instance.course_id)
+    instance._api_extension_grade = grade  # pylint: disable=protected-access
+
+
+def invalidate_grades_on_module_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the grade snapshot of the learner when a scored module is deleted,
+    e.g. when the instructor resets the attempts of a problem.
+    """
+    if instance.max_grade is not None:
+        invalidate_user_grades(instance.student_id, instance.course_id)
+
+
+def invalidate_grades_on_score_change(sender, user_id=None, course_id=None, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the grade snapshot of the learner whose score changed.
+    """
+    if user_id is not None and course_id is not None:
+        invalidate_user_grades(user_id, CourseKey.from_string(unicode(course_id)))
+
+
+if SCORE_CHANGED is not None:
+    SCORE_CHANGED.connect(invalidate_grades_on_score_change)
+else:
+    # Releases without SCORE_CHANGED: compare the grade of the saved modules.
+    post_init.connect(remember_module_grade, sender=StudentModule)
+    post_save.connect(invalidate_grades_on_submission, sender=StudentModule)
+# SCORE_CHANGED is not sent for the deleted modules
+post_delete.connect(invalidate_grades_on_module_delete, sender=StudentModule)
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def log_enrollment_change(sender, instance, bulk_update=False, **kwargs):  # pylint: disable=unused-argument
+    """
+    Append the new state of the enrollment to the change feed. The bulk
+    updates of mass_enrollment.update_enrollments log their changes themselves.
+    """
+    if not bulk_update:
+        EnrollmentChange.for_enrollment(instance).save()
+
+
+@receiver(post_delete, sender=CourseEnrollment)
+def log_enrollment_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Append the deletion of the enrollment to the change feed.
+    """
+    EnrollmentChange.for_enrollment(instance, deleted=True).save()
+
+
+def delete_catalog_entry_on_course_delete(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the catalog entry of the deleted course.
+    """
+    catalog.delete_course_entry(course_key)
+    invalidate_course_exams(course_key)
+
+
+# course_deleted is not provided by every modulestore release
+if getattr(SignalHandler, 'course_deleted', None) is not None:
+    SignalHandler.course_deleted.connect(delete_catalog_entry_on_course_delete)
@@ -0,0 +1,148 @@
+"""
+Streaming NDJSON responses for the large list endpoints.
+
+The whole list is walked page by page (see KeysetPagination.iter_pages) and
+every page is serialized and written out before the next one is loaded, so
+the memory used by the request does not grow with the number of rows.
+
+simplejson is used when it is installed, it is a lot faster than the json
+module of Python 2. The response is gzipped when the client accepts it.
+"""
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+# Handles the datetimes, decimals, lazy strings etc. like the DRF JSON renderer
+_encode_default = JSONEncoder().default
+
+
+def dumps(data):
+    """
+    Compact JSON of the data, as utf-8 bytes.
+    """
+    output = json.dumps(data, default=_encode_default, separators=(',', ':'), ensure_ascii=False)
+    if isinstance(output, unicode):
+        output = output.encode('utf-8')
+    return output
+
+
+def iter_ndjson(items):
+    """
+    One JSON line per item.
+    """
+    for item in items:
+        yield dumps(item) + b'\n'
+
+
+def iter_ndjson_pages(pages):
+    """
+    One chunk of JSON lines per page of items.
+    """
+    for items in pages:
+        yield b''.join(dumps(item) + b'\n' for item in items)
+
+
+def accepts_gzip(request):
+    """
+    Whether the Accept-Encoding of the request allows gzip, with its q-values
+    (e.g. "gzip;q=0" refuses it).
+    """
+    qualities = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        params = item.split(';')
+        coding = params[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params[1:]:
+            name, __, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def iter_gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def ndjson_response(request, chunks):
+    """
+    StreamingHttpResponse of the NDJSON chunks, gzipped if the client accepts it.
+    """
+    use_gzip = accepts_gzip(request)
+    response = StreamingHttpResponse(
+        iter_gzip(chunks) if use_gzip else chunks, content_type=NDJSONRenderer.media_type
+    )
+    if use_gzip:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders a list as one JSON line per item, anything else as a single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, list):
+            return b''.join(iter_ndjson(data))
+        return dumps(data) + b'\n'
+
+
+class StreamingListMixin(object):
+    """
+    Streams the whole list of a keyset paginated view as NDJSON when asked
+    with `?stream=1` or `Accept: application/x-ndjson`.
+    """
+    stream_query_param = 'stream'
+
+    def get_renderers(self):
+        return super(StreamingListMixin, self).get_renderers() + [NDJSONRenderer()]
+
+    def should_stream(self, request):
+        if request.query_params.get(self.stream_query_param) in ('1', 'true'):
+            return True
+        renderer = getattr(request, 'accepted_renderer', None)
+        return renderer is not None and renderer.format == NDJSONRenderer.format
+
+    def stream_list(self, queryset, serialize_page):
+        """
+        Args:
+            serialize_page: function of a page of rows -> list of dicts.
+        """
+        pages = self.pagination_class().iter_pages(queryset, self.request)
+        return ndjson_response(self.request, iter_ndjson_pages(serialize_page(page) for page in pages))
+
+    def serialize_page(self, page):
+        return self.get_serializer(page, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        if self.should_stream(request):
+            return self.stream_list(self.filter_queryset(self.get_queryset()), self.serialize_page)
+        return super(StreamingListMixin, self).list(request, *args, **kwargs)
@@ -0,0 +1,108 @@
+"""
+Background tasks of the API extension.
+"""
+import logging
+import time
+
+from celery import task
+from django.conf import settings
+from django.db import connection, transaction
+from opaque_keys.edx.keys import CourseKey
+
+from .commit_hooks import on_commit
+from .mass_enrollment import run_job
+from .models import MassEnrollmentJob
+from .pools import get_thread_pool
+from .warmer import warm_course_cache
+
+log = logging.getLogger(__name__)
+
+CACHE_WARMER_ENABLED = getattr(settings, 'API_EXTENSION_CACHE_WARMER_ENABLED', True)
+# Django < 1.9 cannot wait for the commit (see commit_hooks.py), the delay stands in for it.
+CACHE_WARMER_DELAY = getattr(
+    settings, 'API_EXTENSION_CACHE_WARMER_DELAY', 0 if hasattr(transaction, 'on_commit') else 5
+)
+CACHE_WARMER_QUEUE = getattr(settings, 'API_EXTENSION_CACHE_WARMER_QUEUE', None)
+
+# Same retries as run_mass_enrollment_job
+THREAD_MAX_RETRIES = 5
+THREAD_RETRY_DELAY = 5
+
+
+@task(bind=True, acks_late=True, max_retries=5, default_retry_delay=5)
+def run_mass_enrollment_job(self, job_id):
+    """
+    Process a MassEnrollmentJob, resuming from its last committed chunk.
+    """
+    try:
+        run_job(job_id)
+    except MassEnrollmentJob.DoesNotExist as exc:
+        # The request which created the job may not be committed yet.
+        raise self.retry(exc=exc)
+
+
+def _run_in_thread(job_id):
+    try:
+        for attempt in range(THREAD_MAX_RETRIES + 1):
+            try:
+                run_job(job_id)
+                return
+            except MassEnrollmentJob.DoesNotExist:
+                # Same as the Celery task, the job may not be committed yet.
+                if attempt == THREAD_MAX_RETRIES:
+                    raise
+                time.sleep(THREAD_RETRY_DELAY)
+    except Exception:  # pylint: disable=broad-except
+        log.exception(u"Mass enrollment job %s failed in the thread pool", job_id)
+    finally:
+        connection.close()
+
+
+def start_mass_enrollment_job(job):
+    """
+    Queue the job on Celery or, when API_EXTENSION_MASS_ENROLLMENT_BACKEND
+    is "thread" (tests, devstack), on an in-process thread pool, once the
+    job row is committed.
+    """
+    job_id = str(job.id)
+    if getattr(settings, 'API_EXTENSION_MASS_ENROLLMENT_BACKEND', 'celery') == 'thread':
+        on_commit(lambda: get_thread_pool('mass_enrollment', 1).apply_async(_run_in_thread, (job_id,)))
+    else:
+        on_commit(lambda: run_mass_enrollment_job.delay(job_id))
+
+
+@task(ignore_result=True)
+def warm_api_extension_cache(course_ids=None):
+    """
+    Prebuild the course list fragments and exams of the courses, of the whole
+    catalog when no course is given.
+    """
+    course_keys = None
+    if course_ids is not None:
+        course_keys = [CourseKey.from_string(course_id) for course_id in course_ids]
+    warm_course_cache(course_keys)
+
+
+def schedule_cache_warming(course_key):
+    """
+    Warm the cache of the course once the change is committed.
+
+    The fragments need the LMS URLs: when courses are published in Studio, set
+    API_EXTENSION_CACHE_WARMER_QUEUE to a queue consumed by the LMS workers.
+    """
+    if not CACHE_WARMER_ENABLED:
+        return
+    options = {}
+    if CACHE_WARMER_DELAY:
+        options['countdown'] = CACHE_WARMER_DELAY
+    if CACHE_WARMER_QUEUE:
+        options['queue'] = CACHE_WARMER_QUEUE
+    course_ids = [unicode(course_key)]
+
+    def schedule():
+        try:
+            warm_api_extension_cache.apply_async(args=(course_ids,), **options)
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u"Failed to schedule the API extension cache warming of course %s", course_key)
+
+    on_commit(schedule)
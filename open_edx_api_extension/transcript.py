@@ -0,0 +1,194 @@
+"""
+Grades of one learner in all the courses they are enrolled in.
+
+The grade snapshots of all the courses are read with one query, and the
+courses without a snapshot are graded concurrently on a thread pool shared
+by the process. Courses which are not graded within the timeout, or fail,
+are reported as such and the others are returned anyway. A course which
+times out while being graded is finished in the background and its
+snapshot is served by the next request, one still queued is dropped.
+
+At most API_EXTENSION_TRANSCRIPT_QUEUE_SIZE courses are queued or being
+graded at once. The courses over it wait for a slot until the timeout and
+are reported as "busy" if none frees up, instead of piling up behind the
+ones of earlier requests.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import TimeoutError as PoolTimeoutError
+
+from django.conf import settings
+from django.test.client import RequestFactory
+from opaque_keys.edx.keys import CourseKey
+
+from student.models import CourseEnrollment, User
+
+from . import instrumentation
+from .grade_snapshots import get_grade_summary
+from .models import GradeSnapshot
+from .pools import get_thread_pool, pool_task
+
+log = logging.getLogger(__name__)
+
+TRANSCRIPT_WORKERS = getattr(settings, 'API_EXTENSION_TRANSCRIPT_WORKERS', 4)
+TRANSCRIPT_TIMEOUT = getattr(settings, 'API_EXTENSION_TRANSCRIPT_TIMEOUT', 30)
+TRANSCRIPT_QUEUE_SIZE = getattr(settings, 'API_EXTENSION_TRANSCRIPT_QUEUE_SIZE', 4 * TRANSCRIPT_WORKERS)
+
+# Per-course status of a transcript
+GRADED = 'ok'
+TIMED_OUT = 'timeout'
+FAILED = 'error'
+BUSY = 'busy'
+
+
+class _QueueSlots(object):
+    """
+    One slot per course queued or being graded. Like a BoundedSemaphore, but
+    acquire() can wait until a deadline, which Python 2 semaphores cannot.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.used = 0
+        self.condition = threading.Condition(threading.Lock())
+
+    def acquire(self, deadline):
+        """
+        Wait for a free slot until the deadline (a time.time() value).
+
+        Returns:
+            Whether a slot was taken.
+        """
+        with self.condition:
+            while self.used >= self.size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            self.used += 1
+            return True
+
+    def release(self):
+        with self.condition:
+            if self.used <= 0:
+                raise ValueError(u"Queue slot released too many times")
+            self.used -= 1
+            self.condition.notify()
+
+
+_queue_slots = _QueueSlots(TRANSCRIPT_QUEUE_SIZE)
+
+
+def _grading_request(student):
+    """
+    Request to grade the learner with, like courseware.grades.iterate_grades_for.
+    """
+    request = RequestFactory().get('/')
+    request.user = student
+    request.session = {}
+    return request
+
+
+@pool_task
+def _grade_course(user_id, course_id, fresh, deadline):
+    """
+    Runs on the pool with plain ids only: the learner, the request and the
+    course are loaded in the thread.
+    """
+    try:
+        if time.time() >= deadline:
+            # The request stopped waiting while the course was queued
+            return None
+        student = User.objects.select_related('profile').get(id=user_id)
+        return get_grade_summary(
+            student, CourseKey.from_string(course_id), _grading_request(student), fresh=fresh
+        )
+    finally:
+        _queue_slots.release()
+
+
+def _queue_course(user_id, course_key, fresh, deadline):
+    """
+    Returns:
+        The AsyncResult of the grading, None when the queue stayed full until
+        the deadline.
+    """
+    if not _queue_slots.acquire(deadline):
+        return None
+    try:
+        pool = get_thread_pool('transcript', TRANSCRIPT_WORKERS)
+        return pool.apply_async(_grade_course, (user_id, unicode(course_key), fresh, deadline))
+    except Exception:
+        _queue_slots.release()
+        raise
+
+
+def _course_record(course_key, status, grade_summary=None, computed_at=None):
+    return OrderedDict([
+        ('course_id', unicode(course_key)),
+        ('status', status),
+        ('grade_summary', grade_summary),
+        ('computed_at', computed_at),
+    ])
+
+
+def get_transcript(student, fresh=False, timeout=TRANSCRIPT_TIMEOUT):
+    """
+    Grade summaries of the learner in all their active enrollments.
+
+    Args:
+        fresh: Recompute the summaries even if snapshots exist.
+        timeout: Seconds to wait for the courses being graded, from the start
+            of the call. They are all graded at once as long as there are
+            enough workers.
+    Returns:
+        A list of {"course_id", "status", "grade_summary", "computed_at"}
+        ordered by enrollment date, status is "ok", "timeout", "busy" or
+        "error".
+    """
+    course_keys = list(
+        CourseEnrollment.objects.filter(user=student, is_active=True).order_by('created')
+        .values_list('course_id', flat=True)
+    )
+    snapshots = {}
+    if not fresh:
+        snapshots = {
+            snapshot.course_id: snapshot
+            for snapshot in GradeSnapshot.objects.filter(user=student, course_id__in=course_keys)
+        }
+    instrumentation.incr('cache_hits', len(snapshots))
+    instrumentation.incr('cache_misses', len(course_keys) - len(snapshots))
+
+    deadline = time.time() + timeout
+    pending = {
+        course_key: _queue_course(student.id, course_key, fresh, deadline)
+        for course_key in course_keys if course_key not in snapshots
+    }
+
+    records = []
+    for course_key in course_keys:
+        if course_key in snapshots:
+            snapshot = snapshots[course_key]
+            records.append(
+                _course_record(course_key, GRADED, snapshot.get_grade_summary(), snapshot.computed_at)
+            )
+            continue
+        if pending[course_key] is None:
+            records.append(_course_record(course_key, BUSY))
+            continue
+        try:
+            result = pending[course_key].get(max(deadline - time.time(), 0))
+        except PoolTimeoutError:
+            result = None
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u"Grading user %s in course %s failed", student.username, course_key)
+            records.append(_course_record(course_key, FAILED))
+            continue
+        if result is None:
+            records.append(_course_record(course_key, TIMED_OUT))
+        else:
+            grade_summary, computed_at = result
+            records.append(_course_record(course_key, GRADED, grade_summary, computed_at))
+    return records
@@ -7,10 +7,18 @@ from open_edx_api_extension import views
 urlpatterns = [
     url(r'^courses/$', views.CourseList.as_view()),
     url(r'^courses/proctored$', views.CourseListWithExams.as_view()),
+    url(r'^courses/{}/grades/export/$'.format(settings.COURSE_ID_PATTERN), views.CourseGradesExport.as_view()),
     url(r'^courses/{}/(?P<username>\w+)/$'.format(settings.COURSE_ID_PATTERN), views.CourseUserResult.as_view()),
+    url(r'^users/(?P<username>\w+)/grades/$', views.UserGradesView.as_view(), name='user_grades'),
     url(r'^enrollment$', views.SSOEnrollmentListView.as_view(), name='courseenrollments'),
+    url(r'^enrollment/changes$', views.EnrollmentChangeFeed.as_view(), name='enrollment_changes'),
+    url(r'^user_proctored_exams/$', views.UsersProctoredExamsView.as_view(), name='users_proctored_exams'),
     url(r'^user_proctored_exams/(?P<username>\w+)/$',
         views.ProctoredExamsListView.as_view(), name='user_proctored_exams'),
     url(r'^libraries/$', views.LibrariesList.as_view()),
     url(r'^paid_mass_enrollment$', views.PaidMassEnrollment.as_view()),
+    url(r'^paid_mass_enrollment/matrix$', views.PaidMassEnrollmentMatrix.as_view(),
+        name='paid_mass_enrollment_matrix'),
+    url(r'^paid_mass_enrollment/(?P<job_id>[0-9a-fA-F-]+)$',
+        views.PaidMassEnrollmentJobStatus.as_view(), name='paid_mass_enrollment_job'),
 ]
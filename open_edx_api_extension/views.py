@@ -1,7 +1,11 @@
+import json
 import logging
+from collections import OrderedDict
 
-from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
 from django.utils.decorators import method_decorator
 
 from rest_framework.generics import RetrieveAPIView, ListAPIView
@@ -12,82 +16,100 @@ from rest_framework import status
 
 from cors_csrf.decorators import ensure_csrf_cookie_cross_domain
 from course_modes.models import CourseMode
-from course_structure_api.v0 import serializers
 from course_structure_api.v0.views import CourseViewMixin
-from courseware import courses
 
 from embargo import api as embargo_api
-from instructor.offline_gradecalc import student_grades
-from course_structure_api.v0 import serializers
 
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys import InvalidKeyError
-from student.models import User, CourseEnrollment
-from xmodule.modulestore.django import modulestore
+from student.models import CourseEnrollment, User
 
-from openedx.core.djangoapps.user_api.preferences.api import update_email_opt_in
 from openedx.core.lib.api.authentication import (
     SessionAuthenticationAllowInactiveUser,
     OAuth2AuthenticationAllowInactiveUser,
 )
-#from openedx.core.lib.api.serializers import PaginationSerializer
 from openedx.core.lib.api.permissions import ApiKeyHeaderPermission, ApiKeyHeaderPermissionIsAuthenticated
 
-from enrollment import api
-
-from openedx.core.lib.exceptions import CourseNotFoundError
-from enrollment.errors import (
-    CourseEnrollmentError,
-    CourseModeNotFoundError, CourseEnrollmentExistsError
-)
+from enrollment.errors import CourseEnrollmentError
 from enrollment.views import ApiKeyPermissionMixIn, EnrollmentCrossDomainSessionAuth, EnrollmentListView
 
-from .data import get_course_enrollments
-
-from open_edx_api_extension.serializers import CourseWithExamsSerializer
-from .data import get_course_enrollments, get_user_proctored_exams
+from open_edx_api_extension.serializers import (
+    CourseCatalogSerializer, CourseWithExamsSerializer, EnrollmentChangeSerializer, LibraryCatalogSerializer
+)
+from .admission import AdmissionControlMixin
+from .change_feed import number_changes
+from .conditional import (
+    ConditionalGetMixin, course_catalog_version, exams_version, library_catalog_version,
+    user_enrollments_version,
+)
+from .data import (
+    get_catalog_entries, get_course_enrollments, get_course_overviews, get_user_proctored_exams,
+    get_users_proctored_exams, proctored_exam_course_ids,
+    iter_users_proctored_exams, serialize_enrollments
+)
+from .grade_snapshots import get_grade_summary
+from .instrumentation import InstrumentedViewMixin
+from .gradebook import iter_course_grades, iter_csv, section_labels
+from .mass_enrollment import (
+    ALREADY_PAID, NOT_ENROLLED, classify_enrollments, classify_matrix, get_available_modes, get_embargoed_users,
+    resolve_users, unique_usernames, upgrade_matrix, upgrade_users
+)
+from .memo import get_memo
+from .models import CourseCatalogEntry, EnrollmentChange, LibraryCatalogEntry, MassEnrollmentJob
+from .pagination import (
+    ChangeFeedPagination, CourseKeysetPagination, EnrollmentKeysetPagination, LibraryKeysetPagination
+)
+from .streaming import StreamingListMixin, iter_ndjson, ndjson_response
+from .tasks import start_mass_enrollment_job
+from .transcript import GRADED, get_transcript
 
 log = logging.getLogger(__name__)
 
 
-class LibrariesList(ListAPIView):
+class LibrariesList(InstrumentedViewMixin, StreamingListMixin, ConditionalGetMixin, ListAPIView):
     """
     **Use Case**
         Get a paginated list of libraries in the whole edX Platform.
-        The list can be filtered by course_id.
-        Each page in the list can contain up to 10 courses.
+        The list can be filtered by organization and searched by name.
+        Libraries are ordered by key. Each page contains up to `page_size`
+        libraries (100 by default, 1000 at most).
     **Example Requests**
           GET /api/extended/libraries/
+          GET /api/extended/libraries/?org=edX&search=physics&cursor={cursor}
     **Response Values**
-        * count: The number of courses in the edX platform.
-        * next: The URI to the next page of courses.
-        * previous: The URI to the previous page of courses.
-        * num_pages: The number of pages listing courses.
-        * results:  A list of courses returned. Each collection in the list
+        * next: The URI to the next page of libraries, null on the last page.
+        * results:  A list of libraries returned. Each collection in the list
           contains these fields.
-            * id: The unique identifier for the course.
-              "course".
-            * org: The organization specified for the course.
-            * course: The course number.
+            * display_name: The name of the library.
+            * library_key: The unique identifier for the library.
+            * org: The organization of the library.
+            * block_count: The number of blocks in the library.
+            * last_published: When the library was last changed.
     """
     # Using EDX_API_KEY for access to this api
     authentication_classes = (SessionAuthenticationAllowInactiveUser,
                               OAuth2AuthenticationAllowInactiveUser)
     permission_classes = ApiKeyHeaderPermissionIsAuthenticated,
+    pagination_class = LibraryKeysetPagination
+    serializer_class = LibraryCatalogSerializer
+    query_budget = 6
 
-    def list(self, request, *args, **kwargs):
-        lib_info = [
-            {
-                "display_name": lib.display_name,
-                "library_key": unicode(lib.location.library_key),
-                "org": unicode(lib.location.library_key.org),
-            }
-            for lib in modulestore().get_libraries()
-            ]
-        return Response(lib_info)
+    def get_version_markers(self, request, *args, **kwargs):
+        return [library_catalog_version()]
 
-
-class CourseUserResult(CourseViewMixin, RetrieveAPIView):
+    def get_queryset(self):
+        queryset = LibraryCatalogEntry.objects.all()
+        org = self.request.query_params.get('org')
+        if org:
+            queryset = queryset.filter(org=org)
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = queryset.filter(display_name__icontains=search)
+        # Pagination orders the results by library key.
+        return queryset
+
+
+class CourseUserResult(InstrumentedViewMixin, AdmissionControlMixin, CourseViewMixin, RetrieveAPIView):
     """
     **Use Case**
 
@@ -133,14 +155,19 @@ class CourseUserResult(CourseViewMixin, RetrieveAPIView):
                 * category: A string identifying the category.
                 * percent: A float percentage in the breakdown. All percents should add up to the final percentage.
                 * detail: A string explanation of this breakdown. E.g. "Homework - 10% of a possible 15%".
+
+        * computed_at: When the grade summary was computed. Grades are served from a snapshot
+          until a score of the user changes or the course is published. Pass `?fresh=true`
+          to recompute them.
     """
+    admission_limits = {'endpoint': 16, 'client': 4}
 
     @CourseViewMixin.course_check
     def get(self, request, **kwargs):
         username = self.kwargs.get('username')
+        fresh = request.query_params.get('fresh') == 'true'
         enrolled_students = CourseEnrollment.objects.users_enrolled_in(
-            self.course_key).filter(username=username)
-        course = courses.get_course(self.course_key)
+            self.course_key).filter(username=username).select_related('profile')
 
         if not enrolled_students:
             return Response({
@@ -148,52 +175,178 @@ class CourseUserResult(CourseViewMixin, RetrieveAPIView):
                 "error": "invalid_request"
             })
 
-        student_info = [
-            {
+        student_info = []
+        for student in enrolled_students:
+            grade_summary, computed_at = get_grade_summary(student, self.course_key, request, fresh=fresh)
+            student_info.append({
                 'username': student.username,
                 'id': student.id,
                 'email': student.email,
-                'grade_summary': student_grades(student, request, course),
+                'grade_summary': grade_summary,
                 'realname': student.profile.name,
-            }
-            for student in enrolled_students
-            ]
+                'computed_at': computed_at,
+            })
         return Response(student_info)
 
 
-class CourseListMixin(object):
+class UserGradesView(InstrumentedViewMixin, AdmissionControlMixin, APIView, ApiKeyPermissionMixIn):
+    """
+    **Use Case**
+
+        Get the grades of a learner in all the courses they are enrolled in.
+
+    **Example Request**:
+
+        GET /api/extended/users/{username}/grades/
+
+    **Query Parameters**
+
+        * fresh: "true" to recompute the grades instead of serving the snapshots.
+
+    **Response Values**
+
+        * id, username, email, realname: The learner.
+
+        * complete: false when some courses could not be graded.
+
+        * courses: One item per active enrollment, oldest first:
+            * course_id: The course.
+            * status: "ok", "timeout" when the course was not graded in time
+              (API_EXTENSION_TRANSCRIPT_TIMEOUT), "busy" when too many courses
+              were being graded (API_EXTENSION_TRANSCRIPT_QUEUE_SIZE) for it to
+              be queued before the timeout, or "error".
+            * grade_summary: Same as in CourseUserResult, null unless status is "ok".
+            * computed_at: When the grade summary was computed.
+    """
+    authentication_classes = (SessionAuthenticationAllowInactiveUser,
+                              OAuth2AuthenticationAllowInactiveUser)
+    permission_classes = ApiKeyHeaderPermissionIsAuthenticated,
+    admission_limits = {'endpoint': 8, 'client': 2}
+
+    def get(self, request, username):
+        if (not request.user.is_staff and request.user.username != username and
+                not self.has_api_key_permissions(request)):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        try:
+            student = User.objects.select_related('profile').get(username=username)
+        except User.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        courses = get_transcript(student, fresh=request.query_params.get('fresh') == 'true')
+        return Response({
+            'id': student.id,
+            'username': student.username,
+            'email': student.email,
+            'realname': student.profile.name,
+            'complete': all(course['status'] == GRADED for course in courses),
+            'courses': courses,
+        })
+
+
+class CourseGradesExport(InstrumentedViewMixin, AdmissionControlMixin, CourseViewMixin, APIView):
+    """
+    **Use Case**
+
+        Export the grades of every learner enrolled in a course.
+
+    **Example Requests**:
+
+        GET /api/extended/courses/{course_id}/grades/export/
+        GET /api/extended/courses/{course_id}/grades/export/?output=csv&usernames=user1,user2
+
+    **Query Parameters**
+
+        * output: "ndjson" (default) or "csv".
+
+        * usernames: Comma separated usernames to limit the export to. Optional.
+
+    **Response Values**
+
+        The response is streamed while the learners are graded.
+
+        ndjson: One JSON object per line with the same fields as CourseUserResult,
+        plus "error" when the learner could not be graded.
+
+        csv: One row per learner with username, id, email, realname, grade,
+        percent, the percent of every graded section and the error.
+    """
+    admission_limits = {'endpoint': 2, 'client': 1}
+
+    @CourseViewMixin.course_check
+    def get(self, request, **kwargs):
+        usernames = request.query_params.get('usernames')
+        usernames = usernames.split(',') if usernames else None
+        course = get_memo(request).get_course(self.course_key)
+        records = iter_course_grades(course, usernames=usernames)
+
+        if request.query_params.get('output') == 'csv':
+            response = StreamingHttpResponse(
+                iter_csv(records, section_labels(course)), content_type='text/csv'
+            )
+            response['Content-Disposition'] = 'attachment; filename="grades.csv"'
+            return response
+        return ndjson_response(request, iter_ndjson(records))
+
+
+class CourseListMixin(StreamingListMixin, ConditionalGetMixin):
     lookup_field = 'course_id'
-    paginate_by = 10000
-    paginate_by_param = 'page_size'
-    #pagination_serializer_class = PaginationSerializer
-    serializer_class = serializers.CourseSerializer
+    pagination_class = CourseKeysetPagination
+    serializer_class = CourseCatalogSerializer
     # Using EDX_API_KEY for access to this api
     authentication_classes = (SessionAuthenticationAllowInactiveUser,
                               OAuth2AuthenticationAllowInactiveUser)
     permission_classes = ApiKeyHeaderPermissionIsAuthenticated,
 
+    max_course_ids = getattr(settings, 'API_EXTENSION_MAX_COURSE_IDS', 200)
+
+    def get_version_markers(self, request, *args, **kwargs):
+        return [course_catalog_version()]
+
     def get_queryset(self):
-        course_ids = self.request.query_params.get('course_id', None)
+        # Pagination orders the results by course id.
+        return CourseCatalogEntry.objects.all()
 
-        results = []
+    def list(self, request, *args, **kwargs):
+        course_ids = request.query_params.get('course_id', None)
         if course_ids:
-            course_ids = course_ids.split(',')
-            for course_id in course_ids:
-                course_key = CourseKey.from_string(course_id)
-                course_descriptor = courses.get_course(course_key)
-                results.append(course_descriptor)
-        else:
-            results = modulestore().get_courses()
+            return self.list_by_ids(course_ids.split(','))
+        return super(CourseListMixin, self).list(request, *args, **kwargs)
 
-        # Ensure only course descriptors are returned.
-        results = (course for course in results if
-                   course.scope_ids.block_type == 'course')
+    def post(self, request, *args, **kwargs):
+        """
+        Same as GET with the course_id filter, the ids are sent in the
+        request body: {"course_ids": ["course-v1:edX+DemoX+Demo_Course", ...]}
+        """
+        course_ids = request.DATA.get('course_ids')
+        if (not course_ids or not isinstance(course_ids, list) or
+                not all(isinstance(course_id, basestring) for course_id in course_ids)):
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={"message": u"A list of course_ids must be specified."}
+            )
+        return self.list_by_ids(course_ids)
 
-        # Sort the results in a predictable manner.
-        return sorted(results, key=lambda course: unicode(course.id))
+    def list_by_ids(self, course_ids):
+        """
+        Unpaginated list of the requested courses, resolved with one query.
+        Invalid and unknown ids are reported in "errors".
+        """
+        if len(course_ids) > self.max_course_ids:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={
+                    "message": u"At most {} course ids can be requested at once.".format(self.max_course_ids)
+                }
+            )
+        entries, errors = get_catalog_entries(course_ids, self.get_queryset())
+        serializer = self.get_serializer(entries, many=True)
+        return Response({
+            "results": serializer.data,
+            "errors": errors,
+        })
 
 
-class CourseList(CourseListMixin, ListAPIView):
+class CourseList(InstrumentedViewMixin, CourseListMixin, ListAPIView):
     """
     Inspired from:
     lms.djangoapps.course_structure_api.v0.views.CourseList
@@ -201,14 +354,20 @@ class CourseList(CourseListMixin, ListAPIView):
     **Use Case**
         Get a paginated list of courses in the whole edX Platform.
         The list can be filtered by course_id.
-        Each page in the list can contain up to 10 courses.
+        Courses are ordered by id. Each page contains up to `page_size`
+        courses (100 by default, 1000 at most).
     **Example Requests**
           GET /api/extended/courses/
+          GET /api/extended/courses/?page_size=500&cursor={cursor}
+          GET /api/extended/courses/?course_id={course_id},{course_id}
+          POST /api/extended/courses/ {"course_ids": [{course_id}, {course_id}]}
     **Response Values**
-        * count: The number of courses in the edX platform.
-        * next: The URI to the next page of courses.
-        * previous: The URI to the previous page of courses.
-        * num_pages: The number of pages listing courses.
+        When courses are requested by id (at most 200) the list is not paginated
+        and "errors" holds the ids which are invalid or not found:
+            * course_id: The requested id.
+            * error: "invalid_course_id" or "not_found".
+
+        * next: The URI to the next page of courses, null on the last page.
         * results:  A list of courses returned. Each collection in the list
           contains these fields.
             * id: The unique identifier for the course.
@@ -224,34 +383,97 @@ class CourseList(CourseListMixin, ListAPIView):
             * end: The course end date. If course end date is not specified, the
               value is null.
     """
-    serializer_class = serializers.CourseSerializer
+    serializer_class = CourseCatalogSerializer
+    query_budget = 6
 
 
-class CourseListWithExams(CourseListMixin, ListAPIView):
+class CourseListWithExams(InstrumentedViewMixin, AdmissionControlMixin, CourseListMixin, ListAPIView):
     """
     Gets a list of courses with proctored exams
+
+    Same as CourseList, every course also has "proctored_exams" and "regular_exams".
+
+    **Query Parameters**
+
+        * has_proctored: "true" for the courses with proctored exams only, "false"
+          for the courses without any. Optional.
+
+        * active_only: "true" to leave the inactive exams out. With has_proctored,
+          only the active proctored exams count. Optional.
+
+        * include_expired: "false" to leave out the exams whose due date is past.
+          With has_proctored, only the unexpired proctored exams count.
+          Defaults to "true".
+
+        * exam_fields: Comma separated fields of the exams to return, e.g.
+          "id,exam_name,time_limit_mins". All the fields by default.
+
+    Courses left out by has_proctored are reported as "not_found" when the
+    courses are requested by id.
     """
     serializer_class = CourseWithExamsSerializer
+    query_budget = 8
+    admission_limits = {'endpoint': 16, 'client': 4}
 
+    def get_version_markers(self, request, *args, **kwargs):
+        return [course_catalog_version(), exams_version()]
 
-class SSOEnrollmentListView(EnrollmentListView):
+    def get_flag(self, name, default):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return default
+        return value.lower() == 'true'
+
+    def get_queryset(self):
+        queryset = super(CourseListWithExams, self).get_queryset()
+        has_proctored = self.get_flag('has_proctored', None)
+        if has_proctored is None:
+            return queryset
+        active_only = self.get_flag('active_only', False)
+        if not self.get_flag('include_expired', True):
+            courses = Q(course_id__in=proctored_exam_course_ids(active_only=active_only, include_expired=False))
+            return queryset.filter(courses) if has_proctored else queryset.exclude(courses)
+        count_field = 'active_proctored_exam_count' if active_only else 'proctored_exam_count'
+        if has_proctored:
+            return queryset.filter(**{count_field + '__gt': 0})
+        return queryset.filter(**{count_field: 0})
+
+    def get_serializer(self, *args, **kwargs):
+        exam_fields = self.request.query_params.get('exam_fields')
+        kwargs.update(
+            include_expired=self.get_flag('include_expired', True),
+            active_only=self.get_flag('active_only', False),
+            exam_fields=exam_fields.split(',') if exam_fields else None,
+        )
+        return super(CourseListWithExams, self).get_serializer(*args, **kwargs)
+
+
+class SSOEnrollmentListView(InstrumentedViewMixin, StreamingListMixin, EnrollmentListView):
     """
     Inspired from:
     common.djangoapps.enrollment.views.EnrollmentListView
     See base docs in parent class or on the web
     http://edx-platform-api.readthedocs.org/en/latest/enrollment/enrollment.html#enrollment.views.EnrollmentView
+
+    The enrollments are ordered by id (the creation order) and paginated with a cursor:
+    the response is {"next": <URI of the next page or null>, "results": [...]}.
+    Pass `since=<ISO 8601 datetime>` to get only the enrollments created after it.
     """
+    pagination_class = EnrollmentKeysetPagination
+    query_budget = 8
 
     @method_decorator(ensure_csrf_cookie_cross_domain)
     def get(self, request):
         """
         There is copy-paste from parent class method.
-        Only one difference we use get_course_enrollments() instead api.get_enrollments
+        Only difference: we use get_course_enrollments() instead of api.get_enrollments
+        and paginate the result.
 
-        Gets a list of all course enrollments for the currently logged in user.
+        Gets a list of the course enrollments of the user given in `?user=`. Staff
+        get the enrollments of every user when no user is given, the other users
+        get their own.
         """
-        username = request.GET.get('user',
-                                   request.user.is_staff and None or request.user.username)
+        username = request.GET.get('user', None if request.user.is_staff else request.user.username)
         try:
             course_key = CourseKey.from_string(request.GET.get('course_run'))
         except InvalidKeyError:
@@ -263,11 +485,23 @@ class SSOEnrollmentListView(EnrollmentListView):
             # Return a 404 instead of a 403 (Unauthorized). If one user is looking up
             # other users, do not let them deduce the existence of an enrollment.
             return Response(status=status.HTTP_404_NOT_FOUND)
-        try:
-            if course_key:
+
+        since = request.GET.get('since')
+        if since:
+            since = parse_datetime(since)
+            if since is None:
                 return Response(
-                    get_course_enrollments(username, course_id=course_key))
-            return Response(get_course_enrollments(username))
+                    status=status.HTTP_400_BAD_REQUEST,
+                    data={"message": u"'since' must be an ISO 8601 datetime."}
+                )
+        try:
+            filters = {'course_id': course_key} if course_key else {}
+            enrollments = get_course_enrollments(username, since=since or None, **filters)
+            if self.should_stream(request):
+                return self.stream_list(enrollments, serialize_enrollments)
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(enrollments, request, view=self)
+            return paginator.get_paginated_response(serialize_enrollments(page))
         except CourseEnrollmentError:
             return Response(
                 status=status.HTTP_400_BAD_REQUEST,
@@ -279,7 +513,62 @@ class SSOEnrollmentListView(EnrollmentListView):
             )
 
 
-class PaidMassEnrollment(APIView, ApiKeyPermissionMixIn):
+class EnrollmentChangeFeed(InstrumentedViewMixin, APIView, ApiKeyPermissionMixIn):
+    """
+        **Use Cases**
+
+            1. Sync a copy of the enrollments incrementally
+
+        **Example Requests**:
+
+            GET /api/extended/enrollment/changes
+            GET /api/extended/enrollment/changes?cursor={cursor}&course_id={course_id}
+
+        **Query Parameters**
+
+            * cursor: The cursor returned by the previous call. Without it the feed
+              starts from the oldest change.
+
+            * course_id: Only the changes of this course. Optional.
+
+            * page_size: The number of changes per page. Optional.
+
+        **Response Values**
+
+            * next: The URI of the next page, null when there are no more changes yet.
+
+            * cursor: The cursor to poll from next time.
+
+            * results: The changes in the order they were committed. Every change holds
+              the state of the enrollment after it:
+                * id, user, course_id, mode, is_active, created
+                * deleted: true when the enrollment row was deleted.
+    """
+    authentication_classes = OAuth2AuthenticationAllowInactiveUser, EnrollmentCrossDomainSessionAuth
+    permission_classes = ApiKeyHeaderPermissionIsAuthenticated,
+    pagination_class = ChangeFeedPagination
+    query_budget = 10
+
+    def get(self, request):
+        # The changes are served in the order they were committed (see change_feed.py)
+        number_changes(ChangeFeedPagination.max_page_size)
+        changes = EnrollmentChange.objects.filter(sequence__isnull=False)
+        course_id = request.query_params.get('course_id')
+        if course_id:
+            try:
+                changes = changes.filter(course_id=CourseKey.from_string(course_id))
+            except InvalidKeyError:
+                return Response(
+                    status=status.HTTP_400_BAD_REQUEST,
+                    data={"message": u"Invalid course id '{course_id}'".format(course_id=course_id)}
+                )
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(changes, request, view=self)
+        return paginator.get_paginated_response(EnrollmentChangeSerializer(page, many=True).data)
+
+
+class PaidMassEnrollment(InstrumentedViewMixin, AdmissionControlMixin, APIView, ApiKeyPermissionMixIn):
     """
         **Use Cases**
 
@@ -315,12 +604,48 @@ class PaidMassEnrollment(APIView, ApiKeyPermissionMixIn):
                 * name: Name of the attribute
                 * value: Value of the attribute
 
+            * async: A Boolean. When true the enrollment runs in background chunks and
+              the request only validates the payload. Optional.
+
         **Response Values**
 
-            200 - OK, 400 - Fail
+            200 - OK, 202 - Job queued (async), 400 - Fail, 403 - Some users are embargoed
+
+            * job_id, status_url: Only for async requests, see PaidMassEnrollmentJobStatus.
+
+            * message: Summary of the operation.
+
+            * results: The outcome for every user: "upgraded", "upgradeable",
+              "already_paid" or "not_enrolled".
     """
     authentication_classes = OAuth2AuthenticationAllowInactiveUser, EnrollmentCrossDomainSessionAuth
     permission_classes = ApiKeyHeaderPermissionIsAuthenticated,
+    query_budget = 30
+    admission_limits = {'endpoint': 4, 'client': 2}
+
+    def start_job(self, request, usernames, course_id, mode, is_active, email_opt_in):
+        """
+        Store a MassEnrollmentJob and queue it.
+        """
+        job = MassEnrollmentJob.objects.create(
+            requester=request.user if request.user.is_authenticated() else None,
+            course_id=course_id,
+            mode=mode,
+            is_active=is_active,
+            email_opt_in=email_opt_in,
+            usernames=json.dumps(usernames),
+            chunk_size=getattr(settings, 'API_EXTENSION_MASS_ENROLLMENT_CHUNK_SIZE', 500),
+        )
+        start_mass_enrollment_job(job)
+        return Response(
+            status=status.HTTP_202_ACCEPTED,
+            data={
+                "message": u"Enrollment job for course '{course_id}' is queued.".format(course_id=course_id),
+                "job_id": unicode(job.id),
+                "status_url": request.build_absolute_uri(
+                    u'{}/{}'.format(request.path.rstrip('/'), job.id)
+                ),
+            })
 
     #@transaction.commit_on_success
     def post(self, request):
@@ -358,124 +683,369 @@ class PaidMassEnrollment(APIView, ApiKeyPermissionMixIn):
         # use verified course mode by default
         mode = request.DATA.get('mode', CourseMode.VERIFIED)
 
-        bad_users = []
-        list_users = []
-        for username in users:
-            try:
-                user = User.objects.get(username=username)
-                list_users.append(user)
-            except ObjectDoesNotExist:
-                bad_users.append(username)
+        is_active = request.DATA.get('is_active')
+        # Check if the requested activation status is None or a Boolean
+        if is_active is not None and not isinstance(is_active, bool):
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={
+                    'message': (u"'{value}' is an invalid enrollment activation status.").format(value=is_active)
+                }
+            )
 
-        if len(bad_users) > 0:
+        email_opt_in = request.DATA.get('email_opt_in')
+        if email_opt_in is not None and not isinstance(email_opt_in, bool):
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={
+                    'message': (u"'{value}' is an invalid email opt in status.").format(value=email_opt_in)
+                }
+            )
+
+        run_async = request.DATA.get('async', False) is True
+        users, bad_users = resolve_users(users)
+
+        # Unknown users are reported per user by asynchronous jobs
+        if len(bad_users) > 0 and not run_async:
             return Response(
                 status=status.HTTP_400_BAD_REQUEST,
                 data={'message': u'Users: {} does not exist.'.format(', '.join(bad_users))}
             )
 
-        for user in list_users:
-            embargo_response = embargo_api.get_embargo_response(request, course_id, user)
+        list_users = list(users.values())
+        embargoed_users = get_embargoed_users(request, course_id, list_users)
+        if embargoed_users:
+            return Response(
+                status=status.HTTP_403_FORBIDDEN,
+                data={
+                    "message": (
+                        u"Users: {users} cannot access the course '{course_id}' from their location."
+                    ).format(users=', '.join(user.username for user in embargoed_users), course_id=course_id),
+                    "users": [user.username for user in embargoed_users],
+                    "user_message_url": request.build_absolute_uri(
+                        embargo_api.message_url_path(course_id, 'enrollment')
+                    ),
+                })
 
-            if embargo_response:
-                return embargo_response
+        # Validate the course and the mode once for the whole batch
+        if course_id not in get_course_overviews([course_id]):
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={
+                    "message": u"No course '{course_id}' found for enrollment".format(course_id=course_id)
+                }
+            )
+        available_modes = get_available_modes([course_id], include_expired=is_active is False)[course_id]
+        if mode not in available_modes:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={
+                    "message": (
+                        u"The course mode '{mode}' is not available for course '{course_id}'."
+                    ).format(mode=mode, course_id=course_id),
+                    "course_details": {"course_id": unicode(course_id), "course_modes": sorted(available_modes)}
+                })
 
-        current_username = None
         try:
-            is_active = request.DATA.get('is_active')
-            # Check if the requested activation status is None or a Boolean
-            if is_active is not None and not isinstance(is_active, bool):
-                return Response(
-                    status=status.HTTP_400_BAD_REQUEST,
-                    data={
-                        'message': (u"'{value}' is an invalid enrollment activation status.").format(value=is_active)
-                    }
-                )
+            if run_async:
+                return self.start_job(request, list(users) + bad_users, course_id, mode, is_active, email_opt_in)
 
-            enrollment_attributes = request.DATA.get('enrollment_attributes')
-            errors = False
-            already_paid = []  # list of users with verified enrollment
-            not_enrolled = []  # list of not enrolled yet or unenrolled users
-            for username in users:
-                current_username = username
-                enrollment = api.get_enrollment(username, unicode(course_id))
-                if not enrollment:
-                    not_enrolled.append(username)
-                elif enrollment['is_active'] is not True:
-                    not_enrolled.append(username)
-                elif enrollment['mode'] == CourseMode.VERIFIED:
-                    already_paid.append(username)
+            outcomes, upgradeable = classify_enrollments(course_id, list_users)
+            already_paid = [username for username, outcome in outcomes.items() if outcome == ALREADY_PAID]
+            not_enrolled = [username for username, outcome in outcomes.items() if outcome == NOT_ENROLLED]
             msg_paid = u""
             msg_not_enrolled = u""
             if len(already_paid) > 0:
                 msg_paid = u'Users: {} already paid for course.'.format(', '.join(already_paid))
-                errors = True
             if len(not_enrolled) > 0:
                 msg_not_enrolled = u'Users: {} not enrolled for course.'.format(', '.join(not_enrolled))
-                errors = True
-            if errors:
+            if already_paid or not_enrolled:
                 return Response(
                     status=status.HTTP_400_BAD_REQUEST,
-                    data={"message": (u"'{course_id}'\n:{msg_paid}\n{msg_not_enrolled}").format(
-                        course_id=course_id,
-                        msg_paid=msg_paid,
-                        msg_not_enrolled=msg_not_enrolled
-                    ),
+                    data={
+                        "message": (u"'{course_id}'\n:{msg_paid}\n{msg_not_enrolled}").format(
+                            course_id=course_id,
+                            msg_paid=msg_paid,
+                            msg_not_enrolled=msg_not_enrolled
+                        ),
+                        "results": outcomes,
                     })
 
-            for username in users:
-                current_username = username
-                response = api.update_enrollment(username, unicode(course_id), mode=mode, is_active=is_active)
-
-            email_opt_in = request.DATA.get('email_opt_in', None)
-            if email_opt_in is not None:
-                org = course_id.org
-                for username in users:
-                    update_email_opt_in(username, org, email_opt_in)
+            outcomes.update(upgrade_users(
+                course_id, list_users, upgradeable, mode, is_active=is_active, email_opt_in=email_opt_in
+            ))
 
             return Response(
                 status=status.HTTP_200_OK,
                 data={
-                    "message": u"Success for course '{course_id}'.".format(course_id=course_id)
+                    "message": u"Success for course '{course_id}'.".format(course_id=course_id),
+                    "results": outcomes,
                 })
-        except CourseModeNotFoundError as error:
-            return Response(
-                status=status.HTTP_400_BAD_REQUEST,
-                data={
-                    "message": (
-                        u"The course mode '{mode}' is not available for course '{course_id}'."
-                    ).format(mode="verified", course_id=course_id),
-                    "course_details": error.data
-                })
-        except CourseNotFoundError:
-            return Response(
-                status=status.HTTP_400_BAD_REQUEST,
-                data={
-                    "message": u"No course '{course_id}' found for enrollment".format(course_id=course_id)
-                }
-            )
-        except CourseEnrollmentExistsError as error:
-            return Response(data=error.enrollment)
         except CourseEnrollmentError:
             return Response(
                 status=status.HTTP_400_BAD_REQUEST,
                 data={
                     "message": (
-                        u"An error occurred while creating the new course enrollment for user "
-                        u"'{username}' in course '{course_id}'"
-                    ).format(username=current_username, course_id=course_id)
+                        u"An error occurred while updating the course enrollments in course '{course_id}'"
+                    ).format(course_id=course_id)
                 }
             )
 
 
-class ProctoredExamsListView(APIView):
+class PaidMassEnrollmentMatrix(InstrumentedViewMixin, AdmissionControlMixin, APIView, ApiKeyPermissionMixIn):
+    """
+        **Use Cases**
+
+            1. Move a list of users to a mode in several courses at once, e.g. the
+               courses of a program
+
+        **Example Requests**:
+
+            POST /api/extended/paid_mass_enrollment/matrix {
+                "users": ["user1", "user2"],
+                "courses": [
+                    {"course_id": "course-v1:edX+P1+2016", "mode": "verified"},
+                    {"course_id": "course-v1:edX+P2+2016", "mode": "professional"}
+                ]
+            }
+
+        **Post Parameters**
+
+            * users: The usernames of the users. Required.
+
+            * courses: The courses with the mode to move the users to ("verified"
+              by default). Required.
+
+            * is_active, email_opt_in: Same as PaidMassEnrollment. Optional.
+
+            At most API_EXTENSION_MAX_MATRIX_CELLS users x courses are enrolled in
+            the request, every course is committed on its own. Larger batches go
+            through PaidMassEnrollment with "async": true, course by course.
+
+        **Response Values**
+
+            200 - OK, 400 - Invalid request, too many cells, unknown users, courses or modes
+
+            * users, courses: The usernames and course ids, in the requested order.
+
+            * results: One row per user with one outcome per course: "upgraded",
+              "already_paid" (already in the mode), "not_enrolled" or "embargoed".
+              Only the "upgraded" cells are changed.
+    """
+    authentication_classes = OAuth2AuthenticationAllowInactiveUser, EnrollmentCrossDomainSessionAuth
+    permission_classes = ApiKeyHeaderPermissionIsAuthenticated,
+    admission_limits = {'endpoint': 4, 'client': 2}
+
+    max_cells = getattr(settings, 'API_EXTENSION_MAX_MATRIX_CELLS', 2000)
+
+    def bad_request(self, message, **data):
+        data['message'] = message
+        return Response(status=status.HTTP_400_BAD_REQUEST, data=data)
+
+    def post(self, request):
+        usernames = request.DATA.get('users')
+        courses = request.DATA.get('courses')
+        if (not usernames or not isinstance(usernames, list) or
+                not all(isinstance(username, basestring) for username in usernames)):
+            return self.bad_request(u"A list of users must be specified.")
+        if (not courses or not isinstance(courses, list) or
+                not all(isinstance(course, dict) and course.get('course_id') for course in courses)):
+            return self.bad_request(u"A list of courses with their course_id must be specified.")
+
+        is_active = request.DATA.get('is_active')
+        if is_active is not None and not isinstance(is_active, bool):
+            return self.bad_request(u"'{value}' is an invalid enrollment activation status.".format(value=is_active))
+        email_opt_in = request.DATA.get('email_opt_in')
+        if email_opt_in is not None and not isinstance(email_opt_in, bool):
+            return self.bad_request(u"'{value}' is an invalid email opt in status.".format(value=email_opt_in))
+
+        course_modes = OrderedDict()
+        invalid_ids = []
+        for course in courses:
+            try:
+                course_key = CourseKey.from_string(course['course_id'])
+            except InvalidKeyError:
+                invalid_ids.append(course['course_id'])
+                continue
+            course_modes[course_key] = course.get('mode', CourseMode.VERIFIED)
+        if invalid_ids:
+            return self.bad_request(u"Invalid course ids: {}".format(', '.join(invalid_ids)), courses=invalid_ids)
+        if len(unique_usernames(usernames)) * len(course_modes) > self.max_cells:
+            return self.bad_request(
+                u"At most {} users x courses can be requested at once, use paid_mass_enrollment "
+                u"with \"async\": true for larger batches.".format(self.max_cells)
+            )
+
+        users, bad_users = resolve_users(usernames)
+        if bad_users:
+            return self.bad_request(u'Users: {} does not exist.'.format(', '.join(bad_users)), users=bad_users)
+
+        # Validate all the courses and their modes at once
+        course_keys = list(course_modes)
+        overviews = get_course_overviews(course_keys)
+        not_found = [unicode(course_key) for course_key in course_keys if course_key not in overviews]
+        if not_found:
+            return self.bad_request(u"Courses: {} not found.".format(', '.join(not_found)), courses=not_found)
+        available_modes = get_available_modes(course_keys, include_expired=is_active is False)
+        bad_modes = [
+            {"course_id": unicode(course_key), "mode": mode}
+            for course_key, mode in course_modes.items() if mode not in available_modes[course_key]
+        ]
+        if bad_modes:
+            return self.bad_request(u"Some course modes are not available.", course_modes=bad_modes)
+
+        list_users = list(users.values())
+        blocked = set(
+            (user.id, course_key)
+            for course_key in course_keys
+            for user in get_embargoed_users(request, course_key, list_users)
+        )
+        outcomes, upgrades = classify_matrix(list_users, course_modes, blocked)
+        outcomes.update(upgrade_matrix(course_modes, upgrades, is_active=is_active, email_opt_in=email_opt_in))
+
+        return Response({
+            "users": list(users),
+            "courses": [unicode(course_key) for course_key in course_keys],
+            "results": [
+                [outcomes[(username, course_key)] for course_key in course_keys]
+                for username in users
+            ],
+        })
+
+
+class PaidMassEnrollmentJobStatus(InstrumentedViewMixin, APIView, ApiKeyPermissionMixIn):
+    """
+        **Use Cases**
+
+            1. Track the progress of an asynchronous PaidMassEnrollment request
+
+        **Example Requests**:
+
+            GET /api/extended/paid_mass_enrollment/{job_id}
+
+        **Response Values**
+
+            * job_id: The identifier of the job.
+
+            * course_id: The course the users are enrolled to.
+
+            * status: "pending", "running", "succeeded" or "failed".
+
+            * total: The number of users in the job.
+
+            * processed, succeeded, failed: Counters of processed users.
+
+            * errors: Map of username to the error for every failed user.
+    """
+    authentication_classes = OAuth2AuthenticationAllowInactiveUser, EnrollmentCrossDomainSessionAuth
+    permission_classes = ApiKeyHeaderPermissionIsAuthenticated,
+    query_budget = 4
+
+    def get(self, request, job_id):
+        try:
+            job = MassEnrollmentJob.objects.get(id=job_id)
+        except (MassEnrollmentJob.DoesNotExist, ValueError):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "job_id": unicode(job.id),
+            "course_id": unicode(job.course_id),
+            "status": job.status,
+            "total": job.total,
+            "processed": job.processed,
+            "succeeded": job.succeeded,
+            "failed": job.failed,
+            "errors": job.get_errors(),
+        })
+
+
+class ProctoredExamsListView(InstrumentedViewMixin, ConditionalGetMixin, APIView):
     """
     Get list of user's course and proctored exams for it
     """
     authentication_classes = (SessionAuthenticationAllowInactiveUser,
                               OAuth2AuthenticationAllowInactiveUser)
     permission_classes = ApiKeyHeaderPermissionIsAuthenticated,
+    query_budget = 8
+
+    def get_version_markers(self, request, username):
+        return [course_catalog_version(), exams_version(), user_enrollments_version(username)]
 
     def get(self, request, username):
         result = get_user_proctored_exams(username, request)
 
         return Response(data=result)
+
+
+class UsersProctoredExamsView(InstrumentedViewMixin, APIView):
+    """
+        **Use Cases**
+
+            1. Get the proctored exams of many users at once
+
+        **Example Requests**:
+
+            POST /api/extended/user_proctored_exams/ {
+                "usernames": ["user1", "user2"],
+                "course_id": "course-v1:edX+DemoX+Demo_Course"
+            }
+
+        **Post Parameters**
+
+            * usernames: The usernames of the users. Required.
+
+            * course_id: Only the exams of this course. Optional.
+
+            * stream: A Boolean. When true the users are returned one per line
+              (application/x-ndjson) as they are loaded, for long lists. Optional.
+
+        **Response Values**
+
+            * results: Map of username to the same data as ProctoredExamsListView
+              returns for the user. Unknown users get an empty map.
+
+            Streamed responses have one {"username", "courses"} object per line.
+    """
+    authentication_classes = (SessionAuthenticationAllowInactiveUser,
+                              OAuth2AuthenticationAllowInactiveUser)
+    permission_classes = ApiKeyHeaderPermissionIsAuthenticated,
+    query_budget = 6
+
+    max_usernames = getattr(settings, 'API_EXTENSION_MAX_USERNAMES', 1000)
+    chunk_size = getattr(settings, 'API_EXTENSION_PROCTORED_EXAMS_CHUNK_SIZE', 500)
+
+    def post(self, request):
+        usernames = request.DATA.get('usernames')
+        if (not usernames or not isinstance(usernames, list) or
+                not all(isinstance(username, basestring) for username in usernames)):
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={"message": u"A list of usernames must be specified."}
+            )
+        usernames = unique_usernames(usernames)
+
+        course_key = None
+        course_id = request.DATA.get('course_id')
+        if course_id:
+            try:
+                course_key = CourseKey.from_string(course_id)
+            except InvalidKeyError:
+                return Response(
+                    status=status.HTTP_400_BAD_REQUEST,
+                    data={"message": u"Invalid course id '{course_id}'".format(course_id=course_id)}
+                )
+
+        if request.DATA.get('stream') is True:
+            records = iter_users_proctored_exams(usernames, request, course_key, chunk_size=self.chunk_size)
+            return ndjson_response(request, iter_ndjson(records))
+
+        if len(usernames) > self.max_usernames:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={
+                    "message": (
+                        u"At most {} usernames can be requested at once, stream the longer lists."
+                    ).format(self.max_usernames)
+                }
+            )
+        return Response({"results": get_users_proctored_exams(usernames, request, course_key)})
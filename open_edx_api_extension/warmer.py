@@ -0,0 +1,45 @@
+"""
+Prebuild the course list fragments and the exam cache.
+
+Run after a course publish or an exam change (see tasks.py and signals.py)
+and by the warm_api_extension_cache management command. Only the courses
+whose fragment or exams are not in the cache are rebuilt, as their cache
+keys change with the catalog entry or are dropped on exam changes.
+"""
+from .exam_cache import get_exams_for_courses
+from .fragments import get_fragments
+from .models import CourseCatalogEntry
+from .pagination import CourseKeysetPagination
+from .serializers import CourseCatalogSerializer
+
+BATCH_SIZE = CourseKeysetPagination.max_page_size
+
+
+def warm_course_cache(course_keys=None, batch_size=BATCH_SIZE):
+    """
+    Build the missing fragments and exams of the given courses, of the
+    whole catalog by default.
+
+    Returns:
+        (number of courses checked, number of fragments built)
+    """
+    queryset = CourseCatalogEntry.objects.order_by('course_id')
+    if course_keys is not None:
+        queryset = queryset.filter(course_id__in=list(course_keys))
+
+    serializer = CourseCatalogSerializer()
+    checked = 0
+    built = 0
+    last_course_id = None
+    while True:
+        batch = queryset
+        if last_course_id is not None:
+            batch = batch.filter(course_id__gt=last_course_id)
+        batch = list(batch[:batch_size])
+        if not batch:
+            break
+        built += len(get_fragments(batch, serializer.build_fragment, only_missing=True))
+        get_exams_for_courses([entry.course_id for entry in batch])
+        checked += len(batch)
+        last_course_id = batch[-1].course_id
+    return checked, built
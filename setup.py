@@ -1,5 +1,5 @@
 import os
-from setuptools import setup
+from setuptools import find_packages, setup
 
 with open(os.path.join(os.path.dirname(__file__), 'README.md')) as readme:
     README = readme.read()
@@ -10,7 +10,7 @@ os.chdir(os.path.normpath(os.path.join(os.path.abspath(__file__), os.pardir)))
 setup(
     name='open-edx-api-extension',
     version='0.1',
-    packages=['open_edx_api_extension'],
+    packages=find_packages(exclude=['tests', 'tests.*']),
     include_package_data=True,
     description='API extension for Open edX',
     long_description=README,
@@ -0,0 +1,337 @@
+"""
+Benchmark the extended API endpoints against synthetic data, on the stand-ins
+of tests/standins and an in-memory SQLite database:
+
+    python -m tests.benchmark --scale 1000 --scale 100000 --enforce
+
+The catalog, libraries, users, enrollments, enrollment changes and exams are
+generated in a transaction which is rolled back at the end of every scale, and
+the learners are enrolled in a stand-in course for the grades and mass
+enrollment endpoints. Every endpoint is called through its view with the same
+page size at every scale and the latency, SQL query count and peak memory
+growth are reported.
+
+With --enforce the benchmark fails when an endpoint runs more queries than the
+query_budget of its view, or when its query count grows with the scale (an
+N+1 pattern), so it can gate a build.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+import django
+
+if __name__ == '__main__':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+    django.setup()
+
+# pylint: disable=wrong-import-position
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from course_modes.models import CourseMode
+from edx_proctoring.models import ProctoredExam
+from opaque_keys.edx.locator import CourseLocator, LibraryLocator
+from student.models import CourseEnrollment, UserProfile
+from xmodule.modulestore.django import modulestore
+
+from open_edx_api_extension import views
+from open_edx_api_extension.exam_cache import invalidate_exams_for_courses
+from open_edx_api_extension.models import (
+    CourseCatalogEntry, EnrollmentChange, LibraryCatalogEntry, MassEnrollmentJob
+)
+
+USERNAME_PREFIX = 'apibench'
+BATCH_SIZE = 1000
+PAGE_SIZE = 100
+# Learners graded or upgraded by the course endpoints
+COURSE_USERS = 20
+
+
+class _Rollback(Exception):
+    pass
+
+
+def bulk_create(model, objects):
+    """
+    Insert `objects` in batches of BATCH_SIZE rows, or of fewer rows when the
+    database needs it: SQLite caps the rows and the parameters of a statement.
+    """
+    batch_size = min(BATCH_SIZE, max(connection.ops.bulk_batch_size(model._meta.concrete_fields, objects), 1))
+    model.objects.bulk_create(objects, batch_size=batch_size)
+
+
+class BenchmarkFailed(Exception):
+    """
+    Raised by an enforced benchmark with query budget violations.
+    """
+    pass
+
+
+class Benchmark(object):
+    """
+    Measure latency, SQL queries and memory of the extended API endpoints on synthetic data.
+    """
+
+    def __init__(self, stdout=sys.stdout, stderr=sys.stderr):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.factory = APIRequestFactory()
+
+    def write(self, stream, message):
+        stream.write(message + u'\n')
+
+    def run(self, scales, repeat=5, enforce=False):
+        """
+        Benchmark every endpoint at every scale, with the learners enrolled in
+        a stand-in course.
+        """
+        scales = sorted(scales)
+        course = modulestore().create_course('BenchX', 'Real', 'Run')
+        results = {}
+        for scale in scales:
+            self.write(self.stdout, u"\nScale {}".format(scale))
+            results[scale] = self.run_scale(scale, [course.id], repeat)
+
+        violations = self.find_violations(scales, results)
+        for violation in violations:
+            self.write(self.stderr, violation)
+        if violations and enforce:
+            raise BenchmarkFailed(u"{} query budget violations.".format(len(violations)))
+        return results
+
+    def run_scale(self, scale, course_keys, repeat):
+        results = []
+        context = {'course_keys': course_keys}
+        try:
+            with transaction.atomic():
+                context = self.seed(scale, course_keys)
+                invalidate_exams_for_courses(context['course_keys'])
+                for endpoint in self.endpoints(context):
+                    result = self.measure(endpoint, context['staff'], repeat)
+                    results.append(result)
+                    self.write(self.stdout, (
+                        u"  {name:<28} {status:>4} {median_ms:>9.1f}ms {max_ms:>9.1f}ms "
+                        u"{queries:>5} queries (budget {budget}) +{rss_kb}KB"
+                    ).format(**result))
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            # The exam cache must not keep the exams of the rolled back rows.
+            invalidate_exams_for_courses(context['course_keys'])
+        return results
+
+    def seed(self, scale, course_keys):
+        """
+        Generate `scale` catalog courses, users, enrollments and exams.
+        """
+        now = timezone.now()
+        catalog_keys = [CourseLocator('BenchX', 'C{:06d}'.format(index), 'Run') for index in range(scale)]
+
+        bulk_create(CourseCatalogEntry, [
+            CourseCatalogEntry(
+                course_id=course_key, display_name=u'Bench course {}'.format(course_key.course),
+                org=course_key.org, course=course_key.course, run=course_key.run,
+                start=now, has_proctored_exams=index % 2 == 0,
+                exam_count=1, proctored_exam_count=int(index % 2 == 0),
+                active_proctored_exam_count=int(index % 2 == 0),
+            )
+            for index, course_key in enumerate(catalog_keys)
+        ])
+        bulk_create(LibraryCatalogEntry, [
+            LibraryCatalogEntry(
+                library_key=LibraryLocator('BenchX', 'L{:06d}'.format(index)),
+                display_name=u'Bench library {}'.format(index), org='BenchX', block_count=10,
+                last_published=now,
+            )
+            for index in range(max(scale // 10, 1))
+        ])
+
+        bulk_create(ProctoredExam, [
+            ProctoredExam(
+                course_id=unicode(course_key), content_id=u'block-v1:bench+exam+{}'.format(index),
+                exam_name=u'Bench exam {}'.format(index), time_limit_mins=60,
+                is_proctored=index % 2 == 0, is_practice_exam=False, is_active=True,
+            )
+            for index, course_key in enumerate(catalog_keys)
+        ] + [
+            ProctoredExam(
+                course_id=unicode(course_key), content_id=u'block-v1:bench+exam+enrolled{}'.format(index),
+                exam_name=u'Bench exam {}'.format(index), time_limit_mins=60,
+                is_proctored=True, is_practice_exam=False, is_active=True,
+            )
+            for course_key in course_keys for index in range(5)
+        ])
+
+        bulk_create(User, [
+            User(
+                username=u'{}{}'.format(USERNAME_PREFIX, index),
+                email=u'{}{}@example.com'.format(USERNAME_PREFIX, index),
+            )
+            for index in range(scale)
+        ])
+        users = list(
+            User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id').values_list('id', 'username')
+        )
+        bulk_create(UserProfile, [UserProfile(user_id=user_id, name=username) for user_id, username in users])
+        enrollments = [
+            CourseEnrollment(user_id=user_id, course_id=course_keys[index % len(course_keys)], mode=CourseMode.HONOR)
+            for index, (user_id, __) in enumerate(users)
+        ]
+        # The first learner is enrolled in all the courses, for the per user endpoints.
+        first_user_id, first_username = users[0]
+        enrollments.extend(
+            CourseEnrollment(user_id=first_user_id, course_id=course_key, mode=CourseMode.HONOR)
+            for course_key in course_keys[1:]
+        )
+        bulk_create(CourseEnrollment, enrollments)
+
+        bulk_create(EnrollmentChange, [
+            EnrollmentChange(
+                user_id=enrollment.user_id, username=username, course_id=enrollment.course_id,
+                mode=enrollment.mode, is_active=True,
+            )
+            for enrollment, (__, username) in zip(enrollments, users)
+        ])
+
+        staff = User.objects.create(username=u'{}_staff'.format(USERNAME_PREFIX), is_staff=True)
+        course_key = course_keys[0]
+        CourseMode.objects.get_or_create(
+            course_id=course_key, mode_slug=CourseMode.VERIFIED, defaults={'mode_display_name': 'Verified'}
+        )
+        job = MassEnrollmentJob.objects.create(
+            course_id=course_key, mode=CourseMode.VERIFIED, usernames='[]', chunk_size=BATCH_SIZE
+        )
+        return {
+            'staff': staff,
+            'course_keys': catalog_keys + course_keys,
+            'course_id': unicode(course_key),
+            'username': first_username,
+            'course_usernames': [
+                username for index, (__, username) in enumerate(users) if index % len(course_keys) == 0
+            ][:COURSE_USERS],
+            'catalog_ids': [unicode(course_key) for course_key in catalog_keys[-views.CourseList.max_course_ids:]],
+            'job_id': unicode(job.id),
+        }
+
+    def endpoints(self, context):
+        """
+        (name, view class, method, path, data, view kwargs) of every endpoint.
+        """
+        page = {'page_size': PAGE_SIZE}
+        return [
+            ('courses', views.CourseList, 'get', '/courses/', page, {}),
+            ('courses_by_id', views.CourseList, 'post', '/courses/', {'course_ids': context['catalog_ids']}, {}),
+            ('courses_proctored', views.CourseListWithExams, 'get', '/courses/proctored', page, {}),
+            ('libraries', views.LibrariesList, 'get', '/libraries/', page, {}),
+            ('enrollments', views.SSOEnrollmentListView, 'get', '/enrollment', page, {}),
+            ('enrollment_changes', views.EnrollmentChangeFeed, 'get', '/enrollment/changes', page, {}),
+            ('user_proctored_exams', views.ProctoredExamsListView, 'get', '/user_proctored_exams/',
+             {}, {'username': context['username']}),
+            ('users_proctored_exams', views.UsersProctoredExamsView, 'post', '/user_proctored_exams/',
+             {'usernames': context['course_usernames']}, {}),
+            ('mass_enrollment_job', views.PaidMassEnrollmentJobStatus, 'get', '/paid_mass_enrollment/',
+             {}, {'job_id': context['job_id']}),
+            ('course_user_result', views.CourseUserResult, 'get', '/courses/', {},
+             {'course_id': context['course_id'], 'username': context['course_usernames'][0]}),
+            ('user_grades', views.UserGradesView, 'get', '/users/grades/', {},
+             {'username': context['course_usernames'][0]}),
+            ('course_grades', views.CourseGradesExport, 'get', '/courses/grades/export/',
+             {'usernames': ','.join(context['course_usernames'])}, {'course_id': context['course_id']}),
+            ('paid_mass_enrollment', views.PaidMassEnrollment, 'post', '/paid_mass_enrollment', {
+                'users': context['course_usernames'],
+                'course_details': {'course_id': context['course_id']},
+            }, {}),
+            ('paid_mass_enrollment_matrix', views.PaidMassEnrollmentMatrix, 'post',
+             '/paid_mass_enrollment/matrix', {
+                 'users': context['course_usernames'],
+                 'courses': [{'course_id': context['course_id']}],
+             }, {}),
+        ]
+
+    def measure(self, endpoint, staff, repeat):
+        name, view_class, method, path, data, kwargs = endpoint
+        view = view_class.as_view()
+        durations = []
+        queries = 0
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        for __ in range(repeat):
+            if method == 'post':
+                request = self.factory.post(path, data, format='json')
+            else:
+                request = self.factory.get(path, data)
+            force_authenticate(request, user=staff)
+            if getattr(settings, 'EDX_API_KEY', None):
+                request.META['HTTP_X_EDX_API_KEY'] = settings.EDX_API_KEY
+
+            with CaptureQueriesContext(connection) as captured:
+                started = time.time()
+                response = view(request, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                durations.append((time.time() - started) * 1000)
+            # The most queries of a call, the first one runs with cold caches
+            queries = max(queries, len(captured))
+
+        durations.sort()
+        return {
+            'name': name,
+            'view': view_class,
+            'status': response.status_code,
+            'median_ms': durations[len(durations) // 2],
+            'max_ms': durations[-1],
+            'queries': queries,
+            'budget': view_class.query_budget,
+            'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before,
+        }
+
+    @staticmethod
+    def find_violations(scales, results):
+        violations = []
+        for result in results[scales[-1]]:
+            if result['budget'] is not None and result['queries'] > result['budget']:
+                violations.append(u"{name} ran {queries} queries, its budget is {budget}.".format(**result))
+        smallest = {result['name']: result['queries'] for result in results[scales[0]]}
+        for result in results[scales[-1]]:
+            if result['queries'] > smallest[result['name']]:
+                violations.append(
+                    u"{name} ran {queries} queries at scale {scale} and {smallest} at scale {first}.".format(
+                        scale=scales[-1], smallest=smallest[result['name']], first=scales[0], **result
+                    )
+                )
+        return violations
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=Benchmark.__doc__.strip())
+    parser.add_argument(
+        '--scale', type=int, action='append', dest='scales',
+        help='Number of courses, users, enrollments and exams to generate. Repeatable, default 1000.'
+    )
+    parser.add_argument('--repeat', type=int, default=5, help='Calls per endpoint, default 5.')
+    parser.add_argument(
+        '--enforce', action='store_true', default=False,
+        help='Fail on query budget violations and on query counts growing with the scale.'
+    )
+    options = parser.parse_args(argv)
+
+    from tests.utils import share_connections
+
+    connection.creation.create_test_db(verbosity=0)
+    # The grades export runs on pool threads
+    share_connections()
+    try:
+        Benchmark().run(options.scales or [1000], repeat=options.repeat, enforce=options.enforce)
+    except BenchmarkFailed as error:
+        sys.exit(unicode(error))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
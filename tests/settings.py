@@ -0,0 +1,79 @@
+"""
+Django settings of the offline test and benchmark harness.
+
+The edx-platform modules the API extension imports are replaced with the
+lightweight stand-ins of tests/standins, and the database is an in-memory
+SQLite one, so the views run without an edx-platform install.
+"""
+import os
+import sys
+
+STANDINS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'standins')
+if STANDINS_DIR not in sys.path:
+    sys.path.insert(0, STANDINS_DIR)
+
+SECRET_KEY = 'open_edx_api_extension tests'
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+USE_TZ = True
+TIME_ZONE = 'UTC'
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'open_edx_api_extension',
+    },
+}
+
+INSTALLED_APPS = (
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'rest_framework',
+    'student',
+    'course_modes',
+    'courseware',
+    'edx_proctoring',
+    'embargo',
+    'openedx.core.djangoapps.content.course_overviews',
+    'openedx.core.djangoapps.user_api',
+    'open_edx_api_extension',
+)
+
+MIDDLEWARE_CLASSES = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+)
+
+ROOT_URLCONF = 'tests.urls'
+
+COURSE_KEY_PATTERN = r'(?P<course_key_string>[^/+]+(/|\+)[^/+]+(/|\+)[^/?]+)'
+COURSE_ID_PATTERN = COURSE_KEY_PATTERN.replace('course_key_string', 'course_id')
+
+FEATURES = {
+    'EMBARGO': False,
+}
+EDX_API_KEY = None
+
+# The query budgets of the views fail the tests and the benchmark
+API_EXTENSION_ENFORCE_QUERY_BUDGETS = True
+API_EXTENSION_MASS_ENROLLMENT_BACKEND = 'thread'
+API_EXTENSION_CACHE_WARMER_ENABLED = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'null': {'class': 'logging.NullHandler'},
+    },
+    'loggers': {
+        'open_edx_api_extension.metrics': {'handlers': ['null'], 'propagate': False},
+    },
+}
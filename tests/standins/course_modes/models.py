@@ -0,0 +1,48 @@
+"""
+Stand-in of course_modes.models.
+"""
+from collections import namedtuple
+
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from xmodule_django.models import CourseKeyField
+
+Mode = namedtuple('Mode', ['slug', 'name', 'min_price', 'suggested_prices', 'currency', 'expiration_datetime',
+                           'description', 'sku'])
+
+
+class CourseMode(models.Model):
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    mode_slug = models.CharField(max_length=100)
+    mode_display_name = models.CharField(max_length=255)
+    min_price = models.IntegerField(default=0)
+    currency = models.CharField(default='usd', max_length=8)
+    expiration_datetime = models.DateTimeField(default=None, null=True, blank=True)
+
+    HONOR = 'honor'
+    PROFESSIONAL = 'professional'
+    VERIFIED = 'verified'
+    AUDIT = 'audit'
+    NO_ID_PROFESSIONAL_MODE = 'no-id-professional'
+    DEFAULT_MODE = Mode(HONOR, 'Honor Code Certificate', 0, '', 'usd', None, None, None)
+    DEFAULT_MODE_SLUG = HONOR
+
+    class Meta(object):
+        unique_together = ('course_id', 'mode_slug', 'currency')
+
+    @classmethod
+    def modes_for_course(cls, course_id, include_expired=False, only_selectable=True):  # pylint: disable=unused-argument
+        """
+        The Mode tuples of the course, one query per call like edx-platform.
+        """
+        modes = cls.objects.filter(course_id=course_id)
+        if not include_expired:
+            modes = modes.filter(Q(expiration_datetime__isnull=True) | Q(expiration_datetime__gte=timezone.now()))
+        return [mode.to_tuple() for mode in modes] or [cls.DEFAULT_MODE]
+
+    def to_tuple(self):
+        return Mode(
+            self.mode_slug, self.mode_display_name, self.min_price, '', self.currency, self.expiration_datetime,
+            None, None
+        )
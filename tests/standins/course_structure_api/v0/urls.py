@@ -0,0 +1,11 @@
+"""
+Stand-in of course_structure_api.v0.urls.
+"""
+from django.conf import settings
+from django.conf.urls import url
+
+from course_structure_api.v0 import views
+
+urlpatterns = [
+    url(r'^courses/{}/$'.format(settings.COURSE_ID_PATTERN), views.CourseDetail.as_view(), name='detail'),
+]
@@ -0,0 +1,50 @@
+"""
+Stand-in of course_structure_api.v0.views: the course view mixin and the
+course detail view the course URIs point to.
+"""
+from opaque_keys.edx.keys import CourseKey
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from openedx.core.lib.api.authentication import (
+    OAuth2AuthenticationAllowInactiveUser,
+    SessionAuthenticationAllowInactiveUser,
+)
+from student.auth import has_course_author_access
+
+
+class CourseViewMixin(object):
+    """
+    Course views for the course staff.
+    """
+    lookup_field = 'course_id'
+    authentication_classes = (OAuth2AuthenticationAllowInactiveUser, SessionAuthenticationAllowInactiveUser)
+    permission_classes = (IsAuthenticated,)
+
+    def __init__(self, *args, **kwargs):
+        super(CourseViewMixin, self).__init__(*args, **kwargs)
+        self.course_key = None
+
+    def get_requested_course_id(self):
+        return self.kwargs.get('course_id')
+
+    @staticmethod
+    def course_check(func):
+        """
+        Parse the course key of the request and check the user is its staff.
+        """
+        def func_wrapper(self, request, *args, **kwargs):
+            self.course_key = CourseKey.from_string(self.get_requested_course_id())
+            if not has_course_author_access(request.user, self.course_key):
+                raise PermissionDenied
+            return func(self, request, *args, **kwargs)
+        return func_wrapper
+
+
+class CourseDetail(CourseViewMixin, APIView):
+
+    @CourseViewMixin.course_check
+    def get(self, request, **kwargs):  # pylint: disable=unused-argument
+        return Response({'id': unicode(self.course_key)})
@@ -0,0 +1,25 @@
+"""
+Stand-in of courseware.courses.
+"""
+from django.http import Http404
+from xmodule.modulestore.django import modulestore
+
+
+def get_course(course_id, depth=0):
+    course = modulestore().get_course(course_id, depth=depth)
+    if course is None:
+        raise ValueError(u"Course not found: {0}".format(course_id))
+    return course
+
+
+def get_course_by_id(course_key, depth=0):
+    course = modulestore().get_course(course_key, depth=depth)
+    if course is None:
+        raise Http404(u"Course not found.")
+    return course
+
+
+def course_image_url(course):
+    return u'/asset-v1:{}+{}+{}+type@asset+block@{}'.format(
+        course.id.org, course.id.course, course.id.run, course.course_image
+    )
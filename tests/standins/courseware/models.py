@@ -0,0 +1,24 @@
+"""
+Stand-in of courseware.models: the learner state of the course modules.
+
+Like the Dogwood release there is no SCORE_CHANGED signal, the grade
+snapshots are invalidated from the StudentModule saves.
+"""
+from django.contrib.auth.models import User
+from django.db import models
+from xmodule_django.models import CourseKeyField
+
+
+class StudentModule(models.Model):
+    module_type = models.CharField(max_length=32, default='problem', db_index=True)
+    module_state_key = models.CharField(max_length=255, db_index=True)
+    student = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    state = models.TextField(null=True, blank=True)
+    grade = models.FloatField(null=True, blank=True, db_index=True)
+    max_grade = models.FloatField(null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta(object):
+        unique_together = (('student', 'module_state_key', 'course_id'),)
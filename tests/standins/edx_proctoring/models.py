@@ -0,0 +1,20 @@
+"""
+Stand-in of edx_proctoring.models: the exams.
+"""
+from django.db import models
+from model_utils.models import TimeStampedModel
+
+
+class ProctoredExam(TimeStampedModel):
+    course_id = models.CharField(max_length=255, db_index=True)
+    content_id = models.CharField(max_length=255, db_index=True)
+    external_id = models.CharField(max_length=255, null=True, db_index=True)
+    exam_name = models.TextField()
+    time_limit_mins = models.IntegerField()
+    due_date = models.DateTimeField(null=True)
+    is_proctored = models.BooleanField(default=False)
+    is_practice_exam = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=False)
+
+    class Meta(object):
+        unique_together = (('course_id', 'content_id'),)
@@ -0,0 +1,17 @@
+"""
+Stand-in of embargo.api: the IP addresses listed in
+EMBARGO_BLOCKED_IP_ADDRESSES are blocked from the restricted courses.
+"""
+from django.conf import settings
+
+from embargo.models import RestrictedCourse
+
+
+def check_course_access(course_key, user=None, ip_address=None, url=None):  # pylint: disable=unused-argument
+    if not RestrictedCourse.is_restricted_course(course_key):
+        return True
+    return ip_address not in getattr(settings, 'EMBARGO_BLOCKED_IP_ADDRESSES', ())
+
+
+def message_url_path(course_key, access_point):  # pylint: disable=unused-argument
+    return u'/embargo/blocked-message/{access_point}/default/'.format(access_point=access_point)
@@ -0,0 +1,32 @@
+"""
+Stand-in of embargo.models: per course country blacklists.
+"""
+from django.db import models
+from xmodule_django.models import CourseKeyField
+
+
+class RestrictedCourse(models.Model):
+    course_key = CourseKeyField(max_length=255, db_index=True, unique=True)
+
+    @classmethod
+    def is_restricted_course(cls, course_id):
+        return cls.objects.filter(course_key=course_id).exists()
+
+
+class CountryAccessRule(models.Model):
+    BLACKLIST_RULE = 'blacklist'
+
+    rule_type = models.CharField(max_length=255, default=BLACKLIST_RULE)
+    restricted_course = models.ForeignKey(RestrictedCourse)
+    country = models.CharField(max_length=2)
+
+    @classmethod
+    def check_country_access(cls, course_id, country):
+        """
+        Whether a user from the country may access the course.
+        """
+        if not country:
+            return True
+        return not cls.objects.filter(
+            restricted_course__course_key=course_id, country=country, rule_type=cls.BLACKLIST_RULE
+        ).exists()
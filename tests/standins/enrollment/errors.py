@@ -0,0 +1,9 @@
+"""
+Stand-in of enrollment.errors.
+"""
+
+
+class CourseEnrollmentError(Exception):
+    def __init__(self, msg, data=None):
+        super(CourseEnrollmentError, self).__init__(msg)
+        self.data = data
@@ -0,0 +1,60 @@
+"""
+Stand-in of enrollment.serializers.
+
+Like edx-platform, the course modes are loaded once per serialized
+enrollment.
+"""
+from rest_framework import serializers
+
+from course_modes.models import CourseMode
+from student.models import CourseEnrollment
+
+
+class ModeSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    slug = serializers.CharField(max_length=100)
+    name = serializers.CharField(max_length=255)
+    min_price = serializers.IntegerField()
+    suggested_prices = serializers.CharField(max_length=255)
+    currency = serializers.CharField(max_length=8)
+    expiration_datetime = serializers.DateTimeField()
+    description = serializers.CharField()
+    sku = serializers.CharField()
+
+
+class CourseField(serializers.RelatedField):
+    """
+    Course overview of an enrollment with its modes.
+    """
+
+    def __init__(self, **kwargs):
+        self.include_expired = kwargs.pop('include_expired', False)
+        kwargs['read_only'] = True
+        super(CourseField, self).__init__(**kwargs)
+
+    def to_representation(self, course):
+        course_modes = ModeSerializer(
+            CourseMode.modes_for_course(course.id, include_expired=self.include_expired, only_selectable=False),
+            many=True
+        ).data
+        return {
+            'course_id': unicode(course.id),
+            'enrollment_start': course.enrollment_start,
+            'enrollment_end': course.enrollment_end,
+            'course_start': course.start,
+            'course_end': course.end,
+            'invite_only': course.invitation_only,
+            'course_modes': course_modes,
+        }
+
+
+class CourseEnrollmentSerializer(serializers.ModelSerializer):
+    course_details = CourseField(source='course_overview')
+    user = serializers.SerializerMethodField('get_username')
+
+    class Meta(object):
+        model = CourseEnrollment
+        fields = ('created', 'mode', 'is_active', 'course_details', 'user')
+        lookup_field = 'username'
+
+    def get_username(self, model):
+        return model.username
@@ -0,0 +1,29 @@
+"""
+Stand-in of enrollment.views: the base classes of the enrollment views.
+"""
+from rest_framework.views import APIView
+
+from openedx.core.lib.api.authentication import (
+    OAuth2AuthenticationAllowInactiveUser,
+    SessionAuthenticationAllowInactiveUser,
+)
+from openedx.core.lib.api.permissions import ApiKeyHeaderPermission, ApiKeyHeaderPermissionIsAuthenticated
+
+
+class EnrollmentCrossDomainSessionAuth(SessionAuthenticationAllowInactiveUser):
+    pass
+
+
+class ApiKeyPermissionMixIn(object):
+
+    def has_api_key_permissions(self, request):
+        return ApiKeyHeaderPermission().has_permission(request, self)
+
+
+class EnrollmentListView(APIView, ApiKeyPermissionMixIn):
+    authentication_classes = OAuth2AuthenticationAllowInactiveUser, EnrollmentCrossDomainSessionAuth
+    permission_classes = ApiKeyHeaderPermissionIsAuthenticated,
+
+    def get(self, request):
+        raise NotImplementedError
+
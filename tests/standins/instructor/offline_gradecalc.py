@@ -0,0 +1,8 @@
+"""
+Stand-in of instructor.offline_gradecalc.
+"""
+from courseware import grades
+
+
+def student_grades(student, request, course, keep_raw_scores=False, use_offline=False):  # pylint: disable=unused-argument
+    return grades.grade(student, request, course, keep_raw_scores=keep_raw_scores)
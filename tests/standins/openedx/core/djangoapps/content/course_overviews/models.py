@@ -0,0 +1,51 @@
+"""
+Stand-in of the course_overviews models: the course fields cached in SQL,
+created from the modulestore on first use.
+"""
+from django.db import models
+from model_utils.models import TimeStampedModel
+from xmodule.modulestore.django import modulestore
+from xmodule_django.models import CourseKeyField
+
+
+class CourseOverview(TimeStampedModel):
+    id = CourseKeyField(db_index=True, primary_key=True, max_length=255)  # pylint: disable=invalid-name
+    display_name = models.TextField(null=True)
+    display_org_with_default = models.TextField()
+    start = models.DateTimeField(null=True)
+    end = models.DateTimeField(null=True)
+    course_image_url = models.TextField()
+    enrollment_start = models.DateTimeField(null=True)
+    enrollment_end = models.DateTimeField(null=True)
+    invitation_only = models.BooleanField(default=False)
+
+    @classmethod
+    def _create_from_course(cls, course):
+        from courseware.courses import course_image_url
+        return cls.objects.create(
+            id=course.id,
+            display_name=course.display_name,
+            display_org_with_default=course.id.org,
+            start=course.start,
+            end=course.end,
+            course_image_url=course_image_url(course),
+            enrollment_start=course.enrollment_start,
+            enrollment_end=course.enrollment_end,
+            invitation_only=course.invitation_only,
+        )
+
+    @classmethod
+    def get_from_id(cls, course_id):
+        """
+        The overview of the course, created from the modulestore when missing.
+
+        Raises:
+            CourseOverview.DoesNotExist when the course is not in the modulestore.
+        """
+        try:
+            return cls.objects.get(id=course_id)
+        except cls.DoesNotExist:
+            course = modulestore().get_course(course_id)
+            if course is None:
+                raise cls.DoesNotExist()
+            return cls._create_from_course(course)
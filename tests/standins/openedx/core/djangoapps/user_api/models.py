@@ -0,0 +1,16 @@
+"""
+Stand-in of the user_api models: the organization preferences.
+"""
+from django.contrib.auth.models import User
+from django.db import models
+from model_utils.models import TimeStampedModel
+
+
+class UserOrgTag(TimeStampedModel):
+    user = models.ForeignKey(User, db_index=True, related_name='+')
+    key = models.CharField(max_length=255, db_index=True)
+    org = models.CharField(max_length=255, db_index=True)
+    value = models.TextField()
+
+    class Meta(object):
+        unique_together = ('user', 'org', 'key')
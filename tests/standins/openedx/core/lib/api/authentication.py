@@ -0,0 +1,21 @@
+"""
+Stand-in of openedx.core.lib.api.authentication.
+"""
+from rest_framework.authentication import BaseAuthentication, SessionAuthentication
+
+
+class SessionAuthenticationAllowInactiveUser(SessionAuthentication):
+    pass
+
+
+class OAuth2AuthenticationAllowInactiveUser(BaseAuthentication):
+    """
+    No OAuth2 provider here, the requests are authenticated by session or
+    by force_authenticate in the tests.
+    """
+
+    def authenticate(self, request):
+        return None
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
@@ -0,0 +1,24 @@
+"""
+Stand-in of openedx.core.lib.api.permissions.
+"""
+from django.conf import settings
+from rest_framework import permissions
+
+
+class ApiKeyHeaderPermission(permissions.BasePermission):
+    """
+    The request carries the EDX_API_KEY of the settings in X-Edx-Api-Key.
+    """
+
+    def has_permission(self, request, view):
+        api_key = getattr(settings, 'EDX_API_KEY', None)
+        return bool(api_key) and request.META.get('HTTP_X_EDX_API_KEY') == api_key
+
+
+class ApiKeyHeaderPermissionIsAuthenticated(ApiKeyHeaderPermission, permissions.IsAuthenticated):
+
+    def has_permission(self, request, view):
+        return (
+            ApiKeyHeaderPermission.has_permission(self, request, view) or
+            permissions.IsAuthenticated.has_permission(self, request, view)
+        )
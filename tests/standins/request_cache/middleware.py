@@ -0,0 +1,35 @@
+"""
+Stand-in of request_cache.middleware: a per-thread cache cleared at the end
+of every request.
+"""
+import threading
+
+_request_cache_threadlocal = threading.local()
+_request_cache_threadlocal.data = {}
+_request_cache_threadlocal.request = None
+
+
+class RequestCache(object):
+
+    @classmethod
+    def get_request_cache(cls, name=None):
+        if name is None:
+            return _request_cache_threadlocal
+        return _request_cache_threadlocal.data.setdefault(name, {})
+
+    @classmethod
+    def get_current_request(cls):
+        return _request_cache_threadlocal.request
+
+    @classmethod
+    def clear_request_cache(cls):
+        _request_cache_threadlocal.data = {}
+        _request_cache_threadlocal.request = None
+
+    def process_request(self, request):
+        self.clear_request_cache()
+        _request_cache_threadlocal.request = request
+
+    def process_response(self, request, response):  # pylint: disable=unused-argument
+        self.clear_request_cache()
+        return response
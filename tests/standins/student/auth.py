@@ -0,0 +1,7 @@
+"""
+Stand-in of student.auth: only the global staff are course authors.
+"""
+
+
+def has_course_author_access(user, course_key):  # pylint: disable=unused-argument
+    return user.is_staff
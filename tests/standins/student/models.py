@@ -0,0 +1,96 @@
+"""
+Stand-in of student.models: profiles and course enrollments.
+"""
+import logging
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+from xmodule_django.models import CourseKeyField
+
+log = logging.getLogger(__name__)
+
+EVENT_NAME_ENROLLMENT_ACTIVATED = 'edx.course.enrollment.activated'
+EVENT_NAME_ENROLLMENT_DEACTIVATED = 'edx.course.enrollment.deactivated'
+EVENT_NAME_ENROLLMENT_MODE_CHANGED = 'edx.course.enrollment.mode_changed'
+
+
+class UserProfile(models.Model):
+    user = models.OneToOneField(User, unique=True, db_index=True, related_name='profile')
+    name = models.CharField(blank=True, max_length=255, db_index=True)
+    year_of_birth = models.IntegerField(blank=True, null=True, db_index=True)
+    country = models.CharField(blank=True, null=True, max_length=2)
+
+    def requires_parental_consent(self, date=None, age_limit=None, default_requires_consent=True):
+        if age_limit is None:
+            return False
+        if self.year_of_birth is None:
+            return default_requires_consent
+        year = (date or timezone.now()).year
+        return year - self.year_of_birth <= age_limit
+
+
+class CourseEnrollmentManager(models.Manager):
+
+    def users_enrolled_in(self, course_id):
+        """
+        The users with an active enrollment in the course.
+        """
+        return User.objects.filter(
+            courseenrollment__course_id=course_id,
+            courseenrollment__is_active=True
+        )
+
+
+class CourseEnrollment(models.Model):
+    user = models.ForeignKey(User)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    created = models.DateTimeField(auto_now_add=True, null=True, db_index=True)
+    is_active = models.BooleanField(default=True)
+    mode = models.CharField(default='honor', max_length=100)
+
+    objects = CourseEnrollmentManager()
+
+    class Meta(object):
+        unique_together = (('user', 'course_id'),)
+        ordering = ('user', 'course_id')
+
+    def __init__(self, *args, **kwargs):
+        super(CourseEnrollment, self).__init__(*args, **kwargs)
+        # Loaded on first use by course_overview
+        self._course_overview = None
+
+    @property
+    def username(self):
+        return self.user.username
+
+    @property
+    def course_overview(self):
+        from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+        if not self._course_overview:
+            try:
+                self._course_overview = CourseOverview.get_from_id(self.course_id)
+            except (CourseOverview.DoesNotExist, IOError):
+                self._course_overview = None
+        return self._course_overview
+
+    def update_enrollment(self, mode=None, is_active=None, skip_refund=False):  # pylint: disable=unused-argument
+        changed = False
+        if mode is not None and mode != self.mode:
+            self.mode = mode
+            changed = True
+        if is_active is not None and is_active != self.is_active:
+            self.is_active = is_active
+            changed = True
+        if changed:
+            self.save()
+            self.emit_event(EVENT_NAME_ENROLLMENT_MODE_CHANGED)
+
+    def emit_event(self, event_name):
+        log.debug(u"%s: user %s, course %s, mode %s", event_name, self.user_id, self.course_id, self.mode)
+
+    @classmethod
+    def enroll(cls, user, course_key, mode='honor'):
+        enrollment, __ = cls.objects.get_or_create(user=user, course_id=course_key)
+        enrollment.update_enrollment(mode=mode, is_active=True)
+        return enrollment
@@ -0,0 +1,63 @@
+"""
+Stand-in of xmodule.graders: the score tuple and the weighted graders.
+"""
+from collections import namedtuple
+
+Score = namedtuple("Score", "earned possible graded section module_id")
+
+
+class AssignmentFormatGrader(object):
+    """
+    Grades the sections of one format ("Homework", "Exam"...), one breakdown
+    item per section labelled like "HW 01", plus the average.
+    """
+
+    def __init__(self, section_type, short_label):
+        self.type = section_type
+        self.short_label = short_label
+
+    def grade(self, grade_sheet):
+        breakdown = []
+        percents = []
+        for index, score in enumerate(grade_sheet.get(self.type, []), 1):
+            percent = score.earned / float(score.possible) if score.possible else 0.0
+            percents.append(percent)
+            breakdown.append({
+                'percent': percent,
+                'label': u'{} {:02d}'.format(self.short_label, index),
+                'detail': u'{} {} - {} - {:.0%}'.format(self.type, index, score.section, percent),
+                'category': self.type,
+            })
+        average = sum(percents) / len(percents) if percents else 0.0
+        breakdown.append({
+            'percent': average,
+            'label': u'{} Avg'.format(self.short_label),
+            'detail': u'{} Average = {:.0%}'.format(self.type, average),
+            'category': self.type,
+            'prominent': True,
+        })
+        return {'percent': average, 'section_breakdown': breakdown}
+
+
+class WeightedSubsectionsGrader(object):
+    """
+    Adds up the weighted results of (grader, category, weight) subgraders.
+    """
+
+    def __init__(self, sections):
+        self.sections = sections
+
+    def grade(self, grade_sheet):
+        percent = 0.0
+        section_breakdown = []
+        grade_breakdown = []
+        for subgrader, category, weight in self.sections:
+            result = subgrader.grade(grade_sheet)
+            percent += result['percent'] * weight
+            section_breakdown.extend(result['section_breakdown'])
+            grade_breakdown.append({
+                'percent': result['percent'] * weight,
+                'detail': u'{} = {:.1%} of a possible {:.1%}'.format(category, result['percent'] * weight, weight),
+                'category': category,
+            })
+        return {'percent': percent, 'section_breakdown': section_breakdown, 'grade_breakdown': grade_breakdown}
@@ -0,0 +1,130 @@
+"""
+Stand-in of xmodule.modulestore.django: an in-memory modulestore and the
+signals sent by Studio.
+
+Courses and libraries only exist once created with create_course() and
+create_library(), e.g. by the test fixtures.
+"""
+from __future__ import absolute_import
+
+import datetime
+from collections import OrderedDict, namedtuple
+
+from django.dispatch import Signal
+from django.utils import timezone
+from opaque_keys.edx.locator import CourseLocator, LibraryLocator
+
+from xmodule.graders import AssignmentFormatGrader, WeightedSubsectionsGrader
+
+ScopeIds = namedtuple('ScopeIds', 'block_type')
+
+# Graded sections of every course: (format, short label, weight, number of sections)
+GRADING_POLICY = (
+    ('Homework', 'HW', 0.4, 3),
+    ('Exam', 'Exam', 0.6, 1),
+)
+GRADE_CUTOFFS = {'Pass': 0.5}
+
+
+class SignalHandler(object):
+    course_published = Signal(providing_args=['course_key'])
+    course_deleted = Signal(providing_args=['course_key'])
+    library_updated = Signal(providing_args=['library_key'])
+
+
+class SectionDescriptor(object):
+    def __init__(self, location, display_name):
+        self.location = location
+        self.display_name_with_default = display_name
+
+
+class CourseDescriptor(object):
+    """
+    The course fields read by the API extension, with a grading policy of
+    GRADING_POLICY.
+    """
+
+    def __init__(self, course_key, display_name=None, start=None, end=None):
+        self.id = course_key  # pylint: disable=invalid-name
+        self.location = course_key.make_usage_key('course', course_key.run)
+        self.scope_ids = ScopeIds('course')
+        self.display_name = display_name or u'{} {}'.format(course_key.course, course_key.run)
+        self.display_name_with_default = self.display_name
+        self.start = start or timezone.now() - datetime.timedelta(days=30)
+        self.end = end
+        self.enrollment_start = None
+        self.enrollment_end = None
+        self.invitation_only = False
+        self.course_image = u'images_course_image.jpg'
+        self.grade_cutoffs = GRADE_CUTOFFS
+        self.grader = WeightedSubsectionsGrader([
+            (AssignmentFormatGrader(section_format, short_label), section_format, weight)
+            for section_format, short_label, weight, __ in GRADING_POLICY
+        ])
+        self.grading_context = {'graded_sections': OrderedDict(
+            (section_format, [
+                {'section_descriptor': SectionDescriptor(
+                    course_key.make_usage_key('sequential', u'{}{}'.format(short_label, index)),
+                    u'{} {}'.format(section_format, index),
+                )}
+                for index in range(1, count + 1)
+            ])
+            for section_format, short_label, __, count in GRADING_POLICY
+        )}
+
+
+class LibraryDescriptor(object):
+    def __init__(self, library_key, display_name=None, block_count=0):
+        self.location = library_key.make_usage_key('library', 'library')
+        self.scope_ids = ScopeIds('library')
+        self.display_name = display_name or library_key.library
+        self.children = [library_key.make_usage_key('problem', u'p{}'.format(index)) for index in range(block_count)]
+        self.edited_on = timezone.now()
+
+
+class ModuleStore(object):
+    """
+    Courses and libraries kept in memory, in creation order.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._courses = OrderedDict()
+        self._libraries = OrderedDict()
+
+    def create_course(self, org, course, run, **fields):
+        course_key = CourseLocator(org, course, run)
+        self._courses[course_key] = CourseDescriptor(course_key, **fields)
+        return self._courses[course_key]
+
+    def delete_course(self, course_key):
+        self._courses.pop(course_key, None)
+
+    def get_course(self, course_key, depth=0, **kwargs):  # pylint: disable=unused-argument
+        return self._courses.get(course_key)
+
+    def has_course(self, course_key, **kwargs):  # pylint: disable=unused-argument
+        return course_key in self._courses
+
+    def get_courses(self, **kwargs):  # pylint: disable=unused-argument
+        return list(self._courses.values())
+
+    def create_library(self, org, library, **fields):
+        library_key = LibraryLocator(org, library)
+        self._libraries[library_key] = LibraryDescriptor(library_key, **fields)
+        return self._libraries[library_key]
+
+    def get_library(self, library_key, **kwargs):  # pylint: disable=unused-argument
+        return self._libraries.get(library_key)
+
+    def get_libraries(self, **kwargs):  # pylint: disable=unused-argument
+        return list(self._libraries.values())
+
+
+_store = ModuleStore()
+
+
+def modulestore():
+    return _store
@@ -0,0 +1,28 @@
+"""
+Stand-in of xmodule_django.models: the course key field.
+"""
+from django.db import models
+from opaque_keys.edx.keys import CourseKey
+
+
+class CourseKeyField(models.CharField):
+    """
+    Stores a CourseKey (or LibraryLocator) as its string, like the
+    OpaqueKeyField of edx-platform.
+    """
+    description = "A CourseKey object, saved to the DB in the form of a string"
+
+    def from_db_value(self, value, expression, connection, context):  # pylint: disable=unused-argument
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if value is None or value == '':
+            return None
+        if isinstance(value, CourseKey):
+            return value
+        return CourseKey.from_string(value)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return ''
+        return unicode(value)
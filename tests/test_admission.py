@@ -0,0 +1,86 @@
+"""
+Admission control of the expensive views: the requests over a limit wait
+briefly for a slot, then are rejected before the view does any work.
+"""
+import hashlib
+import threading
+from functools import partial
+
+from django.core.cache import cache
+from mock import patch
+
+from open_edx_api_extension import admission
+
+from .utils import ApiTestCase, create_courses, create_users
+
+GRADES_URL = '/api/extended/users/{}/grades/'
+COURSES_WITH_EXAMS_URL = '/api/extended/courses/proctored'
+VIEW_KEY = admission.CACHE_KEY_TEMPLATE.format('UserGradesView')
+
+
+class AdmissionControlTest(ApiTestCase):
+
+    def setUp(self):
+        super(AdmissionControlTest, self).setUp()
+        self.student, = create_users(1)
+        self.url = GRADES_URL.format(self.student.username)
+        self.client_key = u'{}.{}'.format(
+            VIEW_KEY, hashlib.md5(u'user:{}'.format(self.staff.id).encode('utf-8')).hexdigest()
+        )
+        # Short waits for the tests
+        patcher = patch.object(admission, 'acquire_slot', partial(admission.acquire_slot, timeout=0.1))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('open_edx_api_extension.views.get_transcript', return_value=[])
+        self.get_transcript = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def take_slots(self, key, count):
+        for index in range(count):
+            cache.set(u'{}.{}'.format(key, index), 'other', 60)
+
+    def slots(self, key, count):
+        return cache.get_many([u'{}.{}'.format(key, index) for index in range(count)])
+
+    def test_admitted(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.get_transcript.called)
+        # The slots are given back
+        self.assertEqual(self.slots(VIEW_KEY, 8), {})
+        self.assertEqual(self.slots(self.client_key, 2), {})
+
+    def test_client_limit(self):
+        self.take_slots(self.client_key, 2)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], str(admission.RETRY_AFTER))
+        self.assertFalse(self.get_transcript.called)
+
+    def test_endpoint_limit(self):
+        self.take_slots(VIEW_KEY, 8)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(admission.RETRY_AFTER))
+        self.assertFalse(self.get_transcript.called)
+        # The client slot taken first is given back
+        self.assertEqual(self.slots(self.client_key, 2), {})
+
+    def test_waits_for_a_slot(self):
+        self.take_slots(VIEW_KEY, 8)
+        threading.Timer(0.02, cache.delete, (u'{}.3'.format(VIEW_KEY),)).start()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_limits_setting(self):
+        self.take_slots(VIEW_KEY, 8)
+        with patch.dict(admission.ADMISSION_LIMITS, {'UserGradesView': {'endpoint': None}}):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_streamed_response_keeps_its_slot(self):
+        create_courses(2)
+        view_key = admission.CACHE_KEY_TEMPLATE.format('CourseListWithExams')
+        response = self.client.get(COURSES_WITH_EXAMS_URL, {'stream': '1'})
+        self.assertEqual(len(self.slots(view_key, 16)), 1)
+        b''.join(response.streaming_content)
+        self.assertEqual(self.slots(view_key, 16), {})
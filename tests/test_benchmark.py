@@ -0,0 +1,20 @@
+"""
+The benchmark runs on the harness and keeps every endpoint within its query
+budget at two scales.
+"""
+from StringIO import StringIO
+
+from .benchmark import Benchmark
+from .utils import ThreadedApiTestCase
+
+
+class BenchmarkTest(ThreadedApiTestCase):
+
+    def test_enforced_benchmark(self):
+        out = StringIO()
+        # Above the page size of the benchmark, so that the pages are full at both scales
+        results = Benchmark(stdout=out, stderr=out).run([150, 600], repeat=2, enforce=True)
+        self.assertEqual(
+            [result['name'] for result in results[600]], [result['name'] for result in results[150]]
+        )
+        self.assertIn(u'course_grades', out.getvalue())
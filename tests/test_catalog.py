@@ -0,0 +1,111 @@
+"""
+The course and library catalog tables follow the publish, delete and exam
+signals, and are rebuilt in full by rebuild_api_extension_catalog.
+"""
+from StringIO import StringIO
+
+from django.core.management import call_command
+from mock import patch
+from opaque_keys.edx.locator import CourseLocator, LibraryLocator
+
+from edx_proctoring.models import ProctoredExam
+from xmodule.modulestore.django import SignalHandler, modulestore
+
+from open_edx_api_extension.models import CourseCatalogEntry, LibraryCatalogEntry
+
+from .utils import ApiTestCase
+
+
+class CatalogSignalsTest(ApiTestCase):
+
+    def setUp(self):
+        super(CatalogSignalsTest, self).setUp()
+        self.course = modulestore().create_course('TestX', 'Catalog', 'Run', display_name=u'Catalog course')
+        self.course_key = self.course.id
+
+    def publish(self):
+        SignalHandler.course_published.send(sender=None, course_key=self.course_key)
+        return CourseCatalogEntry.objects.get(course_id=self.course_key)
+
+    def add_exam(self, name, **fields):
+        return ProctoredExam.objects.create(
+            course_id=unicode(self.course_key), content_id=u'block-v1:{}'.format(name), exam_name=name,
+            time_limit_mins=30, **fields
+        )
+
+    def test_publish(self):
+        entry = self.publish()
+        self.assertEqual(
+            (entry.display_name, entry.org, entry.course, entry.run, entry.start),
+            (u'Catalog course', 'TestX', 'Catalog', 'Run', self.course.start)
+        )
+        self.assertTrue(entry.image_url.endswith(u'block@images_course_image.jpg'))
+        self.assertEqual((entry.exam_count, entry.has_proctored_exams), (0, False))
+
+        self.course.display_name = u'Renamed'
+        self.assertEqual(self.publish().display_name, u'Renamed')
+        self.assertEqual(CourseCatalogEntry.objects.count(), 1)
+
+    def test_exam_counts(self):
+        self.publish()
+        self.add_exam('timed')
+        self.add_exam('inactive', is_proctored=True)
+        exam = self.add_exam('proctored', is_proctored=True, is_active=True)
+        entry = CourseCatalogEntry.objects.get(course_id=self.course_key)
+        self.assertEqual(
+            (entry.exam_count, entry.proctored_exam_count, entry.active_proctored_exam_count),
+            (3, 2, 1)
+        )
+        self.assertTrue(entry.has_proctored_exams)
+
+        exam.delete()
+        entry = CourseCatalogEntry.objects.get(course_id=self.course_key)
+        self.assertEqual((entry.exam_count, entry.active_proctored_exam_count), (2, 0))
+
+    def test_exam_count_failure_does_not_block_the_exam(self):
+        self.publish()
+        with patch('open_edx_api_extension.catalog.update_course_exam_counts', side_effect=Exception('boom')):
+            self.add_exam('proctored', is_proctored=True)
+        self.assertEqual(ProctoredExam.objects.count(), 1)
+
+    def test_course_deleted(self):
+        self.publish()
+        SignalHandler.course_deleted.send(sender=None, course_key=self.course_key)
+        self.assertFalse(CourseCatalogEntry.objects.exists())
+
+    def test_publish_of_a_missing_course(self):
+        self.publish()
+        modulestore().delete_course(self.course_key)
+        SignalHandler.course_published.send(sender=None, course_key=self.course_key)
+        self.assertFalse(CourseCatalogEntry.objects.exists())
+
+    def test_library_updated(self):
+        library = modulestore().create_library('TestX', 'Lib', display_name=u'Library', block_count=3)
+        library_key = library.location.library_key
+        SignalHandler.library_updated.send(sender=None, library_key=library_key)
+        entry = LibraryCatalogEntry.objects.get(library_key=library_key)
+        self.assertEqual((entry.display_name, entry.org, entry.block_count), (u'Library', 'TestX', 3))
+
+
+class RebuildCatalogTest(ApiTestCase):
+
+    def test_rebuild(self):
+        store = modulestore()
+        courses = [store.create_course('TestX', u'C{}'.format(index), 'Run') for index in range(3)]
+        store.create_library('TestX', 'Lib', block_count=2)
+        ProctoredExam.objects.create(
+            course_id=unicode(courses[0].id), content_id='block-v1:exam', exam_name='Exam', time_limit_mins=30,
+            is_proctored=True, is_active=True,
+        )
+        # Entries of the courses and libraries which are gone
+        CourseCatalogEntry.objects.create(course_id=CourseLocator('TestX', 'Gone', 'Run'), org='TestX')
+        LibraryCatalogEntry.objects.create(library_key=LibraryLocator('TestX', 'Gone'), org='TestX')
+
+        out = StringIO()
+        call_command('rebuild_api_extension_catalog', stdout=out)
+        self.assertEqual(out.getvalue().strip(), u'Indexed 3 courses and 1 libraries.')
+        self.assertEqual(
+            sorted(CourseCatalogEntry.objects.values_list('course', 'has_proctored_exams')),
+            [(u'C0', True), (u'C1', False), (u'C2', False)]
+        )
+        self.assertEqual(list(LibraryCatalogEntry.objects.values_list('block_count', flat=True)), [2])
@@ -0,0 +1,112 @@
+"""
+Conditional GET of the read endpoints: the ETag follows the version markers
+of the served data, and matching requests get a 304 before any other work.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from edx_proctoring.models import ProctoredExam
+from student.models import CourseEnrollment
+
+from .utils import ApiTestCase, create_courses, create_libraries, create_users
+
+COURSES_URL = '/api/extended/courses/'
+COURSES_WITH_EXAMS_URL = '/api/extended/courses/proctored'
+LIBRARIES_URL = '/api/extended/libraries/'
+USER_EXAMS_URL = '/api/extended/user_proctored_exams/{}/'
+
+
+class ConditionalGetTest(ApiTestCase):
+
+    def setUp(self):
+        super(ConditionalGetTest, self).setUp()
+        self.course_keys = create_courses(2)
+
+    def get(self, url, data=None, **headers):
+        # The exams version lives in the cache, which must be kept between the requests
+        return self.client.get(url, data, **headers)
+
+    def assert_not_modified(self, url, data=None, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(url, data, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        return response, len(queries)
+
+    def test_headers(self):
+        response = self.get(COURSES_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Cache-Control'], 'private, max-age=60')
+        self.assertEqual(
+            [value.strip() for value in response['Vary'].split(',')],
+            ['Accept', 'Accept-Encoding', 'Authorization', 'X-Edx-Api-Key']
+        )
+
+    def test_if_none_match(self):
+        etag = self.get(COURSES_URL)['ETag']
+        not_modified, __ = self.assert_not_modified(COURSES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assert_not_modified(COURSES_URL, HTTP_IF_NONE_MATCH=u'"other", W/{}'.format(etag))
+        self.assert_not_modified(COURSES_URL, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(self.get(COURSES_URL, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_if_modified_since(self):
+        last_modified = self.get(COURSES_URL)['Last-Modified']
+        self.assert_not_modified(COURSES_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(
+            self.get(COURSES_URL, HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 2015 00:00:00 GMT').status_code, 200
+        )
+        # If-None-Match takes precedence
+        self.assertEqual(
+            self.get(COURSES_URL, HTTP_IF_MODIFIED_SINCE=last_modified, HTTP_IF_NONE_MATCH='"other"').status_code, 200
+        )
+
+    def test_etag_depends_on_the_query(self):
+        self.assertNotEqual(self.get(COURSES_URL)['ETag'], self.get(COURSES_URL, {'page_size': 1})['ETag'])
+
+    def test_catalog_change(self):
+        etag = self.get(COURSES_URL)['ETag']
+        create_courses(1, prefix='New')
+        self.assertEqual(self.get(COURSES_URL, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_exam_change(self):
+        etag = self.get(COURSES_WITH_EXAMS_URL)['ETag']
+        self.assert_not_modified(COURSES_WITH_EXAMS_URL, HTTP_IF_NONE_MATCH=etag)
+        ProctoredExam.objects.create(
+            course_id=unicode(self.course_keys[0]), content_id='block-v1:new', exam_name='New exam',
+            time_limit_mins=30,
+        )
+        response = self.get(COURSES_WITH_EXAMS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_libraries(self):
+        create_libraries(2)
+        etag = self.get(LIBRARIES_URL)['ETag']
+        self.assert_not_modified(LIBRARIES_URL, HTTP_IF_NONE_MATCH=etag)
+        create_libraries(1, org='Other')
+        self.assertEqual(self.get(LIBRARIES_URL, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_user_enrollment_change(self):
+        user, = create_users(1)
+        CourseEnrollment.enroll(user, self.course_keys[0])
+        url = USER_EXAMS_URL.format(user.username)
+        etag = self.get(url)['ETag']
+        __, queries = self.assert_not_modified(url, HTTP_IF_NONE_MATCH=etag)
+        # Only the version markers are read
+        self.assertLessEqual(queries, 2)
+
+        CourseEnrollment.enroll(user, self.course_keys[1])
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_post_is_not_conditional(self):
+        etag = self.get(COURSES_URL)['ETag']
+        response = self.client.post(
+            COURSES_URL, {'course_ids': [unicode(self.course_keys[0])]}, format='json', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,197 @@
+"""
+Query counts of the course and library lists: a page costs the same
+whatever the size of the catalog is.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+from mock import patch
+
+from edx_proctoring.models import ProctoredExam
+from xmodule.modulestore.django import modulestore
+
+from open_edx_api_extension.models import CourseCatalogEntry, LibraryCatalogEntry
+
+from .utils import ApiTestCase, create_courses, create_libraries
+
+COURSES_URL = '/api/extended/courses/'
+COURSES_WITH_EXAMS_URL = '/api/extended/courses/proctored'
+LIBRARIES_URL = '/api/extended/libraries/'
+SCALES = (30, 300)
+PAGE_SIZE = 20
+
+
+class CourseListTest(ApiTestCase):
+
+    def setUp(self):
+        super(CourseListTest, self).setUp()
+        self.catalog_size = 0
+
+    def grow_catalog(self, scale):
+        create_courses(scale - self.catalog_size, prefix=u'S{}_'.format(scale))
+        self.catalog_size = scale
+
+    def test_page_queries_do_not_grow_with_catalog(self):
+        counts = {}
+        for scale in SCALES:
+            self.grow_catalog(scale)
+            response, counts[scale] = self.count_queries('get', COURSES_URL, {'page_size': PAGE_SIZE})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), PAGE_SIZE)
+            self.assertIsNotNone(response.data['next'])
+        self.assert_same_queries(counts)
+
+    def test_next_page_costs_the_same(self):
+        self.grow_catalog(SCALES[-1])
+        first, first_queries = self.count_queries('get', COURSES_URL, {'page_size': PAGE_SIZE})
+        second, second_queries = self.count_queries('get', first.data['next'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first_queries, second_queries)
+        ids = [course['id'] for course in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), 2 * PAGE_SIZE)
+
+    def test_courses_by_id_queries_do_not_grow_with_ids(self):
+        counts = {}
+        for scale in SCALES:
+            course_keys = create_courses(scale, prefix=u'ID{}_'.format(scale))
+            course_ids = [unicode(course_key) for course_key in course_keys[:scale // 2]]
+            response, counts[scale] = self.count_queries(
+                'post', COURSES_URL, {'course_ids': course_ids + ['course-v1:TestX+Unknown+Run', 'invalid']}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), scale // 2)
+            self.assertEqual([error['error'] for error in response.data['errors']], ['invalid_course_id', 'not_found'])
+        self.assert_same_queries(counts)
+
+    def test_courses_with_exams_queries_do_not_grow_with_catalog(self):
+        counts = {}
+        for scale in SCALES:
+            self.grow_catalog(scale)
+            response, counts[scale] = self.count_queries(
+                'get', COURSES_WITH_EXAMS_URL, {'page_size': PAGE_SIZE, 'has_proctored': 'true'}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), PAGE_SIZE)
+            for course in response.data['results']:
+                self.assertEqual(len(course['proctored_exams']), 1)
+                self.assertEqual(len(course['regular_exams']), 1)
+        self.assert_same_queries(counts)
+
+    def test_streamed_catalog_is_read_in_pages(self):
+        self.grow_catalog(SCALES[0])
+        response, queries = self.count_queries('get', COURSES_URL, {'stream': '1'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(response.streamed.splitlines()), SCALES[0])
+        self.assertLessEqual(queries, 6)
+
+    def test_not_modified(self):
+        self.grow_catalog(SCALES[0])
+        response, __ = self.count_queries('get', COURSES_URL, {'page_size': PAGE_SIZE})
+        not_modified, queries = self.count_queries(
+            'get', COURSES_URL, {'page_size': PAGE_SIZE}, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(queries, 1)
+
+
+class LibrariesListTest(ApiTestCase):
+
+    def test_page_queries_do_not_grow_with_libraries(self):
+        counts = {}
+        created = 0
+        for scale in SCALES:
+            create_libraries(scale - created, org=u'Org{}'.format(scale))
+            created = scale
+            response, counts[scale] = self.count_queries('get', LIBRARIES_URL, {'page_size': PAGE_SIZE})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), PAGE_SIZE)
+        self.assert_same_queries(counts)
+
+    def test_org_and_search(self):
+        create_libraries(3, org='TestX')
+        create_libraries(2, org='OtherX')
+        LibraryCatalogEntry.objects.filter(org='TestX', library_key__contains='L000001').update(
+            display_name=u'Quantum Physics'
+        )
+        response, __ = self.count_queries('get', LIBRARIES_URL, {'org': 'OtherX'})
+        self.assertEqual([library['org'] for library in response.data['results']], ['OtherX', 'OtherX'])
+
+        response, __ = self.count_queries('get', LIBRARIES_URL, {'search': 'physics'})
+        self.assertEqual([library['display_name'] for library in response.data['results']], [u'Quantum Physics'])
+        response, __ = self.count_queries('get', LIBRARIES_URL, {'org': 'OtherX', 'search': 'physics'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_walk_pages(self):
+        create_libraries(5)
+        keys = []
+        response, __ = self.count_queries('get', LIBRARIES_URL, {'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            keys.extend(library['library_key'] for library in response.data['results'])
+            if not response.data['next']:
+                break
+            response, __ = self.count_queries('get', response.data['next'])
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), 5)
+
+    def test_invalid_cursor(self):
+        response, __ = self.count_queries('get', LIBRARIES_URL, {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_no_modulestore_access(self):
+        create_libraries(2)
+        with patch.object(modulestore(), 'get_libraries', side_effect=AssertionError('modulestore access')):
+            response, __ = self.count_queries('get', LIBRARIES_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class CourseListWithExamsFiltersTest(ApiTestCase):
+
+    def setUp(self):
+        super(CourseListWithExamsFiltersTest, self).setUp()
+        self.proctored, = create_courses(1, prefix='Proctored')
+        self.regular, = create_courses(1, prefix='Regular', proctored_exams=0)
+        self.inactive, = create_courses(1, prefix='Inactive')
+        ProctoredExam.objects.filter(course_id=unicode(self.inactive), is_proctored=True).update(is_active=False)
+        CourseCatalogEntry.objects.filter(course_id=self.inactive).update(active_proctored_exam_count=0)
+        self.expired, = create_courses(1, prefix='Expired')
+        ProctoredExam.objects.filter(course_id=unicode(self.expired), is_proctored=True).update(
+            due_date=timezone.now() - timedelta(days=1)
+        )
+
+    def get_courses(self, **params):
+        response, __ = self.count_queries('get', COURSES_WITH_EXAMS_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return {course['id']: course for course in response.data['results']}
+
+    def assert_courses(self, courses, course_keys):
+        self.assertEqual(sorted(courses), sorted(unicode(course_key) for course_key in course_keys))
+
+    def test_has_proctored(self):
+        courses = self.get_courses(has_proctored='true')
+        self.assert_courses(courses, [self.proctored, self.inactive, self.expired])
+        self.assert_courses(self.get_courses(has_proctored='false'), [self.regular])
+
+    def test_active_only(self):
+        courses = self.get_courses(has_proctored='true', active_only='true')
+        self.assert_courses(courses, [self.proctored, self.expired])
+        self.assertEqual(self.get_courses(active_only='true')[unicode(self.inactive)]['proctored_exams'], [])
+
+    def test_include_expired(self):
+        courses = self.get_courses(has_proctored='true', include_expired='false')
+        self.assert_courses(courses, [self.proctored, self.inactive])
+        for course in courses.values():
+            self.assertEqual(len(course['proctored_exams']), 1)
+        self.assert_courses(
+            self.get_courses(has_proctored='false', include_expired='false'), [self.regular, self.expired]
+        )
+        self.assert_courses(
+            self.get_courses(has_proctored='true', include_expired='false', active_only='true'), [self.proctored]
+        )
+
+    def test_exam_fields(self):
+        course = self.get_courses(exam_fields='id,exam_name,time_limit_mins')[unicode(self.proctored)]
+        for exam in course['proctored_exams'] + course['regular_exams']:
+            self.assertEqual(sorted(exam), ['exam_name', 'id', 'time_limit_mins'])
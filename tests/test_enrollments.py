@@ -0,0 +1,134 @@
+"""
+Query counts of the enrollment list and change feed: a page costs the same
+whatever the number of enrollments is.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from course_modes.models import CourseMode
+from student.models import CourseEnrollment
+
+from .utils import ApiTestCase, create_courses, create_users, enroll
+
+ENROLLMENTS_URL = '/api/extended/enrollment'
+CHANGES_URL = '/api/extended/enrollment/changes'
+SCALES = (30, 300)
+PAGE_SIZE = 20
+
+
+class SSOEnrollmentListViewTest(ApiTestCase):
+
+    def setUp(self):
+        super(SSOEnrollmentListViewTest, self).setUp()
+        self.course_keys = create_courses(3)
+
+    def test_page_queries_do_not_grow_with_enrollments(self):
+        counts = {}
+        created = 0
+        for scale in SCALES:
+            enroll(create_users(scale - created, prefix=u'scale{}_'.format(scale)), self.course_keys[:1])
+            created = scale
+            response, counts[scale] = self.count_queries('get', ENROLLMENTS_URL, {'page_size': PAGE_SIZE})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), PAGE_SIZE)
+        self.assert_same_queries(counts)
+
+    def test_page_queries_do_not_grow_with_page_size(self):
+        enroll(create_users(20), self.course_keys)
+        counts = {}
+        for page_size in (5, 50):
+            response, counts[page_size] = self.count_queries('get', ENROLLMENTS_URL, {'page_size': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+        self.assert_same_queries(counts)
+
+    def test_course_modes(self):
+        users = create_users(1)
+        enroll(users, self.course_keys)
+        CourseMode.objects.create(
+            course_id=self.course_keys[0], mode_slug=CourseMode.HONOR, mode_display_name='Honor',
+            expiration_datetime=timezone.now() - timedelta(days=1),
+        )
+        CourseMode.objects.filter(course_id=self.course_keys[1]).delete()
+        response, __ = self.count_queries('get', ENROLLMENTS_URL)
+        modes = {
+            details['course_id']: [mode['slug'] for mode in details['course_modes']]
+            for details in (enrollment['course_details'] for enrollment in response.data['results'])
+        }
+        self.assertEqual(modes, {
+            unicode(self.course_keys[0]): ['verified'],
+            unicode(self.course_keys[1]): ['honor'],
+            unicode(self.course_keys[2]): ['verified'],
+        })
+
+    def test_enrollments_without_creation_time(self):
+        users = create_users(5)
+        enroll(users, self.course_keys[:1])
+        CourseEnrollment.objects.filter(user__in=users[1:3]).update(created=None)
+        seen = []
+        response, __ = self.count_queries('get', ENROLLMENTS_URL, {'page_size': 2})
+        while response.data['next']:
+            seen.extend(response.data['results'])
+            response, __ = self.count_queries('get', response.data['next'])
+        seen.extend(response.data['results'])
+        self.assertEqual([enrollment['user'] for enrollment in seen], [user.username for user in users])
+
+    def test_walk_pages(self):
+        users = create_users(SCALES[0])
+        enroll(users, self.course_keys)
+        counts = {}
+        seen = []
+        response, counts[0] = self.count_queries('get', ENROLLMENTS_URL, {'page_size': PAGE_SIZE})
+        while response.data['next']:
+            seen.extend(response.data['results'])
+            response, counts[len(seen)] = self.count_queries('get', response.data['next'])
+        seen.extend(response.data['results'])
+
+        self.assertEqual(len(seen), SCALES[0] * len(self.course_keys))
+        # The last page is not full
+        self.assert_same_queries({page: count for page, count in counts.items() if page < len(seen) - PAGE_SIZE})
+        self.assertEqual(
+            seen[0]['course_details']['course_modes'][0]['slug'], 'verified'
+        )
+
+    def test_single_user(self):
+        users = create_users(5)
+        enroll(users, self.course_keys)
+        self.client.force_authenticate(user=users[0])
+        response, __ = self.count_queries('get', ENROLLMENTS_URL)
+        self.assertEqual(
+            sorted(enrollment['course_details']['course_id'] for enrollment in response.data['results']),
+            sorted(unicode(course_key) for course_key in self.course_keys)
+        )
+        self.assertEqual(set(enrollment['user'] for enrollment in response.data['results']), {users[0].username})
+
+
+class EnrollmentChangeFeedTest(ApiTestCase):
+
+    def test_page_queries_do_not_grow_with_changes(self):
+        course_key, = create_courses(1)
+        counts = {}
+        created = 0
+        for scale in SCALES:
+            for user in create_users(scale - created, prefix=u'scale{}_'.format(scale)):
+                # Saved one by one for the post_save signal
+                CourseEnrollment.enroll(user, course_key)
+            created = scale
+            response, counts[scale] = self.count_queries('get', CHANGES_URL, {'page_size': PAGE_SIZE})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), PAGE_SIZE)
+        self.assert_same_queries(counts)
+
+    def test_changes_in_commit_order(self):
+        course_key, = create_courses(1)
+        users = create_users(3)
+        for user in users:
+            CourseEnrollment.enroll(user, course_key)
+        response, __ = self.count_queries('get', CHANGES_URL)
+        self.assertEqual([change['user'] for change in response.data['results']], [user.username for user in users])
+
+        CourseEnrollment.objects.get(user=users[0]).update_enrollment(mode='verified')
+        response, __ = self.count_queries('get', CHANGES_URL, {'cursor': response.data['cursor']})
+        self.assertEqual(
+            [(change['user'], change['mode']) for change in response.data['results']], [(users[0].username, 'verified')]
+        )
@@ -0,0 +1,83 @@
+"""
+The exam cache: exams are served from the cache until an exam of the course
+changes, and exams loaded while a change may not be committed yet are only
+kept for a short time.
+"""
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+
+from edx_proctoring.models import ProctoredExam
+
+from open_edx_api_extension import exam_cache
+from open_edx_api_extension.exam_cache import get_exams_for_courses, get_exams_version
+
+from .utils import ApiTestCase, create_courses
+
+
+class ExamCacheTest(ApiTestCase):
+
+    def setUp(self):
+        super(ExamCacheTest, self).setUp()
+        self.course_keys = create_courses(2)
+        self.course_ids = [unicode(course_key) for course_key in self.course_keys]
+
+    def get_exams(self):
+        with CaptureQueriesContext(connection) as queries:
+            exams = get_exams_for_courses(self.course_ids)
+        return exams, len(queries)
+
+    def exam_names(self, exams, course_id):
+        return sorted(exam['exam_name'] for exam in exams[course_id])
+
+    def add_exam(self):
+        return ProctoredExam.objects.create(
+            course_id=self.course_ids[0], content_id='block-v1:new', exam_name='New exam', time_limit_mins=30,
+        )
+
+    def test_cached_until_changed(self):
+        exams, queries = self.get_exams()
+        self.assertEqual(queries, 1)
+        self.assertEqual(self.exam_names(exams, self.course_ids[0]), ['Exam 0', 'Exam 1'])
+        self.assertEqual(self.get_exams()[1], 0)
+        # Other workers only have the shared cache
+        exam_cache._local_cache.clear()  # pylint: disable=protected-access
+        self.assertEqual(self.get_exams()[1], 0)
+
+        exam = self.add_exam()
+        exams, queries = self.get_exams()
+        self.assertEqual(queries, 1)
+        self.assertEqual(self.exam_names(exams, self.course_ids[0]), ['Exam 0', 'Exam 1', 'New exam'])
+
+        exam.delete()
+        exams, queries = self.get_exams()
+        self.assertEqual(queries, 1)
+        self.assertEqual(self.exam_names(exams, self.course_ids[0]), ['Exam 0', 'Exam 1'])
+
+    def test_short_lived_during_change(self):
+        self.add_exam()
+        self.get_exams()
+        later = time.time() + exam_cache.CHANGE_CACHE_TIMEOUT + 1
+        exam_cache.stats.reset()
+        with patch('time.time', return_value=later):
+            self.assertEqual(self.get_exams()[1], 1)
+        # Only the changed course is reloaded
+        self.assertEqual(exam_cache.stats.misses, 1)
+        after_grace = time.time() + exam_cache.CHANGE_GRACE + 1
+        with patch('time.time', return_value=after_grace):
+            exam_cache._local_cache.clear()  # pylint: disable=protected-access
+            self.get_exams()
+            with patch('time.time', return_value=after_grace + exam_cache.CHANGE_CACHE_TIMEOUT + 1):
+                self.assertEqual(self.get_exams()[1], 0)
+
+    def test_version_changes_after_grace(self):
+        before = get_exams_version()
+        self.add_exam()
+        changing = get_exams_version()
+        self.assertNotEqual(changing, before)
+        self.assertTrue(unicode(changing).endswith('-changing'))
+        with patch('time.time', return_value=time.time() + exam_cache.CHANGE_GRACE + 1):
+            committed = get_exams_version()
+        self.assertNotIn(committed, (before, changing))
@@ -0,0 +1,113 @@
+"""
+The grade snapshots: served until a score of the learner changes or the
+course is published, and never stored when a score changed while grading.
+"""
+from django.test.client import RequestFactory
+from mock import patch
+
+from courseware.models import StudentModule
+from instructor.offline_gradecalc import student_grades
+from xmodule.modulestore.django import SignalHandler, modulestore
+
+from open_edx_api_extension.grade_snapshots import get_grade_summary, invalidate_user_grades
+from open_edx_api_extension.models import GradeSnapshot
+
+from .utils import ApiTestCase, create_users, enroll
+
+RESULT_URL = '/api/extended/courses/{}/{}/'
+
+
+class GradeSnapshotTest(ApiTestCase):
+
+    def setUp(self):
+        super(GradeSnapshotTest, self).setUp()
+        self.course = modulestore().create_course('TestX', 'Snapshots', 'Run')
+        self.student, = create_users(1)
+        enroll([self.student], [self.course.id])
+        self.module = StudentModule.objects.create(
+            student=self.student, course_id=self.course.id, max_grade=1, grade=0,
+            module_state_key=unicode(self.course.id.make_usage_key('sequential', 'Exam1')),
+        )
+        patcher = patch(
+            'open_edx_api_extension.grade_snapshots.student_grades', side_effect=student_grades
+        )
+        self.student_grades = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_percent(self, **kwargs):
+        request = RequestFactory().get('/')
+        summary, __ = get_grade_summary(self.student, self.course.id, request, course=self.course, **kwargs)
+        return summary['percent']
+
+    def set_grade(self, grade):
+        module = StudentModule.objects.get(id=self.module.id)
+        module.grade = grade
+        module.save()
+
+    def test_served_from_the_snapshot(self):
+        self.assertEqual(self.get_percent(), 0)
+        self.assertEqual(self.get_percent(), 0)
+        self.assertEqual(self.student_grades.call_count, 1)
+        self.assertEqual(GradeSnapshot.objects.count(), 1)
+        self.get_percent(fresh=True)
+        self.assertEqual(self.student_grades.call_count, 2)
+
+    def test_score_change(self):
+        self.get_percent()
+        self.set_grade(1)
+        self.assertFalse(GradeSnapshot.objects.exists())
+        self.assertEqual(self.get_percent(), 0.6)
+
+    def test_state_change_keeps_the_snapshot(self):
+        self.get_percent()
+        module = StudentModule.objects.get(id=self.module.id)
+        module.state = '{"attempts": 1}'
+        module.save()
+        self.assertTrue(GradeSnapshot.objects.exists())
+
+    def test_module_delete(self):
+        self.set_grade(1)
+        self.assertEqual(self.get_percent(), 0.6)
+        StudentModule.objects.filter(id=self.module.id).delete()
+        self.assertFalse(GradeSnapshot.objects.exists())
+        self.assertEqual(self.get_percent(), 0)
+
+    def test_course_publish(self):
+        self.get_percent()
+        SignalHandler.course_published.send(sender=None, course_key=self.course.id)
+        self.assertFalse(GradeSnapshot.objects.exists())
+
+    def test_score_change_while_grading(self):
+        def grade_then_score(*args, **kwargs):
+            summary = student_grades(*args, **kwargs)
+            # The score changes before the summary is stored
+            self.set_grade(1)
+            return summary
+
+        self.student_grades.side_effect = grade_then_score
+        self.assertEqual(self.get_percent(), 0)
+        self.assertFalse(GradeSnapshot.objects.exists())
+
+        self.student_grades.side_effect = student_grades
+        self.assertEqual(self.get_percent(), 0.6)
+        self.assertTrue(GradeSnapshot.objects.exists())
+
+    def test_invalidated_while_storing(self):
+        create = GradeSnapshot.objects.update_or_create
+
+        def create_then_invalidate(*args, **kwargs):
+            result = create(*args, **kwargs)
+            invalidate_user_grades(self.student.id, self.course.id)
+            return result
+
+        with patch.object(GradeSnapshot.objects, 'update_or_create', side_effect=create_then_invalidate):
+            self.get_percent()
+        self.assertFalse(GradeSnapshot.objects.exists())
+
+    def test_course_user_result(self):
+        response = self.client.get(RESULT_URL.format(self.course.id, self.student.username))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['grade_summary']['percent'], 0)
+        self.assertEqual(
+            response.data[0]['computed_at'], GradeSnapshot.objects.get(user=self.student).computed_at
+        )
@@ -0,0 +1,118 @@
+"""
+The course grades export: the learners are graded on the thread pool and
+written out in user id order, as NDJSON or as CSV.
+"""
+import csv
+import json
+import threading
+
+from django.contrib.auth.models import User
+from mock import patch
+from request_cache.middleware import RequestCache
+
+from courseware.grades import iterate_grades_for
+from courseware.models import StudentModule
+from student.models import UserProfile
+from xmodule.modulestore.django import modulestore
+
+from open_edx_api_extension.gradebook import iter_course_grades
+from open_edx_api_extension.pools import get_thread_pool, pool_task
+
+from .utils import ThreadedApiTestCase, create_users, enroll
+
+EXPORT_URL = '/api/extended/courses/{}/grades/export/'
+CSV_HEADER = [
+    'username', 'id', 'email', 'realname', 'grade', 'percent',
+    'HW 01', 'HW 02', 'HW 03', 'HW Avg', 'Exam 01', 'Exam Avg', 'error',
+]
+
+
+class CourseGradesExportTest(ThreadedApiTestCase):
+
+    def setUp(self):
+        super(CourseGradesExportTest, self).setUp()
+        self.course = modulestore().create_course('TestX', 'Grades', 'Run')
+        self.users = create_users(4)
+        # Not in the course
+        create_users(1, prefix='other')
+        enroll(self.users, [self.course.id])
+        StudentModule.objects.create(
+            student=self.users[0], course_id=self.course.id, max_grade=1, grade=1,
+            module_state_key=unicode(self.course.id.make_usage_key('sequential', 'Exam1')),
+        )
+
+    def get_export(self, **params):
+        response = self.client.get(EXPORT_URL.format(self.course.id), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_ndjson(self):
+        records = [json.loads(line) for line in self.get_export().splitlines()]
+        self.assertEqual([record['username'] for record in records], [user.username for user in self.users])
+        self.assertEqual(records[0]['realname'], u'Learner0')
+        summary = records[0]['grade_summary']
+        self.assertEqual((summary['grade'], summary['percent']), ('Pass', 0.6))
+        self.assertEqual(records[1]['grade_summary']['grade'], None)
+        self.assertEqual(records[0]['error'], None)
+
+    def test_usernames(self):
+        usernames = [self.users[2].username, self.users[1].username]
+        records = [json.loads(line) for line in self.get_export(usernames=','.join(usernames)).splitlines()]
+        self.assertEqual([record['username'] for record in records], sorted(usernames))
+
+    def test_csv(self):
+        rows = list(csv.reader(self.get_export(output='csv').splitlines()))
+        self.assertEqual(rows[0], CSV_HEADER)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(
+            rows[1][:6],
+            [u'learner0', unicode(self.users[0].id), u'learner0@example.com', u'Learner0', u'Pass', u'0.6']
+        )
+        self.assertEqual(rows[1][CSV_HEADER.index('Exam 01')], u'1.0')
+        self.assertEqual(rows[2][CSV_HEADER.index('HW Avg')], u'0.0')
+
+    def test_users_without_profile(self):
+        student = User.objects.create(username='noprofile', email='noprofile@example.com')
+        enroll([student], [self.course.id])
+        records = [json.loads(line) for line in self.get_export(usernames='noprofile').splitlines()]
+        self.assertEqual((records[0]['username'], records[0]['realname']), ('noprofile', None))
+        self.assertNotEqual(records[0]['grade_summary'], None)
+
+    def test_graded_on_the_pool_in_chunks(self):
+        threads = set()
+        chunks = []
+
+        def grades_for(course, students):
+            threads.add(threading.current_thread())
+            students = list(students)
+            chunks.append([student.id for student in students])
+            return iterate_grades_for(course, students)
+
+        with patch('open_edx_api_extension.gradebook.iterate_grades_for', side_effect=grades_for):
+            records = list(iter_course_grades(self.course, chunk_size=3, workers=2))
+        self.assertEqual([record['id'] for record in records], [user.id for user in self.users])
+        self.assertEqual(sorted(chunks), [[user.id for user in self.users[:3]], [self.users[3].id]])
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_user_named_grades(self):
+        student = User.objects.create(username='grades', email='grades@example.com')
+        UserProfile.objects.create(user=student, name='Grades')
+        enroll([student], [self.course.id])
+        response = self.client.get(u'/api/extended/courses/{}/grades/'.format(self.course.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([record['username'] for record in response.data], ['grades'])
+
+
+class PoolTaskTest(ThreadedApiTestCase):
+
+    def test_request_cache_cleared_between_tasks(self):
+        @pool_task
+        def use_request_cache(value):
+            cached = RequestCache.get_request_cache('test')
+            seen = dict(cached)
+            cached['value'] = value
+            return seen
+
+        pool = get_thread_pool('test', 1)
+        self.assertEqual(pool.apply(use_request_cache, (1,)), {})
+        self.assertEqual(pool.apply(use_request_cache, (2,)), {})
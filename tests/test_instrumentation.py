@@ -0,0 +1,64 @@
+"""
+The request metrics of the instrumented views, including the work done
+while a streamed response is sent.
+"""
+from mock import Mock, patch
+
+from xmodule.modulestore.django import modulestore
+
+from open_edx_api_extension import instrumentation
+from open_edx_api_extension.views import CourseList
+
+from .utils import ApiTestCase, create_courses, create_users, enroll
+
+COURSES_URL = '/api/extended/courses/'
+RESULT_URL = '/api/extended/courses/{}/{}/'
+
+
+class InstrumentationTest(ApiTestCase):
+
+    def setUp(self):
+        super(InstrumentationTest, self).setUp()
+        self.exporter = Mock()
+        patcher = patch.object(instrumentation, '_get_exporter', return_value=self.exporter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def exported(self):
+        (view, metrics), __ = self.exporter.call_args
+        self.assertEqual(view, metrics['view'])
+        return metrics
+
+    def test_metrics(self):
+        create_courses(3)
+        response, queries = self.count_queries('get', COURSES_URL)
+        metrics = self.exported()
+        self.assertEqual((metrics['view'], metrics['status']), ('CourseList', 200))
+        self.assertEqual(metrics['db_queries'], queries)
+        self.assertEqual(metrics['payload_bytes'], len(response.content))
+        self.assertIn(u'db;dur={};desc="{} queries"'.format(metrics['db_ms'], queries), response['Server-Timing'])
+
+    def test_modulestore_calls(self):
+        course = modulestore().create_course('TestX', 'Metrics', 'Run')
+        student, = create_users(1)
+        enroll([student], [course.id])
+        response, __ = self.count_queries('get', RESULT_URL.format(course.id, student.username))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.exported()['modulestore_calls'], 1)
+        self.assertIn('modulestore;desc="1 calls"', response['Server-Timing'])
+
+    def test_streamed_response(self):
+        create_courses(3)
+        response, queries = self.count_queries('get', COURSES_URL, {'stream': '1'})
+        metrics = self.exported()
+        # The pages are read while the body is sent
+        self.assertEqual(metrics['db_queries'], queries)
+        self.assertEqual(metrics['payload_bytes'], len(response.streamed))
+        self.assertEqual(self.exporter.call_count, 1)
+
+    def test_streamed_response_over_budget(self):
+        create_courses(3)
+        response = self.client.get(COURSES_URL, {'stream': '1'})
+        with patch.object(CourseList, 'query_budget', 0):
+            with self.assertRaises(instrumentation.QueryBudgetExceeded):
+                b''.join(response.streaming_content)
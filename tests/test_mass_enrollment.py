@@ -0,0 +1,244 @@
+"""
+Query counts of the mass enrollment endpoints: they must not grow with the
+number of users in the batch.
+"""
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext, override_settings
+from mock import patch
+
+from course_modes.models import CourseMode
+from embargo.models import CountryAccessRule, RestrictedCourse
+from openedx.core.djangoapps.user_api.models import UserOrgTag
+from student.models import CourseEnrollment
+
+from open_edx_api_extension import mass_enrollment
+from open_edx_api_extension.mass_enrollment import process_job_chunk, run_job
+from open_edx_api_extension.models import EnrollmentChange, MassEnrollmentJob
+
+from .utils import ApiTestCase, create_courses, create_users, enroll
+
+MASS_ENROLLMENT_URL = '/api/extended/paid_mass_enrollment'
+MATRIX_URL = '/api/extended/paid_mass_enrollment/matrix'
+SCALES = (5, 50)
+
+
+class PaidMassEnrollmentTest(ApiTestCase):
+
+    def setUp(self):
+        super(PaidMassEnrollmentTest, self).setUp()
+        self.course_key, = create_courses(1)
+
+    def enroll_batch(self, size, prefix, **data):
+        users = create_users(size, prefix=prefix)
+        enroll(users, [self.course_key])
+        data.update({
+            'users': [user.username for user in users],
+            'course_details': {'course_id': unicode(self.course_key)},
+        })
+        response, queries = self.count_queries('post', MASS_ENROLLMENT_URL, data)
+        return users, response, queries
+
+    def test_queries_do_not_grow_with_users(self):
+        counts = {}
+        for size in SCALES:
+            users, response, counts[size] = self.enroll_batch(size, u'batch{}_'.format(size), email_opt_in=True)
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertEqual(set(response.data['results'].values()), {'upgraded'})
+            self.assertEqual(
+                CourseEnrollment.objects.filter(user__in=users, mode=CourseMode.VERIFIED).count(), size
+            )
+            self.assertEqual(UserOrgTag.objects.filter(user__in=users, value='True').count(), size)
+            self.assertEqual(EnrollmentChange.objects.filter(user_id__in=[user.id for user in users]).count(), size)
+        self.assert_same_queries(counts)
+
+    def test_mode_change_signals(self):
+        received = []
+
+        def receiver(sender, instance, **kwargs):  # pylint: disable=unused-argument
+            received.append((instance.user_id, instance.mode, kwargs['update_fields']))
+
+        post_save.connect(receiver, sender=CourseEnrollment)
+        self.addCleanup(post_save.disconnect, receiver, sender=CourseEnrollment)
+        users, response, __ = self.enroll_batch(3, 'learner')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            sorted(received), [(user.id, CourseMode.VERIFIED, frozenset(['mode'])) for user in users]
+        )
+        # One change feed row per enrollment, the receiver of the feed skips the bulk updates
+        self.assertEqual(
+            list(EnrollmentChange.objects.order_by('user_id').values_list('user_id', 'mode')),
+            [(user.id, CourseMode.VERIFIED) for user in users]
+        )
+
+    def test_users_without_profile(self):
+        users = [User.objects.create(username=u'noprofile{}'.format(index)) for index in range(2)]
+        enroll(users, [self.course_key])
+        response, __ = self.count_queries('post', MASS_ENROLLMENT_URL, {
+            'users': [user.username for user in users],
+            'course_details': {'course_id': unicode(self.course_key)},
+            'email_opt_in': True,
+        })
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            set(UserOrgTag.objects.filter(user__in=users).values_list('user__username', 'value')),
+            {(user.username, 'True') for user in users}
+        )
+
+    def test_outcomes(self):
+        users = create_users(3)
+        enroll(users[:1], [self.course_key])
+        enroll(users[1:2], [self.course_key], mode=CourseMode.VERIFIED)
+        response, __ = self.count_queries('post', MASS_ENROLLMENT_URL, {
+            'users': [user.username for user in users],
+            'course_details': {'course_id': unicode(self.course_key)},
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['results'], {
+            'learner0': 'upgradeable',
+            'learner1': 'already_paid',
+            'learner2': 'not_enrolled',
+        })
+
+    def test_unknown_mode(self):
+        __, response, __ = self.enroll_batch(2, 'learner', mode=CourseMode.PROFESSIONAL)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['course_details']['course_modes'], [CourseMode.VERIFIED])
+
+    @override_settings(FEATURES={'EMBARGO': True})
+    def test_embargo_queries_do_not_grow_with_users(self):
+        restricted = RestrictedCourse.objects.create(course_key=self.course_key)
+        CountryAccessRule.objects.create(restricted_course=restricted, country='IR')
+        counts = {}
+        for size in SCALES:
+            users = create_users(size, prefix=u'embargo{}_'.format(size), country='IR')
+            enroll(users, [self.course_key])
+            response, counts[size] = self.count_queries('post', MASS_ENROLLMENT_URL, {
+                'users': [user.username for user in users],
+                'course_details': {'course_id': unicode(self.course_key)},
+            })
+            self.assertEqual(response.status_code, 403)
+            self.assertEqual(len(response.data['users']), size)
+        self.assert_same_queries(counts)
+
+    def test_job_chunk_queries_do_not_grow_with_chunk_size(self):
+        counts = {}
+        for size in SCALES:
+            users = create_users(size, prefix=u'job{}_'.format(size))
+            enroll(users, [self.course_key])
+            job = MassEnrollmentJob.objects.create(
+                course_id=self.course_key, mode=CourseMode.VERIFIED, email_opt_in=False,
+                usernames=json.dumps([user.username for user in users] + ['missing']), chunk_size=size + 1,
+            )
+            with CaptureQueriesContext(connection) as queries:
+                job = process_job_chunk(job.id, 0)
+            counts[size] = len(queries)
+            self.assertEqual((job.processed, job.succeeded, job.failed), (size + 1, size, 1))
+            self.assertEqual(job.get_errors(), {'missing': u'User does not exist.'})
+        self.assert_same_queries(counts)
+
+
+class PaidMassEnrollmentMatrixTest(ApiTestCase):
+
+    def test_queries_do_not_grow_with_users(self):
+        course_keys = create_courses(2)
+        counts = {}
+        for size in SCALES:
+            users = create_users(size, prefix=u'matrix{}_'.format(size))
+            enroll(users, course_keys)
+            response, counts[size] = self.count_queries('post', MATRIX_URL, {
+                'users': [user.username for user in users],
+                'courses': [{'course_id': unicode(course_key)} for course_key in course_keys],
+                'email_opt_in': False,
+            })
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertEqual(response.data['results'], [['upgraded', 'upgraded']] * size)
+        self.assert_same_queries(counts)
+
+
+@override_settings(API_EXTENSION_MASS_ENROLLMENT_CHUNK_SIZE=2)
+class MassEnrollmentJobTest(ApiTestCase):
+    """
+    The jobs run in the test thread: the thread pool cannot see the rows of
+    the test transaction.
+    """
+
+    def setUp(self):
+        super(MassEnrollmentJobTest, self).setUp()
+        self.course_key, = create_courses(1)
+        self.users = create_users(5)
+        enroll(self.users[:4], [self.course_key])
+        patcher = patch('open_edx_api_extension.views.start_mass_enrollment_job')
+        self.start_job = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post_job(self):
+        response, __ = self.count_queries('post', MASS_ENROLLMENT_URL, {
+            'users': [user.username for user in self.users] + ['missing'],
+            'course_details': {'course_id': unicode(self.course_key)},
+            'async': True,
+        })
+        self.assertEqual(response.status_code, 202, response.data)
+        status_path = u'{}/{}'.format(MASS_ENROLLMENT_URL, response.data['job_id'])
+        self.assertTrue(response.data['status_url'].endswith(status_path))
+        job = MassEnrollmentJob.objects.get(id=response.data['job_id'])
+        self.start_job.assert_called_once_with(job)
+        return job
+
+    def get_status(self, job):
+        response = self.client.get(u'{}/{}'.format(MASS_ENROLLMENT_URL, job.id))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_job_status(self):
+        job = self.post_job()
+        self.assertEqual(self.get_status(job)['status'], MassEnrollmentJob.PENDING)
+        self.assertEqual((job.total, job.chunks_total), (6, 3))
+
+        run_job(job.id)
+        data = self.get_status(job)
+        self.assertEqual(
+            (data['status'], data['total'], data['processed'], data['succeeded'], data['failed']),
+            (MassEnrollmentJob.SUCCEEDED, 6, 6, 4, 2)
+        )
+        self.assertEqual(data['errors'], {
+            'learner4': u'User is not enrolled for the course.',
+            'missing': u'User does not exist.',
+        })
+        self.assertEqual(
+            CourseEnrollment.objects.filter(course_id=self.course_key, mode=CourseMode.VERIFIED).count(), 4
+        )
+
+    def test_unknown_job(self):
+        response = self.client.get(u'{}/{}'.format(MASS_ENROLLMENT_URL, '0' * 32))
+        self.assertEqual(response.status_code, 404)
+
+    def test_resume_after_failure(self):
+        job = self.post_job()
+        upgrade_users = mass_enrollment.upgrade_users
+        calls = []
+
+        def fail_second_chunk(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('worker lost')
+            return upgrade_users(*args, **kwargs)
+
+        with patch('open_edx_api_extension.mass_enrollment.upgrade_users', side_effect=fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                run_job(job.id)
+        data = self.get_status(job)
+        self.assertEqual((data['status'], data['processed']), (MassEnrollmentJob.FAILED, 2))
+        self.assertEqual(MassEnrollmentJob.objects.get(id=job.id).chunks_done, 1)
+
+        run_job(job.id)
+        data = self.get_status(job)
+        # The first chunk is not applied twice
+        self.assertEqual(
+            (data['status'], data['processed'], data['succeeded'], data['failed']),
+            (MassEnrollmentJob.SUCCEEDED, 6, 4, 2)
+        )
+        self.assertEqual(EnrollmentChange.objects.count(), 4)
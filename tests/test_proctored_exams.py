@@ -0,0 +1,65 @@
+"""
+Query counts of the user proctored exams endpoints: they must not grow with
+the number of courses of the learner, nor with the number of learners.
+"""
+import json
+
+from .utils import ApiTestCase, create_courses, create_users, enroll
+
+USER_EXAMS_URL = '/api/extended/user_proctored_exams/{}/'
+USERS_EXAMS_URL = '/api/extended/user_proctored_exams/'
+
+
+class ProctoredExamsListViewTest(ApiTestCase):
+
+    def test_queries_do_not_grow_with_courses(self):
+        counts = {}
+        for scale in (5, 500):
+            user, = create_users(1, prefix=u'heavy{}_'.format(scale))
+            # Half of the courses have no proctored exam and are left out
+            course_keys = create_courses(scale // 2, prefix=u'P{}_'.format(scale))
+            create_courses(scale - scale // 2, prefix=u'R{}_'.format(scale), proctored_exams=0)
+            enroll([user], course_keys)
+            response, counts[scale] = self.count_queries('get', USER_EXAMS_URL.format(user.username))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(sorted(response.data), sorted(unicode(course_key) for course_key in course_keys))
+            course = response.data[unicode(course_keys[0])]
+            self.assertEqual(len(course['exams']), 1)
+            self.assertTrue(course['uri'].endswith(u'/api/course_structure/v0/courses/{}/'.format(course_keys[0])))
+        self.assert_same_queries(counts)
+
+    def test_courses_without_overview(self):
+        user, = create_users(1)
+        course_keys = create_courses(2)
+        enroll([user], course_keys + [course_keys[0].replace(course='Deleted')])
+        response, __ = self.count_queries('get', USER_EXAMS_URL.format(user.username))
+        self.assertEqual(sorted(response.data), sorted(unicode(course_key) for course_key in course_keys))
+
+
+class UsersProctoredExamsViewTest(ApiTestCase):
+
+    def test_queries_do_not_grow_with_users(self):
+        course_keys = create_courses(3)
+        counts = {}
+        for size in (5, 100):
+            users = create_users(size, prefix=u'batch{}_'.format(size))
+            enroll(users, course_keys[:2])
+            usernames = [user.username for user in users] + ['missing']
+            response, counts[size] = self.count_queries('post', USERS_EXAMS_URL, {'usernames': usernames})
+            self.assertEqual(response.status_code, 200)
+            results = response.data['results']
+            self.assertEqual(list(results), usernames)
+            self.assertEqual(sorted(results[users[0].username]), sorted(unicode(key) for key in course_keys[:2]))
+            self.assertEqual(results['missing'], {})
+        self.assert_same_queries(counts)
+
+    def test_stream(self):
+        course_keys = create_courses(2)
+        users = create_users(10)
+        enroll(users, course_keys)
+        response, __ = self.count_queries(
+            'post', USERS_EXAMS_URL, {'usernames': [user.username for user in users], 'stream': True}
+        )
+        lines = [json.loads(line) for line in response.streamed.splitlines()]
+        self.assertEqual([line['username'] for line in lines], [user.username for user in users])
+        self.assertEqual(len(lines[0]['courses']), 2)
@@ -0,0 +1,108 @@
+"""
+The NDJSON streams of the large lists: read page by page while they are
+sent, and gzipped when the client accepts it.
+"""
+import json
+import zlib
+
+from django.db import connection
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from open_edx_api_extension.streaming import accepts_gzip
+
+from .utils import ApiTestCase, create_courses, create_users, enroll
+
+COURSES_URL = '/api/extended/courses/'
+ENROLLMENTS_URL = '/api/extended/enrollment'
+
+
+def gunzip(data):
+    return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+
+def ndjson(data):
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+
+class StreamingTest(ApiTestCase):
+
+    def setUp(self):
+        super(StreamingTest, self).setUp()
+        self.course_keys = create_courses(5)
+
+    def stream(self, url, data=None, **headers):
+        response = self.client.get(url, data, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return response, b''.join(response.streaming_content)
+
+    def test_stream_param(self):
+        response, content = self.stream(COURSES_URL, {'stream': '1'})
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(
+            [course['id'] for course in ndjson(content)], sorted(unicode(course_key) for course_key in self.course_keys)
+        )
+
+    def test_accept_header(self):
+        __, content = self.stream(COURSES_URL, HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(len(ndjson(content)), 5)
+
+    def test_gzip(self):
+        __, plain = self.stream(COURSES_URL, {'stream': '1'})
+        response, content = self.stream(COURSES_URL, {'stream': '1'}, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gunzip(content), plain)
+
+    def test_gzip_refused(self):
+        response, content = self.stream(COURSES_URL, {'stream': '1'}, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(len(ndjson(content)), 5)
+
+    def test_gzip_etag(self):
+        plain, __ = self.stream(COURSES_URL, {'stream': '1'})
+        gzipped, __ = self.stream(COURSES_URL, {'stream': '1'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotEqual(gzipped['ETag'], plain['ETag'])
+        not_modified = self.client.get(
+            COURSES_URL, {'stream': '1'}, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=gzipped['ETag']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], gzipped['ETag'])
+
+    def test_read_while_sent(self):
+        users = create_users(3)
+        enroll(users, self.course_keys)
+        response = self.client.get(ENROLLMENTS_URL, {'stream': '1'})
+        with CaptureQueriesContext(connection) as queries:
+            enrollments = ndjson(b''.join(response.streaming_content))
+        self.assertGreater(len(queries), 0)
+        self.assertEqual(len(enrollments), 15)
+        self.assertEqual(
+            sorted(set(enrollment['user'] for enrollment in enrollments)), [user.username for user in users]
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(COURSES_URL, {'stream': '1', 'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AcceptsGzipTest(ApiTestCase):
+
+    def test_accept_encoding(self):
+        cases = [
+            ('', False),
+            ('gzip', True),
+            ('deflate, GZIP', True),
+            ('gzip;q=0', False),
+            ('gzip;q=0.5', True),
+            ('x-gzip', True),
+            ('*', True),
+            ('*;q=0', False),
+            ('identity', False),
+            ('gzip;q=invalid', False),
+        ]
+        for accept_encoding, accepted in cases:
+            request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertEqual(accepts_gzip(request), accepted, accept_encoding)
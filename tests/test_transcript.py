@@ -0,0 +1,101 @@
+"""
+The learner transcript: the courses without a snapshot are graded on the
+pool, and the ones not graded in time are reported as timed out or busy.
+"""
+import threading
+
+from mock import patch
+
+from open_edx_api_extension import transcript
+from open_edx_api_extension.grade_snapshots import get_grade_summary
+from open_edx_api_extension.transcript import BUSY, FAILED, GRADED, TIMED_OUT, get_transcript
+
+from .utils import ThreadedApiTestCase, create_courses, create_users, enroll
+
+GRADES_URL = '/api/extended/users/{}/grades/'
+
+
+class TranscriptTest(ThreadedApiTestCase):
+
+    def setUp(self):
+        super(TranscriptTest, self).setUp()
+        self.course_keys = create_courses(3)
+        self.student, = create_users(1)
+        enroll([self.student], self.course_keys)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def statuses(self, records):
+        return [(record['course_id'], record['status']) for record in records]
+
+    def expected(self, *statuses):
+        return [(unicode(course_key), status) for course_key, status in zip(self.course_keys, statuses)]
+
+    def blocked_on(self, blocked_course_keys):
+        """
+        get_grade_summary waiting for self.release in the given courses.
+        """
+        def grade(student, course_key, *args, **kwargs):
+            if course_key in blocked_course_keys:
+                self.release.wait(5)
+            return get_grade_summary(student, course_key, *args, **kwargs)
+        return patch.object(transcript, 'get_grade_summary', side_effect=grade)
+
+    def test_graded(self):
+        response = self.client.get(GRADES_URL.format(self.student.username))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['complete'])
+        self.assertEqual(self.statuses(response.data['courses']), self.expected(GRADED, GRADED, GRADED))
+        self.assertEqual(response.data['courses'][0]['grade_summary']['percent'], 0)
+
+        # Served from the snapshots
+        with patch.object(transcript, 'get_grade_summary') as grade:
+            records = get_transcript(self.student)
+        self.assertFalse(grade.called)
+        self.assertEqual(self.statuses(records), self.expected(GRADED, GRADED, GRADED))
+
+    def test_timeout(self):
+        with self.blocked_on([self.course_keys[1]]):
+            records = get_transcript(self.student, timeout=0.2)
+        self.assertEqual(self.statuses(records), self.expected(GRADED, TIMED_OUT, GRADED))
+        self.assertIsNone(records[1]['grade_summary'])
+
+    def test_failure(self):
+        def grade(student, course_key, *args, **kwargs):
+            if course_key == self.course_keys[0]:
+                raise ValueError(course_key)
+            return get_grade_summary(student, course_key, *args, **kwargs)
+
+        with patch.object(transcript, 'get_grade_summary', side_effect=grade):
+            records = get_transcript(self.student)
+        self.assertEqual(self.statuses(records), self.expected(FAILED, GRADED, GRADED))
+
+    def test_more_courses_than_the_queue(self):
+        with patch.object(transcript, '_queue_slots', transcript._QueueSlots(1)):  # pylint: disable=protected-access
+            records = get_transcript(self.student, fresh=True)
+        self.assertEqual(self.statuses(records), self.expected(GRADED, GRADED, GRADED))
+
+    def test_busy(self):
+        slots = transcript._QueueSlots(1)  # pylint: disable=protected-access
+        with patch.object(transcript, '_queue_slots', slots), self.blocked_on([self.course_keys[0]]):
+            records = get_transcript(self.student, timeout=0.2)
+            self.assertEqual(self.statuses(records), self.expected(TIMED_OUT, BUSY, BUSY))
+            self.release.set()
+            # The slot of the course graded in the background is given back
+            records = get_transcript(self.student)
+        self.assertEqual(self.statuses(records), self.expected(GRADED, GRADED, GRADED))
+        self.assertEqual(slots.used, 0)
+
+
+class QueueSlotsTest(ThreadedApiTestCase):
+
+    def test_wait_for_a_slot(self):
+        slots = transcript._QueueSlots(1)  # pylint: disable=protected-access
+        now = transcript.time.time()
+        self.assertTrue(slots.acquire(now + 1))
+        self.assertFalse(slots.acquire(now + 0.05))
+        threading.Timer(0.05, slots.release).start()
+        self.assertTrue(slots.acquire(now + 5))
+        slots.release()
+        with self.assertRaises(ValueError):
+            slots.release()
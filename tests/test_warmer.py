@@ -0,0 +1,109 @@
+"""
+The cache warmer: it prebuilds the missing course list fragments and exams,
+and is scheduled by the publish and exam signals.
+"""
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mock import patch
+
+from edx_proctoring.models import ProctoredExam
+from xmodule.modulestore.django import SignalHandler, modulestore
+
+from open_edx_api_extension import exam_cache, tasks
+from open_edx_api_extension.models import CourseCatalogEntry
+from open_edx_api_extension.serializers import CourseCatalogSerializer
+from open_edx_api_extension.warmer import warm_course_cache
+
+from .utils import ApiTestCase, create_courses
+
+COURSES_WITH_EXAMS_URL = '/api/extended/courses/proctored'
+
+
+class WarmerTest(ApiTestCase):
+
+    def setUp(self):
+        super(WarmerTest, self).setUp()
+        self.course_keys = create_courses(5)
+
+    def test_warm(self):
+        self.assertEqual(warm_course_cache(batch_size=2), (5, 5))
+        # Everything is in the cache now
+        self.assertEqual(warm_course_cache(batch_size=2), (5, 0))
+
+        with patch.object(CourseCatalogSerializer, 'build_fragment', side_effect=AssertionError('cold')):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(COURSES_WITH_EXAMS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertFalse(any('proctoredexam' in query['sql'].lower() for query in queries.captured_queries))
+
+    def test_only_the_changed_courses(self):
+        warm_course_cache()
+        CourseCatalogEntry.objects.filter(course_id=self.course_keys[0]).update(modified=timezone.now())
+        ProctoredExam.objects.create(
+            course_id=unicode(self.course_keys[1]), content_id='block-v1:new', exam_name='New exam',
+            time_limit_mins=30,
+        )
+        exam_cache.stats.reset()
+        # The exam counts of the second course changed with its catalog entry
+        self.assertEqual(warm_course_cache(), (5, 2))
+        self.assertEqual(exam_cache.stats.misses, 1)
+
+    def test_some_courses(self):
+        self.assertEqual(warm_course_cache(self.course_keys[:2]), (2, 2))
+        self.assertEqual(warm_course_cache(), (5, 3))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('warm_api_extension_cache', course_ids=[unicode(self.course_keys[0])], stdout=out)
+        self.assertEqual(out.getvalue().strip(), u'Checked 1 courses, built 1 fragments.')
+        out = StringIO()
+        call_command('warm_api_extension_cache', stdout=out)
+        self.assertEqual(out.getvalue().strip(), u'Checked 5 courses, built 4 fragments.')
+
+
+class WarmerSchedulingTest(ApiTestCase):
+
+    def setUp(self):
+        super(WarmerSchedulingTest, self).setUp()
+        patcher = patch.object(tasks.warm_api_extension_cache, 'apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+        # Turned off by the test settings
+        patcher = patch.object(tasks, 'CACHE_WARMER_ENABLED', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scheduled(self):
+        return [call_args[1]['args'] for call_args in self.apply_async.call_args_list]
+
+    def test_publish(self):
+        course = modulestore().create_course('TestX', 'Warm', 'Run')
+        SignalHandler.course_published.send(sender=None, course_key=course.id)
+        self.assertEqual(self.scheduled(), [([unicode(course.id)],)])
+        __, options = self.apply_async.call_args
+        self.assertEqual(options.get('countdown'), tasks.CACHE_WARMER_DELAY)
+
+    def test_exam_change(self):
+        course_key, = create_courses(1, exams=0)
+        ProctoredExam.objects.create(
+            course_id=unicode(course_key), content_id='block-v1:new', exam_name='New exam', time_limit_mins=30,
+        )
+        self.assertEqual(self.scheduled(), [([unicode(course_key)],)])
+
+    def test_disabled(self):
+        course_key, = create_courses(1, exams=0)
+        with patch.object(tasks, 'CACHE_WARMER_ENABLED', False):
+            ProctoredExam.objects.create(
+                course_id=unicode(course_key), content_id='block-v1:new', exam_name='New exam', time_limit_mins=30,
+            )
+        self.assertFalse(self.apply_async.called)
+
+    def test_task(self):
+        course_keys = create_courses(2)
+        tasks.warm_api_extension_cache([unicode(course_keys[0])])
+        self.assertEqual(warm_course_cache(), (2, 1))
@@ -0,0 +1,13 @@
+"""
+URLs of the test harness: the API extension where the LMS mounts it, and
+the course detail URL its course URIs point to.
+"""
+from django.conf.urls import include, url
+
+urlpatterns = [
+    url(r'^api/extended/', include('open_edx_api_extension.urls', namespace='api_extension')),
+    url(r'^api/course_structure/', include(
+        [url(r'^v0/', include('course_structure_api.v0.urls', namespace='v0'))],
+        namespace='course_structure_api'
+    )),
+]
@@ -0,0 +1,188 @@
+"""
+Synthetic data and the base test case of the harness.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mock import patch
+from opaque_keys.edx.locator import LibraryLocator
+from rest_framework.test import APIClient
+
+from course_modes.models import CourseMode
+from edx_proctoring.models import ProctoredExam
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from student.models import CourseEnrollment, UserProfile
+from xmodule.modulestore.django import modulestore
+
+from open_edx_api_extension import exam_cache
+from open_edx_api_extension.models import CourseCatalogEntry, LibraryCatalogEntry
+
+
+def create_courses(count, org='TestX', prefix='C', exams=2, proctored_exams=1, modes=(CourseMode.VERIFIED,)):
+    """
+    Create `count` courses in the modulestore with their overview, catalog
+    entry, exams and modes.
+
+    Returns:
+        The list of the course keys.
+    """
+    store = modulestore()
+    courses = [store.create_course(org, u'{}{:06d}'.format(prefix, index), 'Run') for index in range(count)]
+    course_keys = [course.id for course in courses]
+    CourseOverview.objects.bulk_create([
+        CourseOverview(
+            id=course.id, display_name=course.display_name, display_org_with_default=org,
+            start=course.start, course_image_url=u'/asset/{}'.format(course.id)
+        )
+        for course in courses
+    ])
+    CourseCatalogEntry.objects.bulk_create([
+        CourseCatalogEntry(
+            course_id=course.id, display_name=course.display_name, org=org, course=course.id.course,
+            run=course.id.run, start=course.start, has_proctored_exams=proctored_exams > 0,
+            exam_count=exams, proctored_exam_count=proctored_exams, active_proctored_exam_count=proctored_exams,
+        )
+        for course in courses
+    ])
+    ProctoredExam.objects.bulk_create([
+        ProctoredExam(
+            course_id=unicode(course_key), content_id=u'block-v1:{}+type@sequential+block@exam{}'.format(
+                course_key.course, index
+            ),
+            exam_name=u'Exam {}'.format(index), time_limit_mins=60, is_proctored=index < proctored_exams,
+            is_active=True,
+        )
+        for course_key in course_keys for index in range(exams)
+    ])
+    CourseMode.objects.bulk_create([
+        CourseMode(course_id=course_key, mode_slug=mode, mode_display_name=mode.title())
+        for course_key in course_keys for mode in modes
+    ])
+    return course_keys
+
+
+def create_libraries(count, org='TestX'):
+    now = timezone.now()
+    LibraryCatalogEntry.objects.bulk_create([
+        LibraryCatalogEntry(
+            library_key=LibraryLocator(org, u'L{:06d}'.format(index)), display_name=u'Library {}'.format(index),
+            org=org, block_count=10, last_published=now,
+        )
+        for index in range(count)
+    ])
+
+
+def create_users(count, prefix='learner', country=None):
+    """
+    Returns:
+        The list of the users, with their profile, in creation order.
+    """
+    User.objects.bulk_create([
+        User(username=u'{}{}'.format(prefix, index), email=u'{}{}@example.com'.format(prefix, index))
+        for index in range(count)
+    ])
+    users = list(User.objects.filter(username__startswith=prefix).order_by('id'))
+    UserProfile.objects.bulk_create([
+        UserProfile(user=user, name=user.username.title(), country=country) for user in users
+    ])
+    return users
+
+
+def enroll(users, course_keys, mode=CourseMode.HONOR):
+    """
+    Enroll every user in every course, without the post_save signals.
+    """
+    CourseEnrollment.objects.bulk_create([
+        CourseEnrollment(user=user, course_id=course_key, mode=mode)
+        for user in users for course_key in course_keys
+    ])
+
+
+class ApiTestCase(TestCase):
+    """
+    Calls the API as a staff user, with empty caches.
+    """
+
+    def setUp(self):
+        super(ApiTestCase, self).setUp()
+        self.clear_caches()
+        modulestore().reset()
+        self.staff = User.objects.create(username='staff', email='staff@example.com', is_staff=True)
+        UserProfile.objects.create(user=self.staff, name='Staff')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    @staticmethod
+    def clear_caches():
+        cache.clear()
+        exam_cache._local_cache.clear()  # pylint: disable=protected-access
+
+    def count_queries(self, method, path, data=None, **extra):
+        """
+        Call the API with cold caches.
+
+        Returns:
+            (response, number of SQL queries)
+        """
+        self.clear_caches()
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'post':
+                response = self.client.post(path, data, format='json', **extra)
+            else:
+                response = self.client.get(path, data, **extra)
+            if response.streaming:
+                response.streamed = b''.join(response.streaming_content)
+        return response, len(queries)
+
+    def assert_same_queries(self, counts):
+        """
+        The query counts measured at every scale are equal, i.e. the cost does
+        not grow with the amount of data.
+        """
+        self.assertEqual(len(set(counts.values())), 1, u"Query counts by scale: {}".format(sorted(counts.items())))
+
+
+
+class _SharedConnections(object):
+    """
+    Holds the connections of ConnectionHandler for all the threads.
+    """
+    pass
+
+
+def share_connections():
+    """
+    Make every thread use the database connections of the calling thread.
+
+    An in-memory database only exists for its connection, so the pool
+    threads share the connection of the test (like the server thread of
+    LiveServerTestCase) and see the rows of its transaction.
+
+    Returns:
+        The function restoring the per-thread connections.
+    """
+    shared = _SharedConnections()
+    for alias in connections:
+        connections[alias].allow_thread_sharing = True
+        setattr(shared, alias, connections[alias])
+    patcher = patch.object(connections, '_connections', shared)
+    patcher.start()
+
+    def restore():
+        patcher.stop()
+        for alias in connections:
+            connections[alias].allow_thread_sharing = False
+    return restore
+
+
+class ThreadedApiTestCase(ApiTestCase):
+    """
+    For the code run on pool threads, see share_connections.
+    """
+
+    def setUp(self):
+        super(ThreadedApiTestCase, self).setUp()
+        self.addCleanup(share_connections())